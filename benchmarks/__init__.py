@@ -0,0 +1,3 @@
+"""
+Benchmarks of :mod:`dariah_topics`, see :mod:`benchmarks.run`.
+"""
@@ -0,0 +1,212 @@
+"""
+Benchmarks of Preprocessing, Modeling, Postprocessing and Evaluation
+********************************************************************
+
+Every class measures a group of functions on a corpus scaled by the factors \
+in ``params``. :meth:`setup` prepares the input of a scale factor once, and \
+every ``time_*`` method is one benchmark. The layout follows `asv \
+<https://asv.readthedocs.io/>`_, so the classes also run with ``asv run``; \
+:mod:`benchmarks.run` runs them without further dependencies and keeps the \
+history of the results.
+
+The corpus is one of the corpora in ``notebooks/data``, selected by the \
+environment variable ``DARIAH_TOPICS_BENCHMARK_CORPUS`` (default \
+``grenzboten_sample``). A scale factor of 2 repeats every document twice \
+under a new label, 0.5 keeps the first half of the documents.
+
+With ``DARIAH_TOPICS_BENCHMARK_CORPUS=synthetic:10000`` the benchmarks run on \
+a :class:`dariah_topics.synthetic.SyntheticCorpus` of 10000 documents per \
+scale factor instead, so a scale factor of 100 means a million documents.
+"""
+
+import functools
+import itertools
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from dariah_topics.preprocessing import (create_document_term_matrix, find_hapax_legomena, list_mfw, read_files,
+                                         remove_features, segment, split_paragraphs, tokenize)
+from dariah_topics import evaluation, modeling, postprocessing
+from dariah_topics.synthetic import SyntheticCorpus
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'notebooks', 'data')
+SCALES = [1, 2, 4]
+
+
+@functools.lru_cache(maxsize=None)
+def scaled_corpus(scale):
+    """Reads the benchmark corpus, scaled by a factor.
+
+    Args:
+        scale (float): Scale factor of the number of documents.
+
+    Returns:
+        Document labels and documents, both as tuples.
+    """
+    corpus = os.environ.get('DARIAH_TOPICS_BENCHMARK_CORPUS', 'grenzboten_sample')
+    if corpus.startswith('synthetic:'):
+        num_documents = max(int(round(int(corpus.split(':')[1]) * scale)), 1)
+        synthetic = SyntheticCorpus(num_documents, random_state=0)
+        return tuple(map(synthetic.label, range(num_documents))), tuple(map(synthetic.text, range(num_documents)))
+    directory = corpus if os.path.isdir(corpus) else os.path.join(DATA, corpus)
+    pathlist = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.txt'))
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in pathlist]
+    documents = list(read_files(pathlist))
+    num_documents = max(int(round(len(documents) * scale)), 1)
+    copies = itertools.islice(itertools.cycle(zip(labels, documents)), num_documents)
+    labels, documents = zip(*[('{}_{}'.format(label, n // len(pathlist)), document)
+                              for n, (label, document) in enumerate(copies)])
+    return labels, documents
+
+
+@functools.lru_cache(maxsize=None)
+def tokenized_corpus(scale):
+    """Tokenizes the scaled benchmark corpus."""
+    labels, documents = scaled_corpus(scale)
+    return labels, tuple(list(tokenize(document)) for document in documents)
+
+
+@functools.lru_cache(maxsize=None)
+def small_corpus_model(scale):
+    """Creates the document-term matrix of the scaled corpus."""
+    labels, tokens = tokenized_corpus(scale)
+    return create_document_term_matrix(tokens, labels)
+
+
+@functools.lru_cache(maxsize=None)
+def large_corpus_model(scale):
+    """Creates the document-term matrix for large corpora and the type IDs."""
+    labels, tokens = tokenized_corpus(scale)
+    document_term_matrix, _, type_ids = create_document_term_matrix(tokens, labels, large_corpus=True)
+    return document_term_matrix, type_ids
+
+
+class ReadFiles:
+    params = SCALES
+
+    def setup(self, scale):
+        labels, documents = scaled_corpus(scale)
+        self.directory = tempfile.mkdtemp()
+        self.pathlist = []
+        for label, document in zip(labels, documents):
+            path = os.path.join(self.directory, '{}.txt'.format(label))
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(document)
+            self.pathlist.append(path)
+
+    def teardown(self, scale):
+        shutil.rmtree(self.directory)
+
+    def time_read_files(self, scale):
+        list(read_files(self.pathlist))
+
+
+class Tokenize:
+    params = SCALES
+
+    def setup(self, scale):
+        self.documents = scaled_corpus(scale)[1]
+        self.paragraphs = [[list(tokenize(paragraph)) for paragraph in split_paragraphs(document)]
+                           for document in self.documents]
+
+    def time_tokenize(self, scale):
+        for document in self.documents:
+            list(tokenize(document))
+
+    def time_segment(self, scale):
+        for paragraphs in self.paragraphs:
+            segment(paragraphs, segment_size=1000, tolerance=0.05)
+
+
+class DocumentTermMatrix:
+    params = SCALES
+
+    def setup(self, scale):
+        self.labels, self.tokens = tokenized_corpus(scale)
+
+    def time_small_corpus_model(self, scale):
+        create_document_term_matrix(self.tokens, self.labels)
+
+    def time_large_corpus_model(self, scale):
+        create_document_term_matrix(self.tokens, self.labels, large_corpus=True)
+
+
+class RemoveFeatures:
+    params = SCALES
+
+    def setup(self, scale):
+        self.tokens = tokenized_corpus(scale)[1]
+        self.small = small_corpus_model(scale)
+        self.features = list_mfw(self.small, 100) + find_hapax_legomena(self.small)
+
+    def time_small_corpus_model(self, scale):
+        remove_features(self.features, document_term_matrix=self.small)
+
+    def time_tokenized_corpus(self, scale):
+        remove_features(self.features, tokenized_corpus=self.tokens)
+
+
+class LargeCorpusModel:
+    params = SCALES
+
+    def setup(self, scale):
+        self.large, self.type_ids = large_corpus_model(scale)
+        small = small_corpus_model(scale)
+        self.features = list_mfw(small, 100) + find_hapax_legomena(small)
+
+    def time_remove_features(self, scale):
+        remove_features(self.features, document_term_matrix=self.large, type_ids=self.type_ids)
+
+    def time_doc2bow(self, scale):
+        postprocessing.doc2bow(self.large)
+
+
+class Coherence:
+    params = SCALES
+
+    def setup(self, scale):
+        self.large, self.type_ids = large_corpus_model(scale)
+        keys = small_corpus_model(scale).columns[100:200].values.reshape(10, 10)
+        self.topics = pd.DataFrame(keys, index=['Topic {}'.format(n) for n in range(10)])
+
+    def time_umass(self, scale):
+        evaluation.Evaluation(self.topics, self.large, self.type_ids).calculate_umass()
+
+    def time_uci(self, scale):
+        evaluation.Evaluation(self.topics, self.large, self.type_ids).calculate_uci()
+
+
+class Show:
+    params = SCALES
+
+    def setup(self, scale):
+        small = small_corpus_model(scale)
+        self.labels = list(small.index)
+        self.vocabulary = list(small.columns)
+        self.model = modeling.GibbsLDA(n_topics=20, n_iter=5, random_state=0).fit(small.values.astype(np.int64))
+        self.topics = postprocessing.show_topics(model=self.model, vocabulary=self.vocabulary)
+
+    def time_show_topics(self, scale):
+        postprocessing.show_topics(model=self.model, vocabulary=self.vocabulary, num_keys=10)
+
+    def time_show_document_topics(self, scale):
+        postprocessing.show_document_topics(self.topics, model=self.model, document_labels=self.labels)
+
+    def time_show_topic_key_weights(self, scale):
+        for topic_no in range(self.model.n_topics):
+            postprocessing.show_topic_key_weights(topic_no, 10, model=self.model, vocabulary=self.vocabulary)
+
+
+class Sampling:
+    params = SCALES
+
+    def setup(self, scale):
+        self.document_term_matrix = small_corpus_model(scale).values.astype(np.int64)
+
+    def time_gibbs_500_topics(self, scale):
+        modeling.GibbsLDA(n_topics=500, n_iter=1, random_state=0).fit(self.document_term_matrix)
+
+    def time_alias_500_topics(self, scale):
+        modeling.AliasLDA(n_topics=500, n_iter=1, random_state=0).fit(self.document_term_matrix)
@@ -0,0 +1,175 @@
+"""
+Running the Benchmarks and Keeping Their History
+************************************************
+
+Run ``python -m benchmarks.run`` from the root of the repository to time \
+every benchmark of :mod:`benchmarks.benchmarks` at every scale factor. Each \
+benchmark runs ``--repeat`` times after its setup and the fastest run is \
+kept. The results are appended as one JSON line to the history file \
+(default ``benchmarks/results/history.jsonl``) together with the commit, \
+the Python version and the machine, and compared with the latest earlier \
+run on the same machine. Benchmarks slower by more than ``--threshold`` are \
+reported as regressions; with ``--fail-on-regression`` the exit status is 1 then.
+
+    python -m benchmarks.run --scales 1 2 4 --filter Tokenize
+"""
+
+import argparse
+import datetime
+import inspect
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+log = logging.getLogger('dariah_topics')
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'history.jsonl')
+
+
+def run_benchmarks(scales, repeat=3, pattern=None):
+    """Times the benchmarks.
+
+    Args:
+        scales (list): Scale factors of the corpus.
+        repeat (int, optional): Runs per benchmark. Defaults to 3.
+        pattern (str, optional): Regular expression selecting benchmarks by
+            ``Class.time_method``. Defaults to None, which runs all.
+
+    Returns:
+        A list of dictionaries with ``benchmark``, ``scale``, ``seconds`` (the
+        fastest run) and ``error`` (None, or the message if the benchmark
+        failed).
+    """
+    from benchmarks import benchmarks
+    results = []
+    for class_name, cls in inspect.getmembers(benchmarks, inspect.isclass):
+        if cls.__module__ != benchmarks.__name__:
+            continue
+        names = ['{}.{}'.format(class_name, name) for name in sorted(vars(cls)) if name.startswith('time_')]
+        names = [name for name in names if pattern is None or re.search(pattern, name)]
+        if not names:
+            continue
+        for scale in scales:
+            instance = cls()
+            try:
+                instance.setup(scale)
+            except Exception as error:
+                log.warning("Setup of {} failed at scale {}: {!r}".format(class_name, scale, error))
+                results.extend({'benchmark': name, 'scale': scale, 'seconds': None, 'error': repr(error)}
+                               for name in names)
+                continue
+            try:
+                for name in names:
+                    results.append(_time(getattr(instance, name.split('.')[1]), name, scale, repeat))
+            finally:
+                if hasattr(instance, 'teardown'):
+                    instance.teardown(scale)
+    return results
+
+
+def compare(results, previous, threshold=1.2):
+    """Compares results with an earlier run.
+
+    Args:
+        results (list): Results of :func:`run_benchmarks()`.
+        previous (list): Results of an earlier run, or None.
+        threshold (float, optional): Ratio of the new to the old time above
+            which a benchmark counts as regression. Defaults to 1.2.
+
+    Returns:
+        A list of rows with ``benchmark``, ``scale``, ``seconds``,
+        ``previous``, ``ratio`` and ``regression``.
+    """
+    earlier = {(result['benchmark'], result['scale']): result['seconds'] for result in previous or []}
+    rows = []
+    for result in results:
+        old = earlier.get((result['benchmark'], result['scale']))
+        ratio = result['seconds'] / old if result['seconds'] is not None and old else None
+        rows.append({'benchmark': result['benchmark'], 'scale': result['scale'], 'seconds': result['seconds'],
+                     'previous': old, 'ratio': ratio, 'regression': ratio is not None and ratio > threshold})
+    return rows
+
+
+def read_history(filepath=HISTORY):
+    """Reads the history of benchmark runs.
+
+    Args:
+        filepath (str, optional): Path to the history file.
+
+    Returns:
+        A list of runs, oldest first.
+    """
+    if not os.path.exists(filepath):
+        return []
+    with open(filepath, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description="Run the benchmarks.")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 2, 4], help="Scale factors of the corpus.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark, the fastest is kept.")
+    parser.add_argument('--filter', help="Regular expression selecting benchmarks, e.g. 'Tokenize|Show'.")
+    parser.add_argument('--history', default=HISTORY, help="JSON lines file keeping the results of all runs.")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as regression.")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    scales = [int(scale) if scale.is_integer() else scale for scale in args.scales]
+
+    results = run_benchmarks(scales, args.repeat, args.filter)
+    run = {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': _commit(),
+           'python': platform.python_version(), 'machine': platform.node(), 'platform': platform.platform(),
+           'results': results}
+    earlier = [entry for entry in read_history(args.history) if entry['machine'] == run['machine']]
+    rows = compare(results, earlier[-1]['results'] if earlier else None, args.threshold)
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(run) + '\n')
+
+    print('{:<50}{:>8}{:>12}{:>12}{:>8}'.format('benchmark', 'scale', 'seconds', 'previous', 'ratio'))
+    for row, result in zip(rows, results):
+        if result['error'] is not None:
+            print('{:<50}{:>8}  failed: {}'.format(row['benchmark'], row['scale'], result['error'][:60]))
+            continue
+        print('{:<50}{:>8}{:>12.4f}{:>12}{:>8}{}'.format(
+            row['benchmark'], row['scale'], row['seconds'],
+            '' if row['previous'] is None else '{:.4f}'.format(row['previous']),
+            '' if row['ratio'] is None else '{:.2f}'.format(row['ratio']),
+            '  REGRESSION' if row['regression'] else ''))
+    if args.fail_on_regression and any(row['regression'] for row in rows):
+        return 1
+    return 0
+
+
+def _time(method, name, scale, repeat):
+    """Runs a benchmark method ``repeat`` times and keeps the fastest run."""
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            method(scale)
+            timings.append(time.perf_counter() - start)
+    except Exception as error:
+        log.warning("{} failed at scale {}: {!r}".format(name, scale, error))
+        return {'benchmark': name, 'scale': scale, 'seconds': None, 'error': repr(error)}
+    return {'benchmark': name, 'scale': scale, 'seconds': min(timings), 'error': None}
+
+
+def _commit():
+    """Returns the current git commit, or None outside of a repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              universal_newlines=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+if __name__ == '__main__':
+    sys.exit(main())
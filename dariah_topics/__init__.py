@@ -1,5 +1,5 @@
 """
-The :mod:`dariah_topics` package currently offers seven modules:
+The :mod:`dariah_topics` package currently offers eleven modules:
 
 * :mod:`dariah_topics.evaluation` for evaluating semantic coherence of topics.
 * :mod:`dariah_topics.postprocessing` for postprocessing text data.
@@ -7,14 +7,41 @@ The :mod:`dariah_topics` package currently offers seven modules:
 * :mod:`dariah_topics.utils` for some useful command-line utils.
 * :mod:`dariah_topics.visualization` for visualizing the output of LDA models.
 * :mod:`dariah_topics.modeling` is a wrapper for the LDA implementations.
+* :mod:`dariah_topics.server` for serving topic inference to other processes.
+* :mod:`dariah_topics.pipeline` for running the whole workflow from the command-line.
+* :mod:`dariah_topics.profiling` for recording time and memory of the workflow.
+* :mod:`dariah_topics.synthetic` for generating synthetic corpora with planted topics.
+* :mod:`dariah_topics.shared` for sharing document-term matrices with worker processes.
+
+The modules are imported on first access, so that e.g. preprocessing does not \
+wait for Gensim, Matplotlib or Bokeh to load.
 """
 
-from dariah_topics import evaluation
-from dariah_topics import postprocessing
-from cophi_toolbox import preprocessing
-from dariah_topics import utils
-from dariah_topics import visualization
-from dariah_topics import modeling
+import importlib
+
+_modules = {'evaluation': 'dariah_topics.evaluation',
+            'postprocessing': 'dariah_topics.postprocessing',
+            'preprocessing': 'cophi_toolbox.preprocessing',
+            'utils': 'dariah_topics.utils',
+            'visualization': 'dariah_topics.visualization',
+            'modeling': 'dariah_topics.modeling',
+            'server': 'dariah_topics.server',
+            'pipeline': 'dariah_topics.pipeline',
+            'profiling': 'dariah_topics.profiling',
+            'synthetic': 'dariah_topics.synthetic',
+            'shared': 'dariah_topics.shared'}
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError("module 'dariah_topics' has no attribute '{}'".format(name))
+    module = importlib.import_module(_modules[name])
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules))
 
 __author__ = "Sina Bock, Philip Duerholt, Michael Huber, Thora Hagen, Severin Simmler, Thorsten Vitt"
 __version__ = "1.0"
@@ -1,25 +1,2012 @@
-import lda
-from dariah_topics import utils
-import gensim
+"""
+Training LDA Models
+*******************
+
+Functions and classes of this module are for **training LDA models**. You can \
+train a topic model with :func:`lda()`, which is a wrapper for the supported \
+implementations: `lda <https://pypi.python.org/pypi/lda>`_, `Gensim <https://radimrehurek.com/gensim/>`_, \
+`MALLET <http://mallet.cs.umass.edu/topics.php>`_ and an in-package collapsed \
+Gibbs sampler based on `NumPy <http://www.numpy.org/>`_.
+
+Contents
+********
+    * :func:`lda()` trains a LDA model with one of the supported implementations.
+    * :func:`sweep()` trains a grid of topic numbers, priors and seeds in a \
+    process pool and scores each model by held-out perplexity and coherence.
+    * :func:`infer()` infers the topic distributions of new documents with a \
+    trained model of any supported implementation.
+    * :func:`mallet_state_to_checkpoint()` converts a MALLET Gibbs sampling \
+    state to a checkpoint, to continue training with the in-package samplers.
+    * :class:`GibbsLDA` is a dependency-light collapsed Gibbs sampler working on \
+    token ID arrays with NumPy count tables.
+    * :class:`AliasLDA` is a vectorized Metropolis-Hastings sampler, whose cost \
+    per token does not grow with the number of topics.
+    * :class:`DistributedGibbsLDA` is an approximate distributed Gibbs sampler \
+    (AD-LDA), which samples partitions of the documents in a process pool.
+    * :class:`OnlineLDA` is a stochastic variational Bayes trainer, which \
+    consumes minibatches from a stream of documents.
+    * :class:`TrainingMonitor` records log likelihood, perplexity and wall time \
+    during training and stops it early, once the log likelihood plateaus.
+"""
+
+from itertools import islice, product
+import logging
+from multiprocessing import Pool
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.special import gammaln, psi
+from dariah_topics import postprocessing, utils
+from dariah_topics.shared import SharedArrays, SharedDocumentTermMatrix
+
+log = logging.getLogger('dariah_topics')
+
 
 def lda(document_term_matrix, topics, iterations=1000, implementation='lda', gensim_corpus=None,
         type2id=None, path_to_mallet=None, clean_tokenized_corpus=None, document_labels=None,
-        output_topic_keys=None, output_doc_topics=None, **kwargs):
+        output_topic_keys=None, output_doc_topics=None, corpus_stream=None, checkpoint=None,
+        checkpoint_interval=100, resume_from=None, monitor=None, **kwargs):
+    """Trains a LDA model.
+
+    With this function you can train a LDA model with one of the supported \
+    implementations. Use ``implementation`` to select it:
+        * ``lda`` for the `lda <https://pypi.python.org/pypi/lda>`_ package, \
+        which expects a ``document_term_matrix``.
+        * ``gensim`` for :class:`gensim.models.LdaMulticore`, which expects \
+        ``gensim_corpus`` and ``type2id``.
+        * ``mallet`` for `MALLET <http://mallet.cs.umass.edu/topics.php>`_, which \
+        expects ``clean_tokenized_corpus`` and ``document_labels``.
+        * ``gibbs`` for :class:`GibbsLDA`, which expects a ``document_term_matrix``. \
+        It samples in pure Python and is meant for small corpora.
+        * ``alias`` for :class:`AliasLDA`, which expects a ``document_term_matrix``.
+        * ``distributed`` for :class:`DistributedGibbsLDA`, which expects a \
+        ``document_term_matrix``.
+        * ``online`` for :class:`OnlineLDA`, which expects ``corpus_stream`` and \
+        ``type2id``. Here, ``iterations`` limits the E-step iterations per document.
+
+    Every implementation can write checkpoints every ``checkpoint_interval`` \
+    steps and resume training with ``resume_from``. A step is an iteration for \
+    the Gibbs samplers and MALLET, a pass over the corpus for Gensim (pass \
+    ``passes``) and a minibatch for ``online``. The lda package and the \
+    in-package implementations write compressed NumPy archives, Gensim and \
+    MALLET their own model formats. MALLET checkpoints are named \
+    ``checkpoint.<iteration>``; resume from one of those.
+
+    Pass a :class:`TrainingMonitor` as ``monitor`` to record the log likelihood \
+    per token, the perplexity and the wall time every ``monitor.interval`` \
+    steps, and to stop early once the log likelihood plateaus. The samplers \
+    report the joint log likelihood of tokens and topic assignments, Gensim \
+    its variational bound and ``online`` the predictive log likelihood of each \
+    minibatch before it is learned. For MALLET, the trace is parsed from its \
+    progress output; MALLET writes its output files only at the end, so it \
+    is never stopped early.
+
+    Args:
+        document_term_matrix (array-like): A document-term matrix with rows
+            corresponding to documents and columns corresponding to types. Only
+            for ``lda``, ``gibbs``, ``alias`` and ``distributed``.
+        topics (int): Number of topics.
+        iterations (int, optional): Number of iterations. Defaults to 1000.
+        implementation (str, optional): The LDA implementation. Defaults to ``lda``.
+        gensim_corpus (list, optional): Only for Gensim. A list of lists
+            containing tuples of ``type_id`` and frequency.
+        type2id (dict, optional): Only for Gensim and online. A dictionary with
+            identifiers as keys and types as values, or vice versa.
+        path_to_mallet (str, optional): Only for MALLET. Path to the executable.
+        clean_tokenized_corpus (list, optional): Only for MALLET. Tokenized corpus
+            containing one or more iterables containing tokens.
+        document_labels (list, optional): Only for MALLET. Name of each document.
+        output_topic_keys (str, optional): Only for MALLET. Path to the topic
+            keys file.
+        output_doc_topics (str, optional): Only for MALLET. Path to the doc-topics
+            file.
+        corpus_stream (iterable, optional): Only for online. Documents as arrays
+            of type IDs or lists of tuples of ``type_id`` and frequency, e.g.
+            from :func:`dariah_topics.preprocessing.encode_tokenized_corpus()`.
+            Pass ``total_documents`` if the stream has no length.
+        checkpoint (str, optional): Path to the checkpoint file. Defaults to None.
+        checkpoint_interval (int, optional): Number of steps between writing
+            checkpoints. Defaults to 100.
+        resume_from (str, optional): Path to a checkpoint to resume training
+            from. Defaults to None.
+        monitor (TrainingMonitor, optional): Records the training progress and
+            decides when to stop. Defaults to None.
+        **kwargs: Additional arguments for the selected implementation.
+
+    Returns:
+        A fitted LDA model, or None for MALLET. If ``monitor`` is given, a tuple
+        of the model and the trace as pandas DataFrame.
+
+    Raises:
+        ValueError, if ``implementation`` is not supported.
+
+    Example:
+        >>> document_term_matrix = np.array([[2, 1, 0], [0, 1, 3]])
+        >>> model = lda(document_term_matrix, 2, iterations=5, implementation='gibbs', random_state=1)
+        >>> model.doc_topic_.shape
+        (2, 2)
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     checkpoint = os.path.join(tmpdir, 'checkpoint.npz')
+        ...     model = lda(document_term_matrix, 2, iterations=5, checkpoint=checkpoint, checkpoint_interval=5)
+        ...     model = lda(document_term_matrix, 2, iterations=10, resume_from=checkpoint)
+        >>> model.doc_topic_.shape
+        (2, 2)
+        >>> model, trace = lda(document_term_matrix, 2, iterations=50, monitor=TrainingMonitor(interval=5))
+        >>> list(trace.columns)
+        ['step', 'loglikelihood_per_token', 'perplexity', 'seconds']
+    """
+    model = None
+    if monitor is not None:
+        monitor.start()
+    checkpointing = {'checkpoint': checkpoint, 'checkpoint_interval': checkpoint_interval}
     if implementation == 'lda':
-        model = lda.LDA(n_topics=topics, n_iter=iterations, **kwargs)
-        model.fit(document_term_matrix)
-        return model
+        from lda import LDA
+        model = LDA(n_topics=topics, n_iter=iterations, **kwargs)
+        if checkpoint is None and resume_from is None and monitor is None:
+            model.fit(document_term_matrix)
+        else:
+            _fit_lda_package(model, document_term_matrix, resume_from=resume_from, monitor=monitor, **checkpointing)
     elif implementation == 'gensim':
-        model = LdaMulticore(corpus=gensim_corpus, id2word=type2id, num_topics=topics, iterations=iterations, **kwargs)
-        return model
+        from gensim.models import LdaMulticore
+        if checkpoint is None and resume_from is None and monitor is None:
+            model = LdaMulticore(corpus=gensim_corpus, id2word=type2id, num_topics=topics, iterations=iterations, **kwargs)
+        else:
+            model = _fit_gensim(gensim_corpus, type2id, topics, iterations, resume_from=resume_from,
+                                monitor=monitor, **checkpointing, **kwargs)
     elif implementation == 'mallet':
         Mallet = utils.Mallet(path_to_mallet)
-        mallet_corpus = Mallet.import_tokenized_corpus(clean_tokenized_corpus, document_labels)
+        if checkpoint is not None:
+            kwargs.update(output_model=checkpoint, output_model_interval=checkpoint_interval)
+        if resume_from is None:
+            mallet_corpus = Mallet.import_tokenized_corpus(clean_tokenized_corpus, document_labels)
+        else:
+            mallet_corpus = None
+            completed = re.search(r'\.(\d+)$', resume_from)
+            iterations -= int(completed.group(1)) if completed else 0
+            kwargs['input_model'] = resume_from
         Mallet.train_topics(mallet_corpus,
                             output_topic_keys=output_topic_keys,
-                            output_doc_topics=output_topic_keys,
+                            output_doc_topics=output_doc_topics,
                             num_topics=topics,
-                            num_iterations=iterations,
+                            num_iterations=max(iterations, 0),
+                            callback=None if monitor is None else monitor.parse_mallet,
                             **kwargs)
+    elif implementation in {'gibbs', 'alias', 'distributed'}:
+        sampler = {'gibbs': GibbsLDA, 'alias': AliasLDA, 'distributed': DistributedGibbsLDA}[implementation]
+        model = sampler(n_topics=topics, n_iter=iterations, **checkpointing, **kwargs)
+        model.fit(document_term_matrix, resume_from=resume_from, monitor=monitor)
+    elif implementation == 'online':
+        if 'n_types' not in kwargs:
+            kwargs['n_types'] = _num_types(type2id)
+        model = OnlineLDA(n_topics=topics, max_e_steps=iterations, **checkpointing, **kwargs)
+        model.fit(corpus_stream, resume_from=resume_from, monitor=monitor)
+    else:
+        raise ValueError("{} is no supported LDA implementation".format(implementation))
+    if monitor is not None:
+        return model, monitor.trace
+    return model
+
+
+def sweep(document_term_matrix, topics, alphas=(0.1,), betas=(0.01,), seeds=(0,), iterations=200,
+          implementation='gibbs', held_out=0.1, num_keys=10, n_jobs=None, output=None, random_state=0, **kwargs):
+    """Trains and scores a grid of LDA models in parallel.
+
+    With this function you can compare topic numbers, priors and seeds instead \
+    of calling :func:`lda()` in a loop. The document-term matrix is split once \
+    into training and held-out documents and put into shared memory as sparse \
+    matrix, where every worker process attaches to it without copying. Each \
+    configuration is scored by
+        * the held-out perplexity by document completion: the topics of a \
+        held-out document are inferred from one half of its tokens, the other \
+        half is evaluated, see `Wallach et al. (2009) <https://dl.acm.org/citation.cfm?id=1553515>`_.
+        * the mean UMass coherence of the ``num_keys`` top types of each topic \
+        on the training documents, see `Mimno et al. (2011) <https://dl.acm.org/citation.cfm?id=2145462>`_.
+
+    Every finished configuration is appended to ``output`` at once. If ``output`` \
+    already contains configurations, they are not trained again, so an \
+    interrupted sweep can simply be started again.
+
+    Args:
+        document_term_matrix (array-like): Document-term matrix of integer counts.
+            Can be a NumPy array, a pandas DataFrame or a SciPy sparse matrix.
+        topics (list): Numbers of topics.
+        alphas (list, optional): Dirichlet parameters for the document-topic
+            distributions. Defaults to ``(0.1,)``.
+        betas (list, optional): Dirichlet parameters for the topic-type
+            distributions. Defaults to ``(0.01,)``.
+        seeds (list, optional): Seeds for the samplers. Defaults to ``(0,)``.
+        iterations (int, optional): Number of iterations. Defaults to 200.
+        implementation (str, optional): ``gibbs``, ``alias`` or ``lda``, see
+            :func:`lda()`. Defaults to ``gibbs``.
+        held_out (float, optional): Share of held-out documents. Defaults to 0.1.
+        num_keys (int, optional): Number of top types per topic for the
+            coherence. Defaults to 10.
+        n_jobs (int, optional): Number of worker processes, i.e. the CPU budget.
+            Defaults to the number of CPUs.
+        output (str, optional): Path to a CSV file, which collects the results.
+            Defaults to None.
+        random_state (int, optional): Seed for the held-out split. Defaults to 0.
+        **kwargs: Additional arguments for the selected implementation.
+
+    Returns:
+        A pandas DataFrame with the columns ``topics``, ``alpha``, ``beta``,
+        ``seed``, ``perplexity``, ``coherence`` and ``seconds``.
+
+    Raises:
+        ValueError, if ``implementation`` is not supported.
+
+    Example:
+        >>> document_term_matrix = np.random.RandomState(0).poisson(1.0, (20, 15))
+        >>> results = sweep(document_term_matrix, [2, 3], iterations=5, n_jobs=1)
+        >>> results[['topics', 'seed']].values.tolist()
+        [[2, 0], [3, 0]]
+    """
+    if implementation not in {'gibbs', 'alias', 'lda'}:
+        raise ValueError("{} is not supported for sweeps.".format(implementation))
+    columns = ['topics', 'alpha', 'beta', 'seed']
+    configurations = pd.DataFrame(list(product(topics, alphas, betas, seeds)), columns=columns)
+    results = []
+    if output is not None and os.path.exists(output):
+        finished = pd.read_csv(output)
+        done = set(map(tuple, finished[columns].values.tolist()))
+        configurations = configurations[[tuple(row) not in done
+                                         for row in configurations.values.tolist()]]
+        results.extend(finished.to_dict('records'))
+    shared = {}
+    for name, matrix in _split_held_out(document_term_matrix, held_out, random_state).items():
+        shared[name] = SharedDocumentTermMatrix(matrix)
+    handles = {name: matrix.handle for name, matrix in shared.items()}
+    tasks = [(handles, int(row.topics), float(row.alpha), float(row.beta), int(row.seed), iterations,
+              implementation, num_keys, kwargs) for row in configurations.itertuples()]
+    log.info("Sweeping {} configurations ...".format(len(tasks)))
+    pool = Pool(max(min(n_jobs or os.cpu_count(), len(tasks)), 1)) if tasks else None
+    try:
+        for result in pool.imap_unordered(_sweep_configuration, tasks) if tasks else []:
+            log.info("{topics} topics, alpha {alpha}, beta {beta}, seed {seed}: "
+                     "perplexity {perplexity:.1f}, coherence {coherence:.2f}".format(**result))
+            results.append(result)
+            if output is not None:
+                pd.DataFrame([result]).to_csv(output, mode='a', index=False,
+                                              header=not os.path.exists(output))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for matrix in shared.values():
+            matrix.close()
+    results = pd.DataFrame(results, columns=columns + ['perplexity', 'coherence', 'seconds'])
+    return results.sort_values(columns).reset_index(drop=True)
+
+
+def infer(model=None, document_term_matrix=None, iterations=20, burn_in=None, gensim_corpus=None,
+          chunksize=2000, path_to_mallet=None, inferencer=None, mallet_corpus=None, clean_tokenized_corpus=None,
+          document_labels=None, num_topics=None, random_state=None, **kwargs):
+    """Infers the topic distributions of new documents.
+
+    With this function you can get the topic proportions of unseen documents \
+    from a trained model without retraining it. The topics stay fixed, only \
+    the document-topic distributions are estimated, for all documents at once:
+        * Models of the `lda <https://pypi.python.org/pypi/lda>`_ package, \
+        :class:`GibbsLDA` and its subclasses are folded in with ``iterations`` \
+        Gibbs sweeps over ``document_term_matrix``, which sample all tokens in \
+        parallel given the counts of the previous sweep. The counts after \
+        ``burn_in`` sweeps are averaged.
+        * Gensim models run their variational E-step on chunks of \
+        ``gensim_corpus`` with ``chunksize`` documents each.
+        * :class:`OnlineLDA` runs its E-step on ``document_term_matrix``.
+        * For MALLET, pass ``inferencer`` (written by ``train-topics`` with \
+        ``inferencer_filename``) and the ``mallet_corpus`` the model was trained \
+        on, whose pipe imports ``clean_tokenized_corpus``. ``infer-topics`` \
+        samples ``iterations`` iterations.
+
+    Args:
+        model (optional): A trained lda, Gensim or in-package model. None for
+            MALLET.
+        document_term_matrix (array-like, optional): Document-term matrix of
+            the new documents with the vocabulary of the model.
+        iterations (int, optional): Number of sampling or E-step iterations.
+            Defaults to 20.
+        burn_in (int, optional): Number of discarded fold-in sweeps. Defaults to
+            half of ``iterations``.
+        gensim_corpus (list, optional): Only for Gensim. A list of lists
+            containing tuples of ``type_id`` and frequency.
+        chunksize (int, optional): Only for Gensim. Documents per E-step.
+            Defaults to 2000.
+        path_to_mallet (str, optional): Only for MALLET. Path to the executable.
+        inferencer (str, optional): Only for MALLET. Path to the inferencer.
+        mallet_corpus (str, optional): Only for MALLET. Path to the training corpus.
+        clean_tokenized_corpus (list, optional): Only for MALLET. Tokenized
+            new documents.
+        document_labels (list, optional): Only for MALLET. Name of each new
+            document.
+        num_topics (int, optional): Only for MALLET. Number of topics of the
+            model. Pass it if ``doc_topics_threshold`` can drop topics, so the
+            result has a column for every topic. Defaults to None.
+        random_state (int, optional): Seed for the fold-in. Defaults to None.
+        **kwargs: Only for MALLET. Additional arguments for ``infer-topics``.
+
+    Returns:
+        Document-topic distributions as NumPy array, shape ``(n_documents,
+        n_topics)``.
+
+    Raises:
+        ValueError, if the model is not supported.
+
+    Example:
+        >>> document_term_matrix = np.array([[5, 5, 0, 0], [0, 0, 5, 5]] * 5)
+        >>> model = GibbsLDA(n_topics=2, n_iter=50, random_state=0).fit(document_term_matrix)
+        >>> doc_topic = infer(model, np.array([[3, 0, 0, 0], [0, 0, 0, 3]]), random_state=0)
+        >>> doc_topic.shape, int(doc_topic[0].argmax()) != int(doc_topic[1].argmax())
+        ((2, 2), True)
+    """
+    from gensim.models import LdaModel
+    from lda import LDA
+    if isinstance(model, (LDA, GibbsLDA)):
+        if burn_in is None:
+            burn_in = iterations // 2
+        return _fold_in(model.topic_word_, document_term_matrix, model.alpha, iterations, burn_in,
+                        np.random.RandomState(random_state))
+    elif isinstance(model, OnlineLDA):
+        return model.transform(_matrix_to_bows(sparse.csr_matrix(document_term_matrix)))
+    elif isinstance(model, LdaModel):
+        gensim_corpus = list(gensim_corpus)
+        gammas = [model.inference(gensim_corpus[start:start + chunksize])[0]
+                  for start in range(0, len(gensim_corpus), chunksize)]
+        if not gammas:
+            return np.zeros((0, model.num_topics))
+        gamma = np.vstack(gammas)
+        return gamma / gamma.sum(axis=1)[:, np.newaxis]
+    elif model is None and inferencer is not None:
+        Mallet = utils.Mallet(path_to_mallet)
+        new_corpus = Mallet.import_tokenized_corpus(clean_tokenized_corpus, document_labels,
+                                                    use_pipe_from=mallet_corpus)
+        output_doc_topics = os.path.join(Mallet.corpus_output, 'inferred_doc_topics.txt')
+        Mallet.infer_topics(inferencer, new_corpus, output_doc_topics=output_doc_topics,
+                            num_iterations=iterations, burn_in=iterations // 2 if burn_in is None else burn_in,
+                            **kwargs)
+        return _read_mallet_doc_topics(output_doc_topics, document_labels, num_topics)
+    else:
+        raise ValueError("Cannot infer topics with {}.".format(type(model).__name__))
+
+
+def mallet_state_to_checkpoint(state_file, checkpoint, chunksize=1000000):
+    """Converts a MALLET Gibbs sampling state to a checkpoint.
+
+    With this function you can warm-start :class:`GibbsLDA`, its subclasses or \
+    the lda package with the topic assignments of a MALLET model, written by \
+    ``train-topics`` with ``output_state``. The state file is streamed with \
+    :func:`dariah_topics.postprocessing.stream_mallet_state()` into ``int32`` \
+    arrays, ordered by document and type like \
+    :meth:`GibbsLDA.save_checkpoint()`. Pass the checkpoint as ``resume_from`` \
+    to :func:`lda()`, with a document-term matrix whose columns follow the \
+    returned vocabulary. ``alpha`` is the mean of MALLET's topic priors.
+
+    Args:
+        state_file (str): Path to the gzipped state file.
+        checkpoint (str): Path to the checkpoint file.
+        chunksize (int, optional): Number of tokens parsed at once. Defaults
+            to 1000000.
+
+    Returns:
+        The vocabulary as NumPy array, ordered by MALLET's type index.
+    """
+    alpha, beta = postprocessing._read_mallet_state_header(state_file)
+    token_ids, document_ids, topic_assignments, vocabulary = [], [], [], {}
+    for chunk in postprocessing.stream_mallet_state(state_file, chunksize):
+        token_ids.append(chunk['type_id'].values.astype(np.int32))
+        document_ids.append(chunk['document_id'].values.astype(np.int32))
+        topic_assignments.append(chunk['topic'].values.astype(np.int32))
+        new_types = chunk.drop_duplicates('type_id')
+        vocabulary.update(zip(new_types['type_id'].values, new_types['type'].values))
+    token_ids = np.concatenate(token_ids or [np.zeros(0, np.int32)])
+    document_ids = np.concatenate(document_ids or [np.zeros(0, np.int32)])
+    topic_assignments = np.concatenate(topic_assignments or [np.zeros(0, np.int32)])
+    order = np.lexsort((token_ids, document_ids))
+    num_types = int(token_ids.max()) + 1 if len(token_ids) else 0
+    num_documents = int(document_ids.max()) + 1 if len(document_ids) else 0
+    vocabulary = np.array([vocabulary.get(type_id, '') for type_id in range(num_types)])
+    _save_checkpoint(checkpoint, implementation='gibbs', n_topics=len(alpha), alpha=float(np.mean(alpha)),
+                     eta=beta, shape=np.array([num_documents, num_types]), iteration=0,
+                     token_ids=token_ids[order], document_ids=document_ids[order],
+                     topic_assignments=topic_assignments[order], loglikelihoods=np.zeros(0),
+                     vocabulary=vocabulary, **_random_state_to_arrays(np.random.RandomState()))
+    return vocabulary
+
+
+class GibbsLDA:
+    """Collapsed Gibbs sampling for LDA with NumPy.
+
+    With this class you can train a LDA model without any compiled extension. \
+    The document-term matrix is encoded into two ``int32`` arrays of token IDs \
+    and document IDs, every token gets an ``int32`` topic assignment, and the \
+    topic-type, document-topic and topic counts are kept in NumPy arrays. The \
+    sampling distribution of each token is computed vectorized over all topics. \
+    The attributes after fitting are named like those of :class:`lda.LDA`, so \
+    the functions of :mod:`dariah_topics.postprocessing` treat both alike.
+
+    Note:
+        Tokens are sampled one after another in a Python loop, because every \
+        draw depends on the counts updated by the previous one. Each token \
+        costs a few microseconds of interpreter overhead plus *O(K)* for *K* \
+        topics, which is fine for small corpora and tests, but slow for \
+        millions of tokens. Use :class:`AliasLDA` for many topics, \
+        :class:`DistributedGibbsLDA` to sample on all cores, or the compiled \
+        `lda <https://pypi.python.org/pypi/lda>`_ package for large corpora.
+
+    Args:
+        n_topics (int): Number of topics.
+        n_iter (int, optional): Number of sampling iterations. Defaults to 1000.
+        alpha (float, optional): Dirichlet parameter for the document-topic
+            distributions. Defaults to 0.1.
+        eta (float, optional): Dirichlet parameter for the topic-type
+            distributions. Defaults to 0.01.
+        random_state (int, optional): Seed for the random number generator. Two
+            runs with the same seed produce the same topic assignments. Defaults
+            to None.
+        refresh (int, optional): Number of iterations between computing the
+            log likelihood. Defaults to 10.
+        checkpoint (str, optional): Path to a checkpoint file, which is written
+            every ``checkpoint_interval`` iterations. Defaults to None.
+        checkpoint_interval (int, optional): Number of iterations between
+            writing checkpoints. Defaults to 100.
+
+    Attributes:
+        components_ (numpy.ndarray): Topic-type distributions, shape
+            ``(n_topics, n_types)``.
+        topic_word_ (numpy.ndarray): Alias for ``components_``.
+        doc_topic_ (numpy.ndarray): Document-topic distributions, shape
+            ``(n_documents, n_topics)``.
+        nzw_ (numpy.ndarray): Topic-type counts.
+        ndz_ (numpy.ndarray): Document-topic counts.
+        nz_ (numpy.ndarray): Topic counts.
+        topic_assignments_ (numpy.ndarray): Topic assignment of each token.
+        loglikelihoods_ (list): Log likelihood every ``refresh`` iterations.
+        iteration_ (int): Number of completed iterations.
+        tokens_per_second_ (float): Sampling throughput of the last fit.
+
+    Example:
+        >>> document_term_matrix = np.array([[4, 2, 0, 0], [0, 0, 3, 5], [3, 1, 0, 1]])
+        >>> model = GibbsLDA(n_topics=2, n_iter=20, random_state=1).fit(document_term_matrix)
+        >>> model.topic_word_.shape
+        (2, 4)
+        >>> model.topic_assignments_.dtype
+        dtype('int32')
+        >>> int(model.nzw_.sum()) == int(document_term_matrix.sum())
+        True
+    """
+    def __init__(self, n_topics, n_iter=1000, alpha=0.1, eta=0.01, random_state=None, refresh=10,
+                 checkpoint=None, checkpoint_interval=100):
+        if alpha <= 0 or eta <= 0:
+            raise ValueError("alpha and eta must be greater than zero.")
+        self.n_topics = n_topics
+        self.n_iter = n_iter
+        self.alpha = alpha
+        self.eta = eta
+        self.random_state = random_state
+        self.refresh = refresh
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+
+    def fit(self, X, y=None, resume_from=None, monitor=None):
+        """Fits the model to a document-term matrix.
+
+        Args:
+            X (array-like): Document-term matrix of integer counts, shape
+                ``(n_documents, n_types)``. Can be a NumPy array, a pandas
+                DataFrame or a SciPy sparse matrix. Ignored, if ``resume_from``
+                is given.
+            y (None): Ignored.
+            resume_from (str, optional): Path to a checkpoint file written by
+                :meth:`save_checkpoint()`. Sampling continues with the state and
+                random number generator of the checkpoint. Defaults to None.
+            monitor (TrainingMonitor, optional): Records the log likelihood every
+                ``monitor.interval`` iterations and stops sampling early, once it
+                plateaus. Defaults to None.
+
+        Returns:
+            The fitted instance.
+        """
+        if resume_from is None:
+            self._initialize(X)
+        else:
+            self._restore(resume_from)
+        num_tokens = len(self.token_ids_)
+        log.info("Sampling {} tokens with {} topics ...".format(num_tokens, self.n_topics))
+        first_iteration = self.iteration_
+        start = time.perf_counter()
+        for iteration in range(first_iteration, self.n_iter):
+            if iteration % self.refresh == 0:
+                loglikelihood = self.loglikelihood()
+                log.info("<{}> log likelihood: {:.0f}".format(iteration, loglikelihood))
+                self.loglikelihoods_.append(loglikelihood)
+            self._sample_topics()
+            self.iteration_ = iteration + 1
+            if self.checkpoint is not None and self.iteration_ % self.checkpoint_interval == 0:
+                self.save_checkpoint(self.checkpoint)
+            if monitor is not None and self.iteration_ % monitor.interval == 0:
+                if monitor.record(self.iteration_, self.loglikelihood() / num_tokens):
+                    break
+        elapsed = time.perf_counter() - start
+        num_sampled = (self.iteration_ - first_iteration) * num_tokens
+        self.tokens_per_second_ = num_sampled / elapsed if elapsed > 0 else float('inf')
+        log.info("<{}> log likelihood: {:.0f}".format(self.iteration_ - 1, self.loglikelihood()))
+        log.info("Sampled {:.0f} tokens per second.".format(self.tokens_per_second_))
+        self._update_distributions()
+        return self
+
+    def fit_transform(self, X, y=None):
+        """Fits the model and returns the document-topic distributions.
+
+        Args:
+            X (array-like): Document-term matrix of integer counts.
+            y (None): Ignored.
+
+        Returns:
+            Document-topic distributions as NumPy array.
+        """
+        return self.fit(X).doc_topic_
+
+    def loglikelihood(self):
+        """Calculates the complete log likelihood of the current state.
+
+        Returns:
+            The log likelihood as float.
+        """
+        return _loglikelihood(self.nzw_, self.ndz_, self.nz_, self.alpha, self.eta)
+
+    def save_checkpoint(self, filepath):
+        """Writes the sampling state to a compressed NumPy archive.
+
+        The token arrays, the ``int32`` topic assignments, the hyperparameters \
+        and the state of the random number generator are saved. The count \
+        tables are rebuilt from the topic assignments when resuming.
+
+        Args:
+            filepath (str): Path to the checkpoint file.
+
+        Returns:
+            None.
+        """
+        log.info("Saving checkpoint after {} iterations to {} ...".format(self.iteration_, filepath))
+        _save_checkpoint(filepath, implementation='gibbs', n_topics=self.n_topics, alpha=self.alpha, eta=self.eta,
+                         shape=np.array(self.ndz_.shape[:1] + self.nzw_.shape[1:]), iteration=self.iteration_,
+                         token_ids=self.token_ids_, document_ids=self.document_ids_,
+                         topic_assignments=self.topic_assignments_,
+                         loglikelihoods=np.array(self.loglikelihoods_, dtype=float),
+                         **_random_state_to_arrays(self._rng))
+        return None
+
+    def _initialize(self, X):
+        self._rng = np.random.RandomState(self.random_state)
+        token_ids, document_ids = _matrix_to_token_ids(X)
+        topic_assignments = self._rng.randint(self.n_topics, size=len(token_ids)).astype(np.int32)
+        self._set_state(token_ids, document_ids, topic_assignments, X.shape)
+        self.iteration_ = 0
+        self.loglikelihoods_ = []
+
+    def _restore(self, filepath):
+        log.info("Resuming from checkpoint {} ...".format(filepath))
+        checkpoint = _read_checkpoint(filepath)
+        if checkpoint['implementation'] not in {'gibbs', 'lda'}:
+            raise ValueError("{} is no checkpoint of a Gibbs sampler.".format(filepath))
+        if int(checkpoint['n_topics']) != self.n_topics:
+            raise ValueError("The checkpoint has {} topics, not {}.".format(checkpoint['n_topics'], self.n_topics))
+        self.alpha = float(checkpoint['alpha'])
+        self.eta = float(checkpoint['eta'])
+        self._rng = _random_state_from_arrays(checkpoint)
+        self._set_state(checkpoint['token_ids'], checkpoint['document_ids'], checkpoint['topic_assignments'],
+                        tuple(checkpoint['shape']))
+        self.iteration_ = int(checkpoint['iteration'])
+        self.loglikelihoods_ = checkpoint['loglikelihoods'].tolist()
+
+    def _set_state(self, token_ids, document_ids, topic_assignments, shape):
+        num_documents, num_types = shape
+        self.token_ids_ = token_ids.astype(np.int32)
+        self.document_ids_ = document_ids.astype(np.int32)
+        self.topic_assignments_ = topic_assignments.astype(np.int32)
+        self.nzw_, self.ndz_, self.nz_ = _count_topics(self.token_ids_, self.document_ids_, self.topic_assignments_,
+                                                       self.n_topics, num_documents, num_types)
+
+    def _sample_topics(self):
+        rands = self._rng.random_sample(len(self.token_ids_))
+        _sample_topics(self.token_ids_, self.document_ids_, self.topic_assignments_,
+                       self.nzw_, self.ndz_, self.nz_, self.alpha, self.eta, rands)
+
+    def _update_distributions(self):
+        self.components_ = (self.nzw_ + self.eta).astype(float)
+        self.components_ /= self.components_.sum(axis=1)[:, np.newaxis]
+        self.topic_word_ = self.components_
+        self.doc_topic_ = (self.ndz_ + self.alpha).astype(float)
+        self.doc_topic_ /= self.doc_topic_.sum(axis=1)[:, np.newaxis]
+
+
+class AliasLDA(GibbsLDA):
+    """Metropolis-Hastings sampling for LDA with many topics.
+
+    With this class you can train LDA models with hundreds or thousands of \
+    topics. Instead of computing the full conditional over all topics for \
+    every token, like :class:`GibbsLDA` does, new topics are proposed \
+    alternately from the document and from the type, and accepted with a \
+    Metropolis-Hastings test (the cycle proposal of \
+    `LightLDA <https://arxiv.org/abs/1412.1576>`_). Both proposals are drawn \
+    in constant time like in `WarpLDA <https://arxiv.org/abs/1510.08628>`_: \
+    the document proposal takes the topic of a random token of the same \
+    document, the type proposal the topic of a random token of the same type. \
+    So the cost per token does not grow with the number of topics *K*.
+
+    Tokens are sampled in blocks of ``block_size`` in random order, vectorized \
+    with NumPy. All tokens of a block are sampled with the counts from the \
+    start of the block, which are updated after the block. Like \
+    :class:`DistributedGibbsLDA`, this is an approximation of the sequential \
+    sampler, which needs some more iterations, but it is faster than \
+    :class:`GibbsLDA` from a few dozen topics on.
+
+    Args:
+        n_topics (int): Number of topics.
+        n_iter (int, optional): Number of sampling iterations. Defaults to 1000.
+        alpha (float, optional): Dirichlet parameter for the document-topic
+            distributions. Defaults to 0.1.
+        eta (float, optional): Dirichlet parameter for the topic-type
+            distributions. Defaults to 0.01.
+        random_state (int, optional): Seed for the random number generator.
+            Defaults to None.
+        refresh (int, optional): Number of iterations between computing the
+            log likelihood. Defaults to 10.
+        mh_steps (int, optional): Number of document and type proposal pairs
+            per token. Defaults to 2.
+        block_size (int, optional): Number of tokens sampled together. Smaller
+            blocks mix better, larger blocks are faster. Defaults to 1024.
+        checkpoint (str, optional): Path to a checkpoint file, which is written
+            every ``checkpoint_interval`` iterations. Defaults to None.
+        checkpoint_interval (int, optional): Number of iterations between
+            writing checkpoints. Defaults to 100.
+
+    Example:
+        >>> document_term_matrix = np.array([[4, 2, 0, 0], [0, 0, 3, 5], [3, 1, 0, 1]])
+        >>> model = AliasLDA(n_topics=2, n_iter=20, random_state=1).fit(document_term_matrix)
+        >>> model.topic_word_.shape
+        (2, 4)
+        >>> int(model.nzw_.sum()) == int(document_term_matrix.sum())
+        True
+    """
+    def __init__(self, n_topics, n_iter=1000, alpha=0.1, eta=0.01, random_state=None, refresh=10, mh_steps=2,
+                 block_size=1024, checkpoint=None, checkpoint_interval=100):
+        super().__init__(n_topics, n_iter=n_iter, alpha=alpha, eta=eta, random_state=random_state, refresh=refresh,
+                         checkpoint=checkpoint, checkpoint_interval=checkpoint_interval)
+        self.mh_steps = mh_steps
+        self.block_size = block_size
+
+    def _set_state(self, token_ids, document_ids, topic_assignments, shape):
+        super()._set_state(token_ids, document_ids, topic_assignments, shape)
+        self._document_starts = np.searchsorted(self.document_ids_, np.arange(self.ndz_.shape[0]))
+        self._document_lengths = self.ndz_.sum(axis=1)
+        self._type_order = np.argsort(self.token_ids_, kind='stable')
+        self._type_lengths = np.bincount(self.token_ids_, minlength=self.nzw_.shape[1])
+        self._type_starts = np.cumsum(self._type_lengths) - self._type_lengths
+
+    def _sample_topics(self):
+        _sample_topics_mh(self.token_ids_, self.document_ids_, self.topic_assignments_,
+                          self.nzw_, self.ndz_, self.nz_, self.alpha, self.eta,
+                          (self._document_starts, self._document_lengths),
+                          (self._type_order, self._type_starts, self._type_lengths),
+                          self.mh_steps, self._rng, self.block_size)
+
+
+class DistributedGibbsLDA(GibbsLDA):
+    """Approximate distributed Gibbs sampling for LDA (AD-LDA).
+
+    With this class you can train a LDA model on all cores of a machine. The \
+    documents are split into ``n_jobs`` partitions with about the same number \
+    of tokens. In every iteration, each worker process samples its partition \
+    with a private copy of the topic-type counts, read from shared memory, like \
+    `Newman et al. (2009) <http://www.jmlr.org/papers/v10/newman09a.html>`_ \
+    propose. Afterwards, the changes of all workers are merged into the global \
+    counts. Token arrays, topic assignments and document-topic counts stay in \
+    shared memory, each worker only writes its own documents.
+
+    Args:
+        n_topics (int): Number of topics.
+        n_iter (int, optional): Number of sampling iterations. Defaults to 1000.
+        alpha (float, optional): Dirichlet parameter for the document-topic
+            distributions. Defaults to 0.1.
+        eta (float, optional): Dirichlet parameter for the topic-type
+            distributions. Defaults to 0.01.
+        random_state (int, optional): Seed for the random number generator. With
+            the same seed and ``n_jobs``, two runs produce the same topic
+            assignments. Defaults to None.
+        refresh (int, optional): Number of iterations between computing the
+            log likelihood. Defaults to 10.
+        n_jobs (int, optional): Number of worker processes. If None, the number
+            of CPUs. Defaults to None.
+        checkpoint (str, optional): Path to a checkpoint file, which is written
+            every ``checkpoint_interval`` iterations. Defaults to None.
+        checkpoint_interval (int, optional): Number of iterations between
+            writing checkpoints. Defaults to 100.
+
+    Example:
+        >>> document_term_matrix = np.array([[4, 2, 0, 0], [0, 0, 3, 5], [3, 1, 0, 1]])
+        >>> model = DistributedGibbsLDA(n_topics=2, n_iter=5, random_state=1, n_jobs=2).fit(document_term_matrix)
+        >>> int(model.nzw_.sum()) == int(document_term_matrix.sum())
+        True
+    """
+    def __init__(self, n_topics, n_iter=1000, alpha=0.1, eta=0.01, random_state=None, refresh=10, n_jobs=None,
+                 checkpoint=None, checkpoint_interval=100):
+        super().__init__(n_topics, n_iter=n_iter, alpha=alpha, eta=eta, random_state=random_state, refresh=refresh,
+                         checkpoint=checkpoint, checkpoint_interval=checkpoint_interval)
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None, resume_from=None, monitor=None):
+        """Fits the model to a document-term matrix.
+
+        Args:
+            X (array-like): Document-term matrix of integer counts, shape
+                ``(n_documents, n_types)``. Ignored, if ``resume_from`` is given.
+            y (None): Ignored.
+            resume_from (str, optional): Path to a checkpoint file written by
+                :meth:`save_checkpoint()`. Defaults to None.
+            monitor (TrainingMonitor, optional): Records the log likelihood and
+                stops sampling early, once it plateaus. Defaults to None.
+
+        Returns:
+            The fitted instance.
+        """
+        try:
+            return super().fit(X, resume_from=resume_from, monitor=monitor)
+        finally:
+            self._release()
+
+    def _set_state(self, token_ids, document_ids, topic_assignments, shape):
+        super()._set_state(token_ids, document_ids, topic_assignments, shape)
+        names = ['token_ids_', 'document_ids_', 'topic_assignments_', 'ndz_', 'nzw_']
+        self._shared = SharedArrays({name: getattr(self, name) for name in names})
+        for name in names:
+            setattr(self, name, self._shared[name])
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        self._partitions = _partition_documents(self.document_ids_, n_jobs)
+        log.info("Sampling {} partitions in {} processes ...".format(len(self._partitions), n_jobs))
+        self._pool = Pool(min(n_jobs, len(self._partitions)))
+
+    def _sample_topics(self):
+        seeds = self._rng.randint(np.iinfo(np.int32).max, size=len(self._partitions))
+        tasks = [(self._shared.handle, start, end, self.alpha, self.eta, seed)
+                 for (start, end), seed in zip(self._partitions, seeds)]
+        for topics, types, deltas in self._pool.map(_sample_partition, tasks):
+            np.add.at(self.nzw_, (topics, types), deltas)
+        self.nz_ = self.nzw_.sum(axis=1).astype(np.intc)
+
+    def _release(self):
+        pool = getattr(self, '_pool', None)
+        if pool is not None:
+            pool.close()
+            pool.join()
+            self._pool = None
+        shared = getattr(self, '_shared', None)
+        if shared is not None:
+            for name in shared.arrays:
+                array = np.array(shared[name])
+                setattr(self, name, np.asfortranarray(array) if name == 'nzw_' else array)
+            shared.close()
+            self._shared = None
+
+
+class OnlineLDA:
+    """Online variational Bayes for LDA.
+
+    With this class you can train a LDA model on corpora larger than memory. \
+    The documents are consumed in minibatches from any iterable, e.g. a \
+    generator chaining :func:`dariah_topics.preprocessing.read_files()`, \
+    :func:`dariah_topics.preprocessing.tokenize()` and \
+    :func:`dariah_topics.preprocessing.encode_tokenized_corpus()`, and only \
+    the variational topic-type parameters are kept in memory. Each minibatch \
+    updates them with the step size ``(tau0 + updates) ** -kappa``, see \
+    `Hoffman et al. (2010) <https://papers.nips.cc/paper/3902-online-learning-for-latent-dirichlet-allocation>`_.
+
+    Args:
+        n_topics (int): Number of topics.
+        n_types (int): Number of types, i.e. the highest type ID plus one.
+        alpha (float, optional): Dirichlet parameter for the document-topic
+            distributions. Defaults to 0.1.
+        eta (float, optional): Dirichlet parameter for the topic-type
+            distributions. Defaults to 0.01.
+        batch_size (int, optional): Number of documents per minibatch. Defaults
+            to 256.
+        tau0 (float, optional): Delay of the learning rate, downweights early
+            minibatches. Defaults to 1024.
+        kappa (float, optional): Decay of the learning rate, between 0.5 and 1.
+            Defaults to 0.7.
+        total_documents (int, optional): Number of documents in the corpus,
+            used to scale the minibatch statistics. Defaults to None, which
+            takes the size of the corpus passed to :meth:`fit()`. Pass an
+            estimate for streams of unknown length and :meth:`partial_fit()`.
+        max_e_steps (int, optional): Maximum number of E-step iterations per
+            document. Defaults to 100.
+        e_step_tol (float, optional): The E-step of a document stops, if the
+            mean change of its topic weights is below this value. Defaults to 1e-3.
+        random_state (int, optional): Seed for the random number generator.
+            Defaults to None.
+        checkpoint (str, optional): Path to a checkpoint file, which is written
+            every ``checkpoint_interval`` minibatches. Defaults to None.
+        checkpoint_interval (int, optional): Number of minibatches between
+            writing checkpoints. Defaults to 100.
+
+    Attributes:
+        lambda_ (numpy.ndarray): Variational topic-type parameters.
+        components_ (numpy.ndarray): Topic-type distributions.
+        topic_word_ (numpy.ndarray): Alias for ``components_``.
+        total_documents_ (int): Number of documents the minibatch statistics
+            are scaled to.
+        update_count_ (int): Number of processed minibatches.
+        documents_seen_ (int): Number of processed documents.
+        batch_loglikelihood_ (float): Log likelihood of the last scored minibatch,
+            see :meth:`partial_fit()`.
+        batch_tokens_ (int): Number of tokens in the last scored minibatch.
+
+    Example:
+        >>> stream = ([0, 0, 1] if n % 2 else [2, 3, 3] for n in range(100))
+        >>> model = OnlineLDA(n_topics=2, n_types=4, batch_size=10, total_documents=100, random_state=1).fit(stream)
+        >>> model.topic_word_.shape, model.documents_seen_
+        ((2, 4), 100)
+        >>> from scipy import sparse
+        >>> model = OnlineLDA(n_topics=2, n_types=4, random_state=1).fit(sparse.csr_matrix([[2, 1, 0, 0], [0, 0, 1, 2]]))
+        >>> model.total_documents_
+        2
+    """
+    def __init__(self, n_topics, n_types, alpha=0.1, eta=0.01, batch_size=256, tau0=1024, kappa=0.7,
+                 total_documents=None, max_e_steps=100, e_step_tol=1e-3, random_state=None,
+                 checkpoint=None, checkpoint_interval=100):
+        if not 0.5 < kappa <= 1:
+            raise ValueError("kappa has to be in (0.5, 1] to guarantee convergence.")
+        self.n_topics = n_topics
+        self.n_types = n_types
+        self.alpha = alpha
+        self.eta = eta
+        self.batch_size = batch_size
+        self.tau0 = tau0
+        self.kappa = kappa
+        self.total_documents = total_documents
+        self.max_e_steps = max_e_steps
+        self.e_step_tol = e_step_tol
+        self.random_state = random_state
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self._rng = np.random.RandomState(random_state)
+        self.lambda_ = self._rng.gamma(100.0, 1.0 / 100.0, (n_topics, n_types))
+        self.update_count_ = 0
+        self.documents_seen_ = 0
+        self._update_distributions()
+
+    def fit(self, corpus_stream, resume_from=None, monitor=None):
+        """Fits the model to a stream of documents.
+
+        Args:
+            corpus_stream (iterable): Documents as arrays of type IDs or as lists
+                of tuples of ``type_id`` and frequency, or a document-term matrix
+                as SciPy sparse matrix or pandas DataFrame.
+            resume_from (str, optional): Path to a checkpoint file written by
+                :meth:`save_checkpoint()`. The parameters are restored and as many
+                documents as were processed before are skipped in ``corpus_stream``.
+                Defaults to None.
+            monitor (TrainingMonitor, optional): Records the predictive log
+                likelihood of every ``monitor.interval``-th minibatch and stops
+                consuming the stream early, once it plateaus. Defaults to None.
+
+        Returns:
+            The fitted instance.
+
+        Raises:
+            ValueError, if ``total_documents`` is None and ``corpus_stream`` has
+            no length.
+        """
+        corpus_stream = _matrix_to_bows(corpus_stream)
+        if self.total_documents is None:
+            try:
+                self.total_documents_ = len(corpus_stream)
+            except TypeError:
+                raise ValueError("The length of corpus_stream is unknown, pass total_documents to "
+                                 "OnlineLDA.") from None
+        if resume_from is not None:
+            self._restore(resume_from)
+            corpus_stream = islice(corpus_stream, self.documents_seen_, None)
+        for batch in _minibatches(corpus_stream, self.batch_size):
+            score = monitor is not None and (self.update_count_ + 1) % monitor.interval == 0
+            self.partial_fit(batch, score=score)
+            if score and monitor.record(self.update_count_, self.batch_loglikelihood_ / max(self.batch_tokens_, 1)):
+                break
+            if self.update_count_ % 10 == 0:
+                log.info("Processed {} minibatches, {} documents ...".format(self.update_count_, self.documents_seen_))
+            if self.checkpoint is not None and self.update_count_ % self.checkpoint_interval == 0:
+                self.save_checkpoint(self.checkpoint)
+        if self.checkpoint is not None:
+            self.save_checkpoint(self.checkpoint)
+        return self
+
+    def partial_fit(self, batch, score=False):
+        """Updates the model with one minibatch.
+
+        Args:
+            batch (list): Documents as arrays of type IDs or as lists of tuples
+                of ``type_id`` and frequency.
+            score (bool, optional): If True, the log likelihood of the minibatch
+                under the model before the update is stored in
+                ``batch_loglikelihood_`` and its number of tokens in
+                ``batch_tokens_``. Defaults to False.
+
+        Returns:
+            The updated instance.
+
+        Raises:
+            ValueError, if ``total_documents`` is None and the model was not
+            fitted to a corpus of known length before.
+        """
+        if self.total_documents is not None:
+            self.total_documents_ = self.total_documents
+        elif getattr(self, 'total_documents_', None) is None:
+            raise ValueError("partial_fit() needs the number of documents of the stream, "
+                             "pass total_documents to OnlineLDA.")
+        bows = [_document_to_bow(document) for document in batch]
+        exp_elog_beta = np.exp(_dirichlet_expectation(self.lambda_))
+        gamma, sufficient_statistics = self._e_step(bows, exp_elog_beta)
+        if score:
+            doc_topic = gamma / gamma.sum(axis=1)[:, np.newaxis]
+            self.batch_loglikelihood_ = sum(counts.dot(np.log(doc_topic[n].dot(self.components_[:, type_ids])))
+                                            for n, (type_ids, counts) in enumerate(bows))
+            self.batch_tokens_ = int(sum(counts.sum() for _, counts in bows))
+        rho = (self.tau0 + self.update_count_) ** -self.kappa
+        scale = self.total_documents_ / max(len(bows), 1)
+        self.lambda_ *= 1 - rho
+        self.lambda_ += rho * (self.eta + scale * sufficient_statistics * exp_elog_beta)
+        self.update_count_ += 1
+        self.documents_seen_ += len(bows)
+        self._update_distributions()
+        return self
+
+    def transform(self, documents):
+        """Infers the topic distributions of documents.
+
+        Args:
+            documents (list): Documents as arrays of type IDs or as lists of
+                tuples of ``type_id`` and frequency.
+
+        Returns:
+            Document-topic distributions as NumPy array.
+        """
+        bows = [_document_to_bow(document) for document in documents]
+        gamma, _ = self._e_step(bows, np.exp(_dirichlet_expectation(self.lambda_)))
+        return gamma / gamma.sum(axis=1)[:, np.newaxis]
+
+    def save_checkpoint(self, filepath):
+        """Writes the variational parameters and counters to a compressed NumPy archive.
+
+        Args:
+            filepath (str): Path to the checkpoint file.
+
+        Returns:
+            None.
+        """
+        log.info("Saving checkpoint after {} minibatches to {} ...".format(self.update_count_, filepath))
+        _save_checkpoint(filepath, implementation='online', n_topics=self.n_topics, alpha=self.alpha,
+                         eta=self.eta, lambda_=self.lambda_, update_count=self.update_count_,
+                         documents_seen=self.documents_seen_, **_random_state_to_arrays(self._rng))
+        return None
+
+    def _restore(self, filepath):
+        log.info("Resuming from checkpoint {} ...".format(filepath))
+        checkpoint = _read_checkpoint(filepath)
+        if checkpoint['implementation'] != 'online':
+            raise ValueError("{} is no checkpoint of an online model.".format(filepath))
+        if checkpoint['lambda_'].shape != self.lambda_.shape:
+            raise ValueError("The checkpoint has {} topics and types, not {}.".format(checkpoint['lambda_'].shape,
+                                                                                     self.lambda_.shape))
+        self.alpha = float(checkpoint['alpha'])
+        self.eta = float(checkpoint['eta'])
+        self.lambda_ = checkpoint['lambda_']
+        self.update_count_ = int(checkpoint['update_count'])
+        self.documents_seen_ = int(checkpoint['documents_seen'])
+        self._rng = _random_state_from_arrays(checkpoint)
+        self._update_distributions()
+
+    def _e_step(self, bows, exp_elog_beta):
+        gamma = self._rng.gamma(100.0, 1.0 / 100.0, (len(bows), self.n_topics))
+        sufficient_statistics = np.zeros_like(self.lambda_)
+        for n, (type_ids, counts) in enumerate(bows):
+            if len(type_ids) == 0:
+                continue
+            gamma_d = gamma[n]
+            exp_elog_theta_d = np.exp(_dirichlet_expectation(gamma_d))
+            exp_elog_beta_d = exp_elog_beta[:, type_ids]
+            phi_norm = exp_elog_theta_d.dot(exp_elog_beta_d) + 1e-100
+            for _ in range(self.max_e_steps):
+                last_gamma_d = gamma_d
+                gamma_d = self.alpha + exp_elog_theta_d * (counts / phi_norm).dot(exp_elog_beta_d.T)
+                exp_elog_theta_d = np.exp(_dirichlet_expectation(gamma_d))
+                phi_norm = exp_elog_theta_d.dot(exp_elog_beta_d) + 1e-100
+                if np.mean(np.abs(gamma_d - last_gamma_d)) < self.e_step_tol:
+                    break
+            gamma[n] = gamma_d
+            sufficient_statistics[:, type_ids] += np.outer(exp_elog_theta_d, counts / phi_norm)
+        return gamma, sufficient_statistics
+
+    def _update_distributions(self):
+        self.components_ = self.lambda_ / self.lambda_.sum(axis=1)[:, np.newaxis]
+        self.topic_word_ = self.components_
+
+
+class TrainingMonitor:
+    """Monitors the convergence of a LDA model.
+
+    With this class you can follow the training of a model and stop it, once \
+    the log likelihood does not improve anymore. Every ``interval`` steps, the \
+    training routine reports its log likelihood per token, which is stored \
+    together with the perplexity and the elapsed wall time. The training is \
+    considered converged, if the relative change of the log likelihood per \
+    token stays below ``tolerance`` for ``patience`` records in a row. Pass an \
+    instance to :func:`lda()`, which returns the :attr:`trace` with the model.
+
+    Args:
+        interval (int, optional): Number of steps between two records. Defaults
+            to 10.
+        tolerance (float, optional): Relative change of the log likelihood per
+            token below which a record counts as plateau. If None, training is
+            never stopped early. Defaults to 1e-3.
+        patience (int, optional): Number of plateau records in a row after which
+            training stops. Defaults to 3.
+        min_steps (int, optional): Training does not stop before this step.
+            Defaults to 0.
+
+    Attributes:
+        records (list): Tuples of step, log likelihood per token, perplexity and
+            seconds since :meth:`start()`.
+        converged_ (bool): True, if the plateau criterion was met.
+
+    Example:
+        >>> monitor = TrainingMonitor(interval=1, tolerance=0.01, patience=2)
+        >>> monitor.start()
+        >>> [monitor.record(step, loglikelihood) for step, loglikelihood in enumerate([-9.0, -8.0, -7.99, -7.99])]
+        [False, False, False, True]
+        >>> monitor.trace['step'].tolist()
+        [0, 1, 2, 3]
+    """
+    def __init__(self, interval=10, tolerance=1e-3, patience=3, min_steps=0):
+        self.interval = interval
+        self.tolerance = tolerance
+        self.patience = patience
+        self.min_steps = min_steps
+        self.start()
+
+    def start(self):
+        """Resets the records and starts the clock.
+
+        Returns:
+            None.
+        """
+        self.records = []
+        self.converged_ = False
+        self._plateau = 0
+        self._start = time.perf_counter()
+        return None
+
+    def record(self, step, loglikelihood_per_token):
+        """Records the log likelihood per token of a step.
+
+        Args:
+            step (int): Number of completed steps, e.g. iterations.
+            loglikelihood_per_token (float): Log likelihood divided by the number
+                of tokens.
+
+        Returns:
+            True, if training should stop, otherwise False.
+        """
+        seconds = time.perf_counter() - self._start
+        perplexity = float(np.exp(-loglikelihood_per_token))
+        if self.records:
+            previous = self.records[-1][1]
+            change = abs(loglikelihood_per_token - previous) / max(abs(previous), np.finfo(float).tiny)
+            self._plateau = self._plateau + 1 if self.tolerance is not None and change < self.tolerance else 0
+        self.records.append((step, float(loglikelihood_per_token), perplexity, seconds))
+        log.debug("<{}> log likelihood per token: {:.4f}, perplexity: {:.1f}".format(step, loglikelihood_per_token,
+                                                                                     perplexity))
+        if self._plateau >= self.patience and step >= self.min_steps:
+            log.info("Log likelihood plateaued after {} steps, stopping early.".format(step))
+            self.converged_ = True
+        return self.converged_
+
+    def parse_mallet(self, line):
+        """Records a progress line of MALLET's ``train-topics``.
+
+        MALLET writes lines like ``<10> LL/token: -8.12345`` to ``stderr``. \
+        Other lines are ignored.
+
+        Args:
+            line (str): A line of MALLET's ``stderr``.
+
+        Returns:
+            None.
+
+        Example:
+            >>> monitor = TrainingMonitor()
+            >>> monitor.parse_mallet('<10> LL/token: -8.5')
+            >>> monitor.parse_mallet('Total time: 1 seconds')
+            >>> monitor.trace['loglikelihood_per_token'].tolist()
+            [-8.5]
+        """
+        match = re.match(r'<(\d+)> LL/token: (-?[\d.]+(?:[eE][-+]?\d+)?)', line.strip())
+        if match is not None:
+            self.record(int(match.group(1)), float(match.group(2)))
+        return None
+
+    @property
+    def trace(self):
+        """The records as pandas DataFrame."""
+        return pd.DataFrame(self.records, columns=['step', 'loglikelihood_per_token', 'perplexity', 'seconds'])
+
+
+def _count_topics(token_ids, document_ids, topic_assignments, num_topics, num_documents, num_types):
+    """Builds the count tables of a Gibbs sampling state.
+
+    This private function is wrapped in :class:`GibbsLDA`.
+
+    Args:
+        token_ids (numpy.ndarray): Type ID of each token.
+        document_ids (numpy.ndarray): Document ID of each token.
+        topic_assignments (numpy.ndarray): Topic of each token.
+        num_topics (int): Number of topics.
+        num_documents (int): Number of documents.
+        num_types (int): Number of types.
+
+    Returns:
+        Topic-type counts, document-topic counts and topic counts as NumPy arrays.
+
+    Example:
+        >>> nzw, ndz, nz = _count_topics(np.array([0, 1, 1]), np.array([0, 0, 1]), np.array([1, 0, 1]), 2, 2, 2)
+        >>> nzw.tolist(), ndz.tolist(), nz.tolist()
+        ([[0, 1], [1, 1]], [[1, 1], [0, 1]], [1, 2])
+    """
+    topic_assignments = topic_assignments.astype(np.int64)
+    nzw = np.bincount(topic_assignments * num_types + token_ids, minlength=num_topics * num_types)
+    nzw = np.asfortranarray(nzw.reshape(num_topics, num_types).astype(np.intc))
+    ndz = np.bincount(document_ids.astype(np.int64) * num_topics + topic_assignments, minlength=num_documents * num_topics)
+    ndz = ndz.reshape(num_documents, num_topics).astype(np.intc)
+    nz = np.bincount(topic_assignments, minlength=num_topics).astype(np.intc)
+    return nzw, ndz, nz
+
+
+def _loglikelihood(nzw, ndz, nz, alpha, eta):
+    """Calculates the complete log likelihood of a Gibbs sampling state.
+
+    This private function is wrapped in :meth:`GibbsLDA.loglikelihood()`.
+
+    Args:
+        nzw (numpy.ndarray): Topic-type counts.
+        ndz (numpy.ndarray): Document-topic counts.
+        nz (numpy.ndarray): Topic counts.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        eta (float): Dirichlet parameter for the topic-type distributions.
+
+    Returns:
+        The log likelihood as float.
+    """
+    num_topics, num_types = nzw.shape
+    num_documents = ndz.shape[0]
+    nd = ndz.sum(axis=1)
+    loglikelihood = num_topics * (gammaln(eta * num_types) - num_types * gammaln(eta))
+    loglikelihood += gammaln(nzw + eta).sum() - gammaln(nz + eta * num_types).sum()
+    loglikelihood += num_documents * (gammaln(alpha * num_topics) - num_topics * gammaln(alpha))
+    loglikelihood += gammaln(ndz + alpha).sum() - gammaln(nd + alpha * num_topics).sum()
+    return float(loglikelihood)
+
+
+def _matrix_to_token_ids(document_term_matrix):
+    """Encodes a document-term matrix as token ID arrays.
+
+    This private function is wrapped in :class:`GibbsLDA`. Every occurrence of \
+    a type becomes one token, ordered by document.
+
+    Args:
+        document_term_matrix (array-like): Document-term matrix of integer
+            counts. Can be a NumPy array, a pandas DataFrame or a SciPy sparse
+            matrix.
+
+    Returns:
+        Type IDs and document IDs of all tokens as ``int32`` NumPy arrays.
+
+    Raises:
+        ValueError, if the matrix contains negative or non-integer counts.
+
+    Example:
+        >>> token_ids, document_ids = _matrix_to_token_ids(np.array([[2, 0, 1], [0, 1, 0]]))
+        >>> token_ids.tolist(), document_ids.tolist()
+        ([0, 0, 2, 1], [0, 0, 0, 1])
+    """
+    if hasattr(document_term_matrix, 'tocoo'):
+        matrix = document_term_matrix.tocsr().tocoo()
+        document_ids, token_ids, counts = matrix.row, matrix.col, matrix.data
     else:
-        raise ValueError("{} is no supported LDA implementation".fromat(implementation))
+        matrix = np.asarray(document_term_matrix)
+        document_ids, token_ids = np.nonzero(matrix)
+        counts = matrix[document_ids, token_ids]
+    if np.any(counts < 0) or np.any(counts != np.floor(counts)):
+        raise ValueError("The document-term matrix has to contain non-negative integer counts.")
+    counts = counts.astype(np.int64)
+    return np.repeat(token_ids, counts).astype(np.int32), np.repeat(document_ids, counts).astype(np.int32)
+
+
+def _sample_topics(token_ids, document_ids, topic_assignments, nzw, ndz, nz, alpha, eta, rands):
+    """Runs one collapsed Gibbs sampling sweep over all tokens.
+
+    This private function is wrapped in :class:`GibbsLDA`. The count tables and \
+    ``topic_assignments`` are updated in place. For every token, the full \
+    conditional is computed vectorized over all topics and a new topic is \
+    drawn with ``rands``, one uniform random number per token. The loop over \
+    the tokens stays in Python: a collapsed Gibbs sampler has to update the \
+    counts before the next draw, so tokens of a document cannot be drawn as \
+    a batch without changing the sampler, see the note of :class:`GibbsLDA`.
+
+    Args:
+        token_ids (numpy.ndarray): Type ID of each token.
+        document_ids (numpy.ndarray): Document ID of each token.
+        topic_assignments (numpy.ndarray): Topic of each token.
+        nzw (numpy.ndarray): Topic-type counts.
+        ndz (numpy.ndarray): Document-topic counts.
+        nz (numpy.ndarray): Topic counts.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        eta (float): Dirichlet parameter for the topic-type distributions.
+        rands (numpy.ndarray): Uniform random numbers in ``[0, 1)``.
+
+    Returns:
+        None.
+    """
+    eta_sum = eta * nzw.shape[1]
+    for i in range(len(token_ids)):
+        w = token_ids[i]
+        d = document_ids[i]
+        z = topic_assignments[i]
+        nzw[z, w] -= 1
+        ndz[d, z] -= 1
+        nz[z] -= 1
+        cumulative = np.cumsum((nzw[:, w] + eta) / (nz + eta_sum) * (ndz[d] + alpha))
+        z = np.searchsorted(cumulative, rands[i] * cumulative[-1], side='right')
+        topic_assignments[i] = z
+        nzw[z, w] += 1
+        ndz[d, z] += 1
+        nz[z] += 1
+
+
+def _sample_topics_mh(token_ids, document_ids, topic_assignments, nzw, ndz, nz, alpha, eta,
+                      documents, types, mh_steps, random_state, block_size=1024):
+    """Runs one Metropolis-Hastings sweep over all tokens, block by block.
+
+    This private function is wrapped in :class:`AliasLDA`. The count tables and \
+    ``topic_assignments`` are updated in place after every block. For every \
+    token, ``mh_steps`` document proposals and type proposals are tested \
+    against the full conditional, which only needs a few count lookups. A \
+    proposal is drawn like from ``ndz[d] + alpha`` or ``nzw[:, w] + eta``: \
+    the topic of a random token of the document or type, or else a uniform \
+    topic.
+
+    Args:
+        token_ids (numpy.ndarray): Type ID of each token, ordered by document.
+        document_ids (numpy.ndarray): Document ID of each token.
+        topic_assignments (numpy.ndarray): Topic of each token.
+        nzw (numpy.ndarray): Topic-type counts.
+        ndz (numpy.ndarray): Document-topic counts.
+        nz (numpy.ndarray): Topic counts.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        eta (float): Dirichlet parameter for the topic-type distributions.
+        documents (tuple): Index of the first token and number of tokens of
+            each document.
+        types (tuple): Token indices ordered by type, index of the first of
+            them and number of tokens of each type.
+        mh_steps (int): Number of document and type proposal pairs per token.
+        random_state (numpy.random.RandomState): The random number generator.
+        block_size (int, optional): Number of tokens sampled together.
+            Defaults to 1024.
+
+    Returns:
+        None.
+    """
+    document_starts, document_lengths = documents
+    type_order, type_starts, type_lengths = types
+    num_topics, num_types = nzw.shape
+    eta_sum = eta * num_types
+    order = random_state.permutation(len(token_ids))
+    for block_start in range(0, len(order), block_size):
+        block = order[block_start:block_start + block_size]
+        w = token_ids[block]
+        d = document_ids[block]
+        old = topic_assignments[block]
+        rands = random_state.random_sample((4 * mh_steps, len(block)))
+
+        def conditional(k):
+            # full conditional of topics k, without the current token
+            own = k == old
+            return (ndz[d, k] - own + alpha) * (nzw[k, w] - own + eta) / (nz[k] - own + eta_sum)
+
+        s = old.copy()
+        p_s = conditional(s)
+        for step in range(mh_steps):
+            # document proposal: q(k) is proportional to ndz[d, k] + alpha
+            t = _propose(rands[4 * step], d, document_starts, document_lengths, None, topic_assignments,
+                         alpha, num_topics)
+            p_t = conditional(t)
+            accept = rands[4 * step + 1] * p_s * (ndz[d, t] + alpha) < p_t * (ndz[d, s] + alpha)
+            s, p_s = np.where(accept, t, s), np.where(accept, p_t, p_s)
+
+            # type proposal: q(k) is proportional to nzw[k, w] + eta
+            t = _propose(rands[4 * step + 2], w, type_starts, type_lengths, type_order, topic_assignments,
+                         eta, num_topics)
+            p_t = conditional(t)
+            accept = rands[4 * step + 3] * p_s * (nzw[t, w] + eta) < p_t * (nzw[s, w] + eta)
+            s, p_s = np.where(accept, t, s), np.where(accept, p_t, p_s)
+
+        changed = s != old
+        w, d, old, s = w[changed], d[changed], old[changed], s[changed]
+        np.subtract.at(nzw, (old, w), 1)
+        np.add.at(nzw, (s, w), 1)
+        np.subtract.at(ndz, (d, old), 1)
+        np.add.at(ndz, (d, s), 1)
+        nz += (np.bincount(s, minlength=num_topics) - np.bincount(old, minlength=num_topics)).astype(nz.dtype)
+        topic_assignments[block[changed]] = s
+
+
+def _propose(rands, groups, starts, lengths, order, topic_assignments, prior, num_topics):
+    """Draws topics proportional to the counts of a group plus a prior.
+
+    This private function is wrapped in :func:`_sample_topics_mh()`. With \
+    probability ``n / (n + num_topics * prior)`` for a group of ``n`` tokens, \
+    the topic of one of its tokens is taken, otherwise a uniform topic.
+
+    Args:
+        rands (numpy.ndarray): Uniform random numbers in ``[0, 1)``, one per draw.
+        groups (numpy.ndarray): The document or type of each draw.
+        starts (numpy.ndarray): Position of the first token of each group.
+        lengths (numpy.ndarray): Number of tokens of each group.
+        order (numpy.ndarray): Token indices ordered by group, or None if the
+            tokens are ordered by group.
+        topic_assignments (numpy.ndarray): Topic of each token.
+        prior (float): Dirichlet parameter.
+        num_topics (int): Number of topics.
+
+    Returns:
+        The topics as NumPy array.
+
+    Example:
+        >>> _propose(np.array([0.0, 0.7, 0.99]), np.array([0, 0, 0]), np.array([0]), np.array([2]), None,
+        ...          np.array([1, 1]), 0.5, 2).tolist()
+        [1, 0, 1]
+    """
+    length = lengths[groups]
+    u = rands * (length + num_topics * prior)
+    positions = starts[groups] + np.minimum(u, length - 1).astype(np.int64)
+    if order is not None:
+        positions = order[positions]
+    uniform = np.minimum(((u - length) / prior).astype(np.int64), num_topics - 1)
+    return np.where(u < length, topic_assignments[positions], uniform)
+
+
+def _partition_documents(document_ids, num_partitions):
+    """Splits token ranges at document boundaries into balanced partitions.
+
+    This private function is wrapped in :class:`DistributedGibbsLDA`.
+
+    Args:
+        document_ids (numpy.ndarray): Document ID of each token, ordered by
+            document.
+        num_partitions (int): Number of partitions.
+
+    Returns:
+        A list of ``(start, end)`` token ranges, each containing whole documents.
+
+    Example:
+        >>> _partition_documents(np.array([0, 0, 0, 1, 2, 2]), 2)
+        [(0, 3), (3, 6)]
+    """
+    boundaries = np.flatnonzero(np.diff(document_ids)) + 1
+    boundaries = np.concatenate([[0], boundaries, [len(document_ids)]])
+    targets = np.linspace(0, len(document_ids), num_partitions + 1)[1:-1]
+    cuts = boundaries[np.searchsorted(boundaries, targets)]
+    cuts = np.unique(np.concatenate([[0], cuts, [len(document_ids)]]))
+    return [(int(start), int(end)) for start, end in zip(cuts[:-1], cuts[1:]) if end > start]
+
+
+def _sample_partition(task):
+    """Samples one partition of an AD-LDA iteration in a worker process.
+
+    This private function is wrapped in :class:`DistributedGibbsLDA`. The \
+    worker attaches to the shared arrays, copies the global topic-type counts, \
+    samples its token range and writes topic assignments and document-topic \
+    counts in place.
+
+    Args:
+        task (tuple): The handle of the :class:`dariah_topics.shared.SharedArrays`,
+            the token range, ``alpha``, ``eta`` and a random seed.
+
+    Returns:
+        Topic IDs, type IDs and values of the nonzero changes of the topic-type
+            counts.
+    """
+    handle, start, end, alpha, eta, seed = task
+    with SharedArrays.attach(handle) as shared:
+        return _sample_shared_partition(shared.arrays, start, end, alpha, eta, seed)
+
+
+def _sample_shared_partition(arrays, start, end, alpha, eta, seed):
+    """Samples a token range with a private copy of the topic-type counts.
+
+    This private function is wrapped in :func:`_sample_partition()`.
+
+    Args:
+        arrays (dict): The shared NumPy arrays by attribute name.
+        start (int): Index of the first token.
+        end (int): Index after the last token.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        eta (float): Dirichlet parameter for the topic-type distributions.
+        seed (int): Seed for the random numbers of this partition.
+
+    Returns:
+        Topic IDs, type IDs and values of the nonzero changes of the topic-type
+            counts.
+    """
+    global_nzw = arrays['nzw_']
+    nzw = np.array(global_nzw, order='F')
+    nz = nzw.sum(axis=1).astype(np.intc)
+    rands = np.random.RandomState(seed).random_sample(end - start)
+    _sample_topics(arrays['token_ids_'][start:end], arrays['document_ids_'][start:end],
+                   arrays['topic_assignments_'][start:end], nzw, arrays['ndz_'], nz, alpha, eta, rands)
+    topics, types = np.nonzero(nzw != global_nzw)
+    return topics, types, nzw[topics, types] - global_nzw[topics, types]
+
+
+def _dirichlet_expectation(parameters):
+    """Calculates the expected logarithm of Dirichlet distributed variables.
+
+    This private function is wrapped in :class:`OnlineLDA`.
+
+    Args:
+        parameters (numpy.ndarray): Dirichlet parameters, one distribution per row.
+
+    Returns:
+        The expectations of the logarithms as NumPy array.
+    """
+    if parameters.ndim == 1:
+        return psi(parameters) - psi(parameters.sum())
+    return psi(parameters) - psi(parameters.sum(axis=1))[:, np.newaxis]
+
+
+def _document_to_bow(document):
+    """Converts a document to type IDs and frequencies.
+
+    This private function is wrapped in :class:`OnlineLDA`.
+
+    Args:
+        document (list): An array of type IDs or a list of tuples of ``type_id``
+            and frequency.
+
+    Returns:
+        Distinct type IDs and their frequencies as NumPy arrays.
+
+    Example:
+        >>> type_ids, counts = _document_to_bow([3, 1, 3])
+        >>> type_ids.tolist(), counts.tolist()
+        ([1, 3], [1.0, 2.0])
+        >>> type_ids, counts = _document_to_bow([(1, 1), (3, 2)])
+        >>> type_ids.tolist(), counts.tolist()
+        ([1, 3], [1.0, 2.0])
+    """
+    document = list(document)
+    if document and isinstance(document[0], tuple):
+        type_ids, counts = zip(*document)
+        return np.array(type_ids, dtype=np.int64), np.array(counts, dtype=float)
+    type_ids, counts = np.unique(np.asarray(document, dtype=np.int64), return_counts=True)
+    return type_ids, counts.astype(float)
+
+
+def _matrix_to_bows(document_term_matrix):
+    """Converts a document-term matrix to lists of type IDs and frequencies.
+
+    This private function is wrapped in :class:`OnlineLDA` and :func:`infer()`. \
+    Anything else than a SciPy sparse matrix or a pandas DataFrame is returned \
+    as it is.
+
+    Args:
+        document_term_matrix: A document-term matrix, or documents.
+
+    Returns:
+        A list of lists of tuples of ``type_id`` and frequency, one per row.
+
+    Example:
+        >>> _matrix_to_bows(sparse.csr_matrix([[0, 2], [1, 0]]))
+        [[(1, 2)], [(0, 1)]]
+    """
+    if hasattr(document_term_matrix, 'columns'):
+        document_term_matrix = sparse.csr_matrix(document_term_matrix.values)
+    if not sparse.issparse(document_term_matrix):
+        return document_term_matrix
+    matrix = sparse.csr_matrix(document_term_matrix)
+    indices, data = matrix.indices.tolist(), matrix.data.tolist()
+    return [list(zip(indices[start:end], data[start:end]))
+            for start, end in zip(matrix.indptr[:-1].tolist(), matrix.indptr[1:].tolist())]
+
+
+def _minibatches(corpus_stream, batch_size):
+    """Groups a stream of documents into lists.
+
+    This private function is wrapped in :class:`OnlineLDA`. Only one minibatch \
+    is held in memory.
+
+    Args:
+        corpus_stream (iterable): Documents.
+        batch_size (int): Number of documents per minibatch.
+
+    Yields:
+        Lists of at most ``batch_size`` documents.
+
+    Example:
+        >>> list(_minibatches(iter(range(5)), 2))
+        [[0, 1], [2, 3], [4]]
+    """
+    corpus_stream = iter(corpus_stream)
+    while True:
+        batch = list(islice(corpus_stream, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _num_types(type2id):
+    """Determines the number of types of a vocabulary.
+
+    This private function is wrapped in :func:`lda()`.
+
+    Args:
+        type2id (dict): A dictionary with types as keys and identifiers as
+            values, or vice versa.
+
+    Returns:
+        The highest identifier plus one.
+
+    Example:
+        >>> _num_types({'this': 1, 'is': 2})
+        3
+        >>> _num_types({0: 'this', 1: 'is'})
+        2
+    """
+    if type2id is None:
+        raise ValueError("Pass either type2id or n_types for the online implementation.")
+    identifiers = type2id.keys() if all(isinstance(key, (int, np.integer)) for key in type2id) else type2id.values()
+    return max(identifiers) + 1
+
+
+def _fit_gensim(gensim_corpus, type2id, topics, iterations, checkpoint=None, checkpoint_interval=1,
+                resume_from=None, monitor=None, passes=1, **kwargs):
+    """Trains a Gensim model pass by pass, writing checkpoints.
+
+    This private function is wrapped in :func:`lda()`. The number of completed \
+    passes is saved with the model.
+
+    Args:
+        gensim_corpus (list): A list of lists containing tuples of ``type_id``
+            and frequency.
+        type2id (dict): A dictionary with identifiers as keys and types as values.
+        topics (int): Number of topics.
+        iterations (int): Maximum number of E-step iterations per document.
+        checkpoint (str, optional): Path to the checkpoint file. Defaults to None.
+        checkpoint_interval (int, optional): Number of passes between writing
+            checkpoints. Defaults to 1.
+        resume_from (str, optional): Path to a checkpoint. Defaults to None.
+        monitor (TrainingMonitor, optional): Records the variational bound per
+            token. Defaults to None.
+        passes (int, optional): Number of passes over the corpus. Defaults to 1.
+        **kwargs: Additional arguments for :class:`gensim.models.LdaMulticore`.
+
+    Returns:
+        A fitted :class:`gensim.models.LdaMulticore` model.
+    """
+    from gensim.models import LdaMulticore
+    if resume_from is None:
+        model = LdaMulticore(corpus=None, id2word=type2id, num_topics=topics, iterations=iterations, **kwargs)
+        model.completed_passes = 0
+    else:
+        log.info("Resuming from checkpoint {} ...".format(resume_from))
+        model = LdaMulticore.load(resume_from)
+    model.passes = 1
+    while model.completed_passes < passes:
+        model.update(gensim_corpus)
+        model.completed_passes += 1
+        if checkpoint is not None and model.completed_passes % checkpoint_interval == 0:
+            log.info("Saving checkpoint after {} passes to {} ...".format(model.completed_passes, checkpoint))
+            model.save(checkpoint)
+        if monitor is not None and model.completed_passes % monitor.interval == 0:
+            if monitor.record(model.completed_passes, model.log_perplexity(gensim_corpus)):
+                break
+    model.passes = passes
+    return model
+
+
+def _fit_lda_package(model, document_term_matrix, checkpoint=None, checkpoint_interval=100, resume_from=None,
+                     monitor=None):
+    """Trains a :class:`lda.LDA` model, writing checkpoints.
+
+    This private function is wrapped in :func:`lda()`. It runs the sampling \
+    loop of :meth:`lda.LDA.fit()` itself, so that the topic assignments and \
+    the random number generator can be saved and restored in the format of \
+    :meth:`GibbsLDA.save_checkpoint()`.
+
+    Args:
+        model (lda.LDA): An unfitted model.
+        document_term_matrix (array-like): Document-term matrix of integer counts.
+            Can be a NumPy array, a pandas DataFrame or a SciPy sparse matrix.
+        checkpoint (str, optional): Path to the checkpoint file. Defaults to None.
+        checkpoint_interval (int, optional): Number of iterations between writing
+            checkpoints. Defaults to 100.
+        resume_from (str, optional): Path to a checkpoint. Defaults to None.
+        monitor (TrainingMonitor, optional): Records the log likelihood and
+            stops sampling early. Defaults to None.
+
+    Returns:
+        The fitted model.
+    """
+    import lda.utils
+    if sparse.issparse(document_term_matrix):
+        document_term_matrix = sparse.csr_matrix(document_term_matrix, dtype=np.int64)
+    else:
+        document_term_matrix = np.asarray(document_term_matrix).astype(np.int64)
+    model._initialize(document_term_matrix)
+    random_state = lda.utils.check_random_state(model.random_state)
+    rands = model._rands.copy()
+    first_iteration = 0
+    if resume_from is not None:
+        log.info("Resuming from checkpoint {} ...".format(resume_from))
+        state = _read_checkpoint(resume_from)
+        if not np.array_equal(state['token_ids'], model.WS) or int(state['n_topics']) != model.n_topics:
+            raise ValueError("The checkpoint {} does not match the document-term matrix.".format(resume_from))
+        model.ZS[:] = state['topic_assignments']
+        nzw, ndz, nz = _count_topics(model.WS, model.DS, model.ZS, model.n_topics, *document_term_matrix.shape)
+        model.nzw_[:], model.ndz_[:], model.nz_[:] = nzw, ndz, nz
+        random_state = _random_state_from_arrays(state)
+        if 'rands' in state:
+            rands = state['rands']
+        first_iteration = int(state['iteration'])
+        model.loglikelihoods_ = state['loglikelihoods'].tolist()
+    for iteration in range(first_iteration, model.n_iter):
+        random_state.shuffle(rands)
+        if iteration % model.refresh == 0:
+            loglikelihood = model.loglikelihood()
+            log.info("<{}> log likelihood: {:.0f}".format(iteration, loglikelihood))
+            model.loglikelihoods_.append(loglikelihood)
+        model._sample_topics(rands)
+        if checkpoint is not None and (iteration + 1) % checkpoint_interval == 0:
+            log.info("Saving checkpoint after {} iterations to {} ...".format(iteration + 1, checkpoint))
+            _save_checkpoint(checkpoint, implementation='lda', n_topics=model.n_topics, alpha=model.alpha,
+                             eta=model.eta, shape=np.array(document_term_matrix.shape), iteration=iteration + 1,
+                             token_ids=model.WS, document_ids=model.DS, topic_assignments=model.ZS,
+                             loglikelihoods=np.array(model.loglikelihoods_, dtype=float), rands=rands,
+                             **_random_state_to_arrays(random_state))
+        if monitor is not None and (iteration + 1) % monitor.interval == 0:
+            if monitor.record(iteration + 1, model.loglikelihood() / len(model.WS)):
+                break
+    model.components_ = (model.nzw_ + model.eta).astype(float)
+    model.components_ /= np.sum(model.components_, axis=1)[:, np.newaxis]
+    model.topic_word_ = model.components_
+    model.doc_topic_ = (model.ndz_ + model.alpha).astype(float)
+    model.doc_topic_ /= np.sum(model.doc_topic_, axis=1)[:, np.newaxis]
+    del model.WS, model.DS, model.ZS
+    return model
+
+
+def _random_state_from_arrays(arrays):
+    """Restores a NumPy random number generator.
+
+    This private function is the counterpart of :func:`_random_state_to_arrays()`.
+
+    Args:
+        arrays (dict): The state as returned by :func:`_random_state_to_arrays()`.
+
+    Returns:
+        A :class:`numpy.random.RandomState` object.
+    """
+    random_state = np.random.RandomState()
+    random_state.set_state(('MT19937', arrays['rng_keys'], int(arrays['rng_pos']),
+                            int(arrays['rng_has_gauss']), float(arrays['rng_cached_gaussian'])))
+    return random_state
+
+
+def _random_state_to_arrays(random_state):
+    """Converts the state of a NumPy random number generator to arrays.
+
+    This private function is wrapped in the checkpoint methods.
+
+    Args:
+        random_state (numpy.random.RandomState): The random number generator.
+
+    Returns:
+        A dictionary of NumPy arrays.
+
+    Example:
+        >>> random_state = np.random.RandomState(1)
+        >>> restored = _random_state_from_arrays(_random_state_to_arrays(random_state))
+        >>> restored.randint(100) == random_state.randint(100)
+        True
+    """
+    _, keys, pos, has_gauss, cached_gaussian = random_state.get_state()
+    return {'rng_keys': keys, 'rng_pos': np.array(pos), 'rng_has_gauss': np.array(has_gauss),
+            'rng_cached_gaussian': np.array(cached_gaussian)}
+
+
+def _read_checkpoint(filepath):
+    """Reads a checkpoint written by :func:`_save_checkpoint()`.
+
+    Args:
+        filepath (str): Path to the checkpoint file.
+
+    Returns:
+        A dictionary of NumPy arrays, with ``implementation`` as str.
+    """
+    with np.load(filepath) as archive:
+        checkpoint = {key: archive[key] for key in archive.files}
+    checkpoint['implementation'] = str(checkpoint['implementation'])
+    return checkpoint
+
+
+def _save_checkpoint(filepath, **arrays):
+    """Writes arrays atomically to a compressed NumPy archive.
+
+    This private function is wrapped in the checkpoint methods. The archive is \
+    written to a temporary file first and then renamed, so an interrupted \
+    process never leaves a truncated checkpoint behind.
+
+    Args:
+        filepath (str): Path to the checkpoint file.
+        **arrays: Arrays or scalars to save.
+
+    Returns:
+        None.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     filepath = os.path.join(tmpdir, 'checkpoint')
+        ...     _save_checkpoint(filepath, implementation='gibbs', iteration=3)
+        ...     int(_read_checkpoint(filepath)['iteration'])
+        3
+    """
+    temporary = '{}.tmp'.format(filepath)
+    with open(temporary, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temporary, filepath)
+    return None
+
+
+def _split_held_out(document_term_matrix, held_out, random_state):
+    """Splits a document-term matrix into training and held-out documents.
+
+    This private function is wrapped in :func:`sweep()`. The tokens of each \
+    held-out document are divided randomly into an observed and an evaluated \
+    half.
+
+    Args:
+        document_term_matrix (array-like): Document-term matrix of integer counts.
+        held_out (float): Share of held-out documents.
+        random_state (int): Seed for the split.
+
+    Returns:
+        A dictionary with the sparse matrices ``train``, ``observed`` and
+        ``evaluated``.
+
+    Example:
+        >>> matrices = _split_held_out(np.ones((10, 3), dtype=int) * 4, 0.2, 0)
+        >>> matrices['train'].shape, int(matrices['observed'].sum() + matrices['evaluated'].sum())
+        ((8, 3), 24)
+    """
+    if hasattr(document_term_matrix, 'tocsr'):
+        matrix = document_term_matrix.tocsr()
+    else:
+        matrix = sparse.csr_matrix(np.asarray(document_term_matrix))
+    matrix = matrix.astype(np.int32)
+    rng = np.random.RandomState(random_state)
+    documents = rng.permutation(matrix.shape[0])
+    num_held_out = int(round(held_out * matrix.shape[0]))
+    held_out_matrix = matrix[np.sort(documents[:num_held_out])]
+    observed = held_out_matrix.copy()
+    observed.data = rng.binomial(observed.data, 0.5).astype(np.int32)
+    evaluated = held_out_matrix - observed
+    matrices = {'train': matrix[np.sort(documents[num_held_out:])], 'observed': observed, 'evaluated': evaluated}
+    for name, held_out_matrix in matrices.items():
+        held_out_matrix.eliminate_zeros()
+    return matrices
+
+
+def _sweep_configuration(task):
+    """Trains and scores one configuration of a sweep in a worker process.
+
+    This private function is wrapped in :func:`sweep()`.
+
+    Args:
+        task (tuple): The handles of the shared document-term matrices, the
+            number of topics, ``alpha``, ``beta``, the seed, the number of
+            iterations, the implementation, the number of keys and additional
+            arguments.
+
+    Returns:
+        A dictionary with the configuration and its scores.
+    """
+    handles, topics, alpha, beta, seed, iterations, implementation, num_keys, kwargs = task
+    shared = {name: SharedDocumentTermMatrix.attach(handle) for name, handle in handles.items()}
+    try:
+        matrices = {name: matrix.matrix for name, matrix in shared.items()}
+        start = time.perf_counter()
+        model = lda(matrices['train'], topics, iterations=iterations, implementation=implementation,
+                    alpha=alpha, eta=beta, random_state=seed, **kwargs)
+        seconds = time.perf_counter() - start
+        perplexity = _held_out_perplexity(model.topic_word_, matrices['observed'], matrices['evaluated'], alpha)
+        coherence = _umass_coherence(matrices['train'], model.topic_word_, num_keys)
+    finally:
+        matrices = model = None
+        for matrix in shared.values():
+            matrix.close()
+    return {'topics': topics, 'alpha': alpha, 'beta': beta, 'seed': seed, 'perplexity': perplexity,
+            'coherence': coherence, 'seconds': seconds}
+
+
+def _held_out_perplexity(topic_word, observed, evaluated, alpha, iterations=50):
+    """Computes the perplexity of held-out documents by document completion.
+
+    This private function is wrapped in :func:`sweep()`. The document-topic \
+    distributions are estimated from the observed tokens with fixed topics by \
+    expectation maximization, the evaluated tokens are scored with them.
+
+    Args:
+        topic_word (numpy.ndarray): Topic-type distributions.
+        observed (scipy.sparse.csr_matrix): Observed counts of the held-out
+            documents.
+        evaluated (scipy.sparse.csr_matrix): Evaluated counts of the held-out
+            documents.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        iterations (int, optional): Number of EM iterations. Defaults to 50.
+
+    Returns:
+        The perplexity as float, NaN if there are no evaluated tokens.
+
+    Example:
+        >>> topic_word = np.array([[0.5, 0.5, 0.0], [0.0, 0.0, 1.0]]) + 1e-6
+        >>> observed = sparse.csr_matrix([[2, 2, 0]])
+        >>> round(_held_out_perplexity(topic_word, observed, observed, 0.01), 1)
+        2.0
+    """
+    num_topics = topic_word.shape[0]
+    doc_topic = np.full((observed.shape[0], num_topics), 1.0 / num_topics)
+    observed = observed.tocoo()
+    for _ in range(iterations):
+        probabilities = np.einsum('ik,ki->i', doc_topic[observed.row], topic_word[:, observed.col])
+        weights = sparse.csr_matrix((observed.data / probabilities, (observed.row, observed.col)),
+                                    shape=observed.shape)
+        doc_topic = doc_topic * (weights @ topic_word.T) + alpha
+        doc_topic /= doc_topic.sum(axis=1)[:, np.newaxis]
+    evaluated = evaluated.tocoo()
+    if evaluated.data.sum() == 0:
+        return float('nan')
+    probabilities = np.einsum('ik,ki->i', doc_topic[evaluated.row], topic_word[:, evaluated.col])
+    return float(np.exp(-evaluated.data.dot(np.log(probabilities)) / evaluated.data.sum()))
+
+
+def _umass_coherence(document_term_matrix, topic_word, num_keys=10):
+    """Computes the mean UMass coherence of topics.
+
+    This private function is wrapped in :func:`sweep()`. The document \
+    co-frequencies of the top types of a topic are computed at once by a \
+    sparse matrix product.
+
+    Args:
+        document_term_matrix (scipy.sparse.csr_matrix): Document-term matrix.
+        topic_word (numpy.ndarray): Topic-type distributions.
+        num_keys (int, optional): Number of top types per topic. Defaults to 10.
+
+    Returns:
+        The mean coherence over all topics as float.
+
+    Example:
+        >>> document_term_matrix = sparse.csr_matrix([[1, 1, 0], [1, 1, 0], [0, 0, 1]])
+        >>> round(_umass_coherence(document_term_matrix, np.array([[0.5, 0.4, 0.1]]), 2), 3)
+        0.405
+    """
+    occurrences = sparse.csc_matrix(document_term_matrix > 0, dtype=np.float64)
+    scores = []
+    for weights in topic_word:
+        keys = np.argsort(weights)[::-1][:num_keys]
+        cooccurrences = (occurrences[:, keys].T @ occurrences[:, keys]).toarray()
+        frequencies = np.maximum(np.diag(cooccurrences), 1)
+        lower = np.tril_indices(len(keys), -1)
+        scores.append(np.log((cooccurrences[lower] + 1) / frequencies[lower[1]]).sum())
+    return float(np.mean(scores))
+
+
+def _fold_in(topic_word, document_term_matrix, alpha, iterations, burn_in, rng, chunk_size=65536):
+    """Samples topics of new documents with fixed topic-type distributions.
+
+    This private function is wrapped in :func:`infer()`. In each sweep, all \
+    tokens are sampled in chunks of ``chunk_size`` tokens given the \
+    document-topic counts of the previous sweep, which vectorizes the sampler \
+    over tokens. The counts of all sweeps after ``burn_in`` are averaged.
+
+    Args:
+        topic_word (numpy.ndarray): Topic-type distributions.
+        document_term_matrix (array-like): Document-term matrix of integer counts.
+        alpha (float): Dirichlet parameter for the document-topic distributions.
+        iterations (int): Number of sweeps.
+        burn_in (int): Number of discarded sweeps.
+        rng (numpy.random.RandomState): Random number generator.
+        chunk_size (int, optional): Number of tokens sampled at once. Defaults
+            to 65536.
+
+    Returns:
+        Document-topic distributions as NumPy array.
+    """
+    num_documents = document_term_matrix.shape[0]
+    num_topics = topic_word.shape[0]
+    token_ids, document_ids = _matrix_to_token_ids(document_term_matrix)
+    type_topic = np.ascontiguousarray(topic_word.T)
+
+    def count(topic_assignments):
+        counts = np.bincount(document_ids.astype(np.int64) * num_topics + topic_assignments,
+                             minlength=num_documents * num_topics)
+        return counts.reshape(num_documents, num_topics)
+
+    def sample(weights):
+        cumulative = np.cumsum(weights, axis=1)
+        thresholds = rng.random_sample(len(weights)) * cumulative[:, -1]
+        topics = (cumulative < thresholds[:, np.newaxis]).sum(axis=1)
+        return np.minimum(topics, num_topics - 1)
+
+    topic_assignments = np.concatenate([sample(type_topic[token_ids[start:start + chunk_size]])
+                                        for start in range(0, len(token_ids), chunk_size)] or [[]])
+    topic_assignments = topic_assignments.astype(np.int64)
+    ndz = count(topic_assignments)
+    accumulated = np.zeros((num_documents, num_topics))
+    for iteration in range(iterations):
+        for start in range(0, len(token_ids), chunk_size):
+            end = start + chunk_size
+            tokens, topics = token_ids[start:end], topic_assignments[start:end]
+            weights = (ndz[document_ids[start:end]] + alpha) * type_topic[tokens]
+            weights[np.arange(len(tokens)), topics] -= type_topic[tokens, topics]
+            topic_assignments[start:end] = sample(weights)
+        ndz = count(topic_assignments)
+        if iteration >= burn_in:
+            accumulated += ndz
+    accumulated = accumulated / max(iterations - burn_in, 1) + alpha
+    return accumulated / accumulated.sum(axis=1)[:, np.newaxis]
+
+
+def _read_mallet_doc_topics(doc_topics_file, document_labels=None, num_topics=None):
+    """Reads a MALLET doc-topics file into a document-topic matrix.
+
+    This private function is wrapped in :func:`infer()`. The file is parsed \
+    with :func:`dariah_topics.postprocessing.read_mallet_doc_topics()`.
+
+    Args:
+        doc_topics_file (str): Path to the doc-topics file.
+        document_labels (list, optional): If given, the rows are ordered like
+            these labels, matched with the file names in the doc-topics file.
+            Defaults to None.
+        num_topics (int, optional): Number of topics of the model. Defaults to
+            None, which takes the number from the file.
+
+    Returns:
+        Document-topic distributions as NumPy array.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile('w', suffix='.txt') as tmpfile:
+        ...     _ = tmpfile.write('#doc name topic proportion\\n0\\tfile:/b.txt\\t1\\t0.9\\t0\\t0.1\\n'
+        ...                       '1\\tfile:/a.txt\\t0\\t0.7\\t1\\t0.3\\n')
+        ...     tmpfile.flush()
+        ...     _read_mallet_doc_topics(tmpfile.name, ['a', 'b'], num_topics=3).tolist()
+        [[0.7, 0.3, 0.0], [0.1, 0.9, 0.0]]
+    """
+    labels, doc_topic = postprocessing.read_mallet_doc_topics(doc_topics_file, num_topics)
+    if document_labels is not None:
+        positions = {label: n for n, label in enumerate(labels)}
+        doc_topic = doc_topic[[positions[str(label)] for label in document_labels]]
+    return doc_topic
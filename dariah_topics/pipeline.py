@@ -0,0 +1,351 @@
+"""
+Running the Topic Modeling Pipeline
+***********************************
+
+Functions of this module are for **running the whole workflow** from text \
+files to topics without a notebook. The pipeline chains \
+:func:`dariah_topics.preprocessing.read_files()`, \
+:func:`dariah_topics.preprocessing.tokenize()`, \
+:func:`dariah_topics.preprocessing.segment()`, \
+:func:`dariah_topics.preprocessing.create_document_term_matrix()`, \
+:func:`dariah_topics.preprocessing.remove_features()`, \
+:func:`dariah_topics.modeling.lda()` and \
+:func:`dariah_topics.postprocessing.show_topics()`.
+
+The output of every stage is pickled to a cache directory, under a hash of \
+the content of the text files and the parameters of this and all previous \
+stages. A stage runs only if its output is not cached, and it loads only the \
+outputs it needs, so changing only ``num_topics`` retrains the model without \
+reading or preprocessing the corpus again.
+
+The pipeline is configured by a JSON file, e.g.::
+
+    {
+        "corpus": "corpus/*.txt",
+        "output": "output",
+        "tokenize": {"lower": true},
+        "segment": {"segment_size": 1000},
+        "remove_features": {"most_frequent_tokens": 100, "hapax_legomena": true},
+        "train": {"num_topics": 20, "iterations": 1000, "implementation": "lda"},
+        "topics": {"num_keys": 10}
+    }
+
+``corpus`` may also be the directory of a tokenized corpus saved by \
+:func:`dariah_topics.postprocessing.save_sharded_corpus()`; it is streamed \
+from its shards and not tokenized again.
+
+Relative paths are relative to the configuration file. Omitted keys take the \
+values of :data:`DEFAULTS`; additional keys of ``train`` are passed to \
+:func:`dariah_topics.modeling.lda()`. Run ``dariah-topics config.json`` to \
+write ``topics.csv`` and ``document_topics.csv`` to the output directory.
+
+Contents
+********
+    * :func:`run()` runs the pipeline for a configuration.
+    * :func:`read_config()` reads a configuration file.
+    * :func:`main()` is the ``dariah-topics`` command. With ``--profile report.json``, \
+    the time and memory of every stage and library call are written to \
+    ``report.json`` and summarized, see :mod:`dariah_topics.profiling`.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dariah_topics import profiling
+
+log = logging.getLogger('dariah_topics')
+
+DEFAULTS = {'corpus': None,
+            'output': 'output',
+            'cache_dir': '.dariah_topics_cache',
+            'read': {'file_format': None, 'xpath_expression': '//tei:text', 'sep': '\t', 'csv_columns': None},
+            'tokenize': {'pattern': r'\p{L}+\p{P}?\p{L}+', 'lower': True},
+            'segment': {'segment_size': None, 'tolerance': 0},
+            'remove_features': {'most_frequent_tokens': 0, 'hapax_legomena': False, 'stopwords': None},
+            'train': {'num_topics': 10, 'iterations': 1000, 'implementation': 'lda'},
+            'topics': {'num_keys': 10, 'document_num_keys': 3}}
+
+
+def read_config(filepath):
+    """Reads a pipeline configuration.
+
+    With this function you can read a JSON configuration file for :func:`run()`. \
+    Missing keys are filled in from :data:`DEFAULTS`, relative paths are made \
+    relative to the directory of the file, and a stopword file is read into \
+    a list.
+
+    Args:
+        filepath (str): Path to the JSON file.
+
+    Returns:
+        The configuration as dictionary.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     filepath = os.path.join(tmpdir, 'config.json')
+        ...     with open(filepath, 'w', encoding='utf-8') as file:
+        ...         _ = file.write('{"corpus": "corpus/*.txt", "train": {"num_topics": 20}}')
+        ...     config = read_config(filepath)
+        ...     config['corpus'] == os.path.join(tmpdir, 'corpus/*.txt')
+        True
+        >>> config['train']
+        {'num_topics': 20, 'iterations': 1000, 'implementation': 'lda'}
+    """
+    with open(filepath, encoding='utf-8') as file:
+        config = json.load(file)
+    return _with_defaults(config, os.path.dirname(os.path.abspath(filepath)))
+
+
+def run(config):
+    """Runs the pipeline.
+
+    With this function you can train a topic model on a corpus of text files \
+    with a configuration like the one read by :func:`read_config()`. Stages \
+    whose output is in ``cache_dir`` are skipped.
+
+    Args:
+        config (dict): The configuration. Missing keys are filled in from
+            :data:`DEFAULTS`.
+
+    Returns:
+        The topics and the document-topic distributions as pandas DataFrames,
+        which are also written to ``topics.csv`` and ``document_topics.csv``
+        in the ``output`` directory.
+    """
+    config = _with_defaults(config, os.getcwd())
+    os.makedirs(config['cache_dir'], exist_ok=True)
+    keys = _stage_keys(config)
+    outputs = {}
+
+    def output(stage):
+        if stage not in outputs:
+            cache_file = os.path.join(config['cache_dir'], '{}-{}.pickle'.format(stage, keys[stage]))
+            if os.path.exists(cache_file):
+                log.info("Loading cached output of stage '{}' ...".format(stage))
+                with open(cache_file, 'rb') as file:
+                    outputs[stage] = pickle.load(file)
+            else:
+                log.info("Running stage '{}' ...".format(stage))
+                function, dependencies = _STAGES[stage]
+                inputs = [output(dependency) for dependency in dependencies]
+                with profiling.section('pipeline.{}'.format(stage)):
+                    outputs[stage] = function(config, *inputs)
+                temporary = '{}.tmp'.format(cache_file)
+                with open(temporary, 'wb') as file:
+                    pickle.dump(outputs[stage], file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary, cache_file)
+        return outputs[stage]
+
+    topics, document_topics = output('topics')
+    os.makedirs(config['output'], exist_ok=True)
+    topics.to_csv(os.path.join(config['output'], 'topics.csv'))
+    document_topics.to_csv(os.path.join(config['output'], 'document_topics.csv'))
+    return topics, document_topics
+
+
+def main(argv=None):
+    """Runs the ``dariah-topics`` command.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to
+            ``sys.argv[1:]``.
+
+    Returns:
+        None.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog='dariah-topics', description="Train a topic model on text files.")
+    parser.add_argument('config', help="Path to the JSON configuration file.")
+    parser.add_argument('--cache-dir', help="Overrides the cache directory of the configuration.")
+    parser.add_argument('--output', help="Overrides the output directory of the configuration.")
+    parser.add_argument('--quiet', action='store_true', help="Only log warnings.")
+    parser.add_argument('--profile', metavar='REPORT',
+                        help="Profile the stages and library calls and write a JSON report.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO)
+    config = read_config(args.config)
+    for key in ['cache_dir', 'output']:
+        if getattr(args, key) is not None:
+            config[key] = os.path.abspath(getattr(args, key))
+    if args.profile is not None:
+        profiling.reset()
+        profiling.enable()
+    try:
+        topics, _ = run(config)
+    finally:
+        if args.profile is not None:
+            profiling.disable()
+            profiling.save_report(args.profile)
+    if not args.quiet:
+        print(topics.to_string())
+    if args.profile is not None:
+        print(profiling.summary().to_string(float_format='{:.3f}'.format))
+    return None
+
+
+def _with_defaults(config, base_dir):
+    """Fills in default values and resolves paths of a configuration.
+
+    This private function is wrapped in :func:`read_config()` and :func:`run()`.
+
+    Args:
+        config (dict): The configuration.
+        base_dir (str): Directory of relative paths.
+
+    Returns:
+        A new configuration.
+    """
+    merged = {}
+    for key, default in DEFAULTS.items():
+        value = config.get(key, default)
+        merged[key] = dict(default, **(value or {})) if isinstance(default, dict) else value
+    for key in set(config) - set(DEFAULTS):
+        raise ValueError("Unknown configuration key '{}'.".format(key))
+    if merged['corpus'] is None:
+        raise ValueError("The configuration has no 'corpus'.")
+    for key in ['output', 'cache_dir']:
+        merged[key] = os.path.join(base_dir, merged[key])
+    if isinstance(merged['corpus'], str):
+        merged['corpus'] = os.path.join(base_dir, merged['corpus'])
+    else:
+        merged['corpus'] = [os.path.join(base_dir, path) for path in merged['corpus']]
+    stopwords = merged['remove_features']['stopwords']
+    if isinstance(stopwords, str):
+        with open(os.path.join(base_dir, stopwords), encoding='utf-8') as file:
+            merged['remove_features']['stopwords'] = file.read().split()
+    return merged
+
+
+def _stage_keys(config):
+    """Hashes the inputs and parameters of every stage.
+
+    This private function is wrapped in :func:`run()`. The key of the first \
+    stage covers the paths and the content of all text files, every other key \
+    the key of the stages it depends on and its own parameters.
+
+    Args:
+        config (dict): The configuration.
+
+    Returns:
+        A dictionary of stage names and hexadecimal keys.
+    """
+    hasher = hashlib.sha256()
+    for path in _pathlist(config['corpus']):
+        hasher.update(os.path.basename(path).encode('utf-8') + b'\0')
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                hasher.update(block)
+        hasher.update(b'\0')
+    corpus_key = hasher.hexdigest()
+    keys = {}
+    for stage, (_, dependencies) in _STAGES.items():
+        hasher = hashlib.sha256(stage.encode('utf-8'))
+        for dependency in dependencies:
+            hasher.update(keys[dependency].encode('utf-8'))
+        if not dependencies:
+            hasher.update(corpus_key.encode('utf-8'))
+        hasher.update(json.dumps(config[stage], sort_keys=True).encode('utf-8'))
+        keys[stage] = hasher.hexdigest()[:32]
+    return keys
+
+
+def _pathlist(corpus):
+    """Lists the text files of a corpus.
+
+    Args:
+        corpus (str or list): A glob pattern or a list of paths.
+
+    Returns:
+        A sorted list of paths.
+    """
+    if _is_sharded_corpus(corpus):
+        return sorted(os.path.join(corpus, name) for name in os.listdir(corpus))
+    if isinstance(corpus, str):
+        pathlist = sorted(glob.glob(corpus))
+        if not pathlist:
+            raise ValueError("No files match {}.".format(corpus))
+        return pathlist
+    return sorted(corpus)
+
+
+def _is_sharded_corpus(corpus):
+    return isinstance(corpus, str) and os.path.isfile(os.path.join(corpus, 'manifest.json'))
+
+
+def _read(config):
+    from dariah_topics.preprocessing import read_files, read_sharded_corpus
+    if _is_sharded_corpus(config['corpus']):
+        return read_sharded_corpus(config['corpus'])
+    pathlist = _pathlist(config['corpus'])
+    document_labels = [os.path.splitext(os.path.basename(path))[0] for path in pathlist]
+    return document_labels, list(read_files(pathlist, **config['read']))
+
+
+def _tokenize(config, corpus):
+    from dariah_topics.preprocessing import ShardedCorpus, tokenize
+    if isinstance(corpus, ShardedCorpus):
+        return corpus.document_labels, corpus
+    document_labels, documents = corpus
+    return document_labels, [list(tokenize(document, **config['tokenize'])) for document in documents]
+
+
+def _segment(config, tokenized):
+    from dariah_topics.preprocessing import segment
+    if config['segment']['segment_size'] is None:
+        return tokenized
+    segment_labels, segments = [], []
+    for label, tokenized_document in zip(*tokenized):
+        for n, tokens in enumerate(segment([tokenized_document], **config['segment'])):
+            segment_labels.append('{}_{}'.format(label, n))
+            segments.append(tokens)
+    return segment_labels, segments
+
+
+def _remove_features(config, segmented):
+    from dariah_topics.preprocessing import (create_document_term_matrix, find_hapax_legomena, list_mfw,
+                                             remove_features)
+    parameters = config['remove_features']
+    document_term_matrix = create_document_term_matrix(segmented[1], segmented[0])
+    features = list(parameters['stopwords'] or [])
+    if parameters['most_frequent_tokens']:
+        features.extend(list_mfw(document_term_matrix, parameters['most_frequent_tokens']))
+    if parameters['hapax_legomena']:
+        features.extend(find_hapax_legomena(document_term_matrix))
+    if features:
+        document_term_matrix = remove_features(sorted(set(features)), document_term_matrix)
+    return document_term_matrix
+
+
+def _train(config, document_term_matrix):
+    from dariah_topics import modeling
+    parameters = dict(config['train'])
+    num_topics = parameters.pop('num_topics')
+    if parameters['implementation'] not in {'lda', 'gibbs', 'alias', 'distributed'}:
+        raise ValueError("The pipeline does not support the implementation {}.".format(parameters['implementation']))
+    return modeling.lda(document_term_matrix.values.astype(int), num_topics, **parameters)
+
+
+def _topics(config, model, document_term_matrix):
+    from dariah_topics import postprocessing
+    topics = postprocessing.show_topics(model=model, vocabulary=list(document_term_matrix.columns),
+                                        num_keys=config['topics']['num_keys'])
+    document_topics = postprocessing.show_document_topics(topics, model=model,
+                                                          document_labels=list(document_term_matrix.index),
+                                                          num_keys=config['topics']['document_num_keys'])
+    return topics, document_topics
+
+
+_STAGES = {'read': (_read, []),
+           'tokenize': (_tokenize, ['read']),
+           'segment': (_segment, ['tokenize']),
+           'remove_features': (_remove_features, ['segment']),
+           'train': (_train, ['remove_features']),
+           'topics': (_topics, ['train', 'remove_features'])}
+
+
+if __name__ == '__main__':
+    main()
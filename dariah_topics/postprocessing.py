@@ -22,26 +22,58 @@ Recurrent variable names are based on the following conventions:
 Contents
 ********
     * :func:`doc2bow()`
+    * :func:`gensim_document_topics()` infers the topic proportions of a Gensim \
+    corpus in batches, optionally in parallel, into a sparse matrix.
+    * :func:`read_mallet_doc_topics()`, :func:`read_mallet_topic_keys()`, \
+    :func:`read_mallet_topic_word_weights()` and :func:`read_mallet_word_topic_counts()` \
+    parse MALLET output files once into NumPy arrays and cache them.
+    * :func:`read_mallet_state()` aggregates the topic assignments of MALLET's \
+    gzipped Gibbs sampling state into sparse count matrices, and \
+    :func:`stream_mallet_state()` streams them in chunks.
     * :func:`save_document_term_matrix()` writes a document-term matrix to a `CSV <https://en.wikipedia.org/wiki/Comma-separated_values>`_
     file or to a `Matrix Market <http://math.nist.gov/MatrixMarket/formats.html#MMformat>`_ file, respectively.
-    * :func:`save_model()` saves a LDA model (except MALLET models, which will be saved \
-    by specifying a parameter of :func:`mallet.create_mallet_model()`).
+    * :func:`save_model()` saves a LDA model as NumPy arrays with a JSON manifest, \
+    which :func:`preprocessing.read_model()` maps into memory (except MALLET models, \
+    which will be saved by specifying a parameter of :func:`mallet.create_mallet_model()`).
+    * :func:`save_sharded_corpus()` writes a tokenized corpus to a few compressed \
+    shards of token IDs, which :func:`preprocessing.read_sharded_corpus()` streams \
+    or reads by document label.
     * :func:`save_tokenized_corpus()` writes tokens of a tokenized corpus to plain text \
-    files per document.
+    files per document, with a pool of threads and optionally spread over subdirectories.
     * :func:`show_document_topics()` shows topic probabilities for each document.
     * :func:`show_topics()` shows topics generated by a LDA model.
     * :func:`show_word_weights()` shows word probabilities for each topic.
 """
-import itertools
-import operator
+import functools
+import gzip
+from itertools import islice
+import json
+from multiprocessing import Pool
 import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+import warnings
+import zlib
 import numpy as np
 import pandas as pd
 import pickle
 import logging
+from scipy import sparse
 
 log = logging.getLogger('dariah_topics')
 
+MODEL_FORMAT = 'dariah_topics.model'
+MODEL_CLASSES = {'dariah_topics.modeling.GibbsLDA', 'dariah_topics.modeling.AliasLDA',
+                 'dariah_topics.modeling.DistributedGibbsLDA', 'dariah_topics.modeling.OnlineLDA',
+                 'lda.lda.LDA', 'gensim.models.ldamodel.LdaModel', 'gensim.models.ldamodel.LdaState',
+                 'gensim.models.ldamulticore.LdaMulticore'}
+CORPUS_FORMAT = 'dariah_topics.tokenized_corpus'
+SHARD_MAGIC = b'DTSHARD1'
+
 
 def doc2bow(document_term_matrix):
     """Creates a `doc2bow` pandas Series for Gensim.
@@ -74,6 +106,460 @@ def doc2bow(document_term_matrix):
     return doc2bow
 
 
+def gensim_document_topics(model, doc2bow, minimum_probability=None, chunksize=2000, n_jobs=None):
+    """Infers the topic proportions of a Gensim corpus into a sparse matrix.
+
+    With this function you can get the document-topic matrix of a Gensim model \
+    for large corpora. The variational E-step runs on chunks of ``chunksize`` \
+    documents instead of one document at a time, with ``n_jobs`` processes \
+    if given, and proportions below ``minimum_probability`` are dropped, so \
+    only the remaining entries are kept in memory.
+
+    Args:
+        model: Gensim LDA model.
+        doc2bow (iterable): A list or stream of lists containing tuples of
+            ``type_id`` and frequency.
+        minimum_probability (float, optional): Proportions below this value are
+            dropped. Defaults to the ``minimum_probability`` of the model.
+        chunksize (int, optional): Documents per E-step. Defaults to 2000.
+        n_jobs (int, optional): Number of processes. Defaults to None, which
+            runs in this process.
+
+    Returns:
+        A SciPy CSR matrix, shape ``(num_documents, num_topics)``.
+
+    Example:
+        >>> from gensim.models import LdaModel
+        >>> from gensim.corpora import Dictionary
+        >>> tokenized_corpus = [['this', 'is', 'the', 'first', 'document'], ['this', 'is', 'the', 'second', 'document']]
+        >>> id2word = Dictionary(tokenized_corpus)
+        >>> corpus = [id2word.doc2bow(document) for document in tokenized_corpus]
+        >>> model = LdaModel(corpus=corpus, id2word=id2word, iterations=1, passes=1, num_topics=2)
+        >>> gensim_document_topics(model, corpus, chunksize=1).shape
+        (2, 2)
+    """
+    if minimum_probability is None:
+        minimum_probability = model.minimum_probability
+    minimum_probability = max(minimum_probability, 1e-8)
+    doc2bow = iter(doc2bow)
+    chunks = iter(lambda: list(islice(doc2bow, chunksize)), [])
+    if n_jobs is None:
+        matrices = [_infer_gensim_chunk(chunk, model, minimum_probability) for chunk in chunks]
+    else:
+        with Pool(n_jobs, initializer=_initialize_gensim_worker, initargs=(model, minimum_probability)) as pool:
+            matrices = list(pool.imap(_infer_gensim_worker_chunk, chunks))
+    if not matrices:
+        return sparse.csr_matrix((0, model.num_topics))
+    return sparse.vstack(matrices, format='csr')
+
+
+_gensim_worker_state = {}
+
+
+def _initialize_gensim_worker(model, minimum_probability):
+    """Keeps the model in a worker process of :func:`gensim_document_topics()`.
+
+    Args:
+        model: Gensim LDA model.
+        minimum_probability (float): Proportions below this value are dropped.
+
+    Returns:
+        None.
+    """
+    _gensim_worker_state.update(model=model, minimum_probability=minimum_probability)
+
+
+def _infer_gensim_worker_chunk(chunk):
+    """Runs :func:`_infer_gensim_chunk()` with the model of a worker process."""
+    return _infer_gensim_chunk(chunk, _gensim_worker_state['model'], _gensim_worker_state['minimum_probability'])
+
+
+def _infer_gensim_chunk(chunk, model, minimum_probability):
+    """Runs the E-step of the model on a chunk of documents.
+
+    This private function is wrapped in :func:`gensim_document_topics()`.
+
+    Args:
+        chunk (list): A list of lists containing tuples of ``type_id`` and
+            frequency.
+        model: Gensim LDA model.
+        minimum_probability (float): Proportions below this value are dropped.
+
+    Returns:
+        A SciPy CSR matrix, shape ``(len(chunk), num_topics)``.
+    """
+    gamma = model.inference(chunk)[0]
+    document_topics = gamma / gamma.sum(axis=1)[:, np.newaxis]
+    document_topics[document_topics < minimum_probability] = 0
+    return sparse.csr_matrix(document_topics)
+
+
+def _online_document_topics(model, doc2bow, minimum_probability=None, chunksize=2000):
+    """Infers the topic proportions of a corpus with an online LDA model.
+
+    This private function is wrapped in :func:`show_document_topics()`. Like \
+    :func:`gensim_document_topics()`, the documents are inferred in chunks and \
+    only proportions of at least ``minimum_probability`` are kept.
+
+    Args:
+        model (dariah_topics.modeling.OnlineLDA): The model.
+        doc2bow (iterable): A list or stream of documents as arrays of type IDs
+            or as lists of tuples of ``type_id`` and frequency.
+        minimum_probability (float, optional): Proportions below this value are
+            dropped. Defaults to None, which keeps all.
+        chunksize (int, optional): Documents per E-step. Defaults to 2000.
+
+    Returns:
+        A SciPy CSR matrix, shape ``(num_documents, num_topics)``.
+    """
+    doc2bow = iter(doc2bow)
+    matrices = []
+    for chunk in iter(lambda: list(islice(doc2bow, chunksize)), []):
+        document_topics = model.transform(chunk)
+        document_topics[document_topics < (minimum_probability or 0)] = 0
+        matrices.append(sparse.csr_matrix(document_topics))
+    if not matrices:
+        return sparse.csr_matrix((0, model.n_topics))
+    return sparse.vstack(matrices, format='csr')
+
+
+def _cached_by_file(parser):
+    """Caches the result of a file parser until the file changes.
+
+    This private decorator is wrapped around the MALLET output readers. The \
+    cache is keyed by the absolute path, the modification time and the size of \
+    the file and further arguments of the parser, so repeated queries parse a \
+    file only once. Returned NumPy arrays are read-only, because they are \
+    shared by all callers.
+
+    Args:
+        parser (callable): A function parsing a file.
+
+    Returns:
+        The caching function.
+    """
+    @functools.lru_cache(maxsize=32)
+    def cached(path, mtime, size, *args):
+        result = parser(path, *args)
+        for value in result:
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        return result
+
+    @functools.wraps(parser)
+    def read(path, *args):
+        stat = os.stat(path)
+        return cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, *args)
+
+    read.cache_clear = cached.cache_clear
+    return read
+
+
+@_cached_by_file
+def read_mallet_doc_topics(doc_topics_file, num_topics=None):
+    """Reads a MALLET doc-topics file.
+
+    With this function you can read the topic proportions per document written \
+    by ``train-topics`` or ``infer-topics`` with ``output_doc_topics``. Both \
+    formats are supported: one proportion per topic (MALLET 2.0.8 and later) \
+    and pairs of topic and proportion after a ``#doc`` header (earlier versions). \
+    The file is parsed once; repeated calls return the cached result until the \
+    file changes.
+
+    In the pairs format, MALLET drops topics below its ``doc_topics_threshold``, \
+    so the file does not tell the number of topics. Pass ``num_topics`` to get \
+    a column for every topic, otherwise the highest topic in the file is the \
+    last column.
+
+    Args:
+        doc_topics_file (str): Path to the doc-topics file.
+        num_topics (int, optional): Number of topics of the model. Defaults to
+            None, which takes the number from the file.
+
+    Returns:
+        A list of document labels (file names without extension) and the
+        document-topic matrix as NumPy array.
+
+    Raises:
+        ValueError: If the file has more topics than ``num_topics``.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile(suffix='.txt') as tmpfile:
+        ...     tmpfile.write(b'#doc name topic proportion\\n0\\tfile:/a.txt\\t1\\t0.8\\t0\\t0.2\\n') and True
+        ...     tmpfile.flush()
+        ...     document_labels, document_topics = read_mallet_doc_topics(tmpfile.name)
+        ...     all_topics = read_mallet_doc_topics(tmpfile.name, 3)[1]
+        True
+        >>> document_labels, document_topics.tolist(), all_topics.tolist()
+        (['a'], [[0.2, 0.8]], [[0.2, 0.8, 0.0]])
+    """
+    document_labels, rows, pairs = [], [], False
+    with open(doc_topics_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('#'):
+                pairs = True
+                continue
+            fields = line.split()
+            if fields:
+                document_labels.append(os.path.splitext(os.path.basename(fields[1]))[0])
+                rows.append(fields[2:])
+    if not rows:
+        return document_labels, np.zeros((0, num_topics or 0))
+    if not pairs:
+        document_topics = np.array(rows, dtype=float)
+        if num_topics is not None and document_topics.shape[1] != num_topics:
+            raise ValueError("{} has {} topics, not {}.".format(doc_topics_file, document_topics.shape[1], num_topics))
+        return document_labels, document_topics
+    lengths = np.array([len(row) // 2 for row in rows])
+    values = np.array([value for row in rows for value in row[:2 * (len(row) // 2)]], dtype=float)
+    topics = values[::2].astype(int)
+    if num_topics is None:
+        num_topics = topics.max() + 1 if len(topics) else 0
+    elif len(topics) and topics.max() >= num_topics:
+        raise ValueError("{} has topic {}, but only {} topics.".format(doc_topics_file, topics.max(), num_topics))
+    document_topics = np.zeros((len(rows), num_topics))
+    document_topics[np.repeat(np.arange(len(rows)), lengths), topics] = values[1::2]
+    return document_labels, document_topics
+
+
+@_cached_by_file
+def read_mallet_topic_keys(topic_keys_file):
+    """Reads a MALLET topic keys file.
+
+    Args:
+        topic_keys_file (str): Path to the topic keys file, written by
+            ``train-topics`` with ``output_topic_keys``.
+
+    Returns:
+        The Dirichlet parameters of the topics as NumPy array and a list of the
+        keys of each topic.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile(suffix='.txt') as tmpfile:
+        ...     tmpfile.write(b'0\\t0.5\\tthis is\\n1\\t0.25\\tsecond topic\\n') and True
+        ...     tmpfile.flush()
+        ...     alphas, keys = read_mallet_topic_keys(tmpfile.name)
+        True
+        >>> alphas.tolist(), keys
+        ([0.5, 0.25], [['this', 'is'], ['second', 'topic']])
+    """
+    alphas, keys = [], []
+    with open(topic_keys_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                _, alpha, topic_keys = line.rstrip('\n').split('\t')
+                alphas.append(float(alpha))
+                keys.append(topic_keys.split())
+    return np.array(alphas), keys
+
+
+@_cached_by_file
+def read_mallet_topic_word_weights(topic_word_weights_file):
+    """Reads a MALLET topic-word weights file.
+
+    With this function you can read the unnormalized weights for every topic \
+    and type, written by ``train-topics`` with ``topic_word_weights_file``, \
+    into one matrix. The row of a topic is its index.
+
+    Args:
+        topic_word_weights_file (str): Path to the topic-word weights file.
+
+    Returns:
+        The vocabulary as NumPy array and the topic-type weights as NumPy array,
+        shape ``(num_topics, num_types)``.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile(suffix='.txt') as tmpfile:
+        ...     tmpfile.write(b'0\\tthis\\t0.5\\n0\\tis\\t0.4\\n1\\tthis\\t0.1\\n1\\tis\\t0.6\\n') and True
+        ...     tmpfile.flush()
+        ...     vocabulary, weights = read_mallet_topic_word_weights(tmpfile.name)
+        True
+        >>> vocabulary.tolist(), weights.tolist()
+        (['this', 'is'], [[0.5, 0.4], [0.1, 0.6]])
+    """
+    table = pd.read_csv(topic_word_weights_file, sep='\t', header=None, names=['topic', 'key', 'weight'],
+                        dtype={'topic': np.int64, 'key': str, 'weight': np.float64}, quoting=3,
+                        keep_default_na=False, na_filter=False)
+    type_ids, vocabulary = pd.factorize(table['key'])
+    topics = table['topic'].values
+    weights = np.zeros((topics.max() + 1 if len(topics) else 0, len(vocabulary)))
+    weights[topics, type_ids] = table['weight'].values
+    return np.asarray(vocabulary, dtype=object), weights
+
+
+@_cached_by_file
+def read_mallet_word_topic_counts(word_topic_counts_file):
+    """Reads a MALLET word-topic counts file.
+
+    With this function you can read the sparse topic assignments per type, \
+    written by ``train-topics`` with ``word_topic_counts_file``. Each line \
+    holds a type ID, the type and ``topic:count`` pairs.
+
+    Args:
+        word_topic_counts_file (str): Path to the word-topic counts file.
+
+    Returns:
+        The vocabulary as NumPy array and the topic-type counts as SciPy CSR
+        matrix, shape ``(num_topics, num_types)``.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile(suffix='.txt') as tmpfile:
+        ...     tmpfile.write(b'0 this 1:3 0:1\\n1 is 0:2\\n') and True
+        ...     tmpfile.flush()
+        ...     vocabulary, counts = read_mallet_word_topic_counts(tmpfile.name)
+        True
+        >>> vocabulary.tolist(), counts.toarray().tolist()
+        (['this', 'is'], [[1, 2], [3, 0]])
+    """
+    vocabulary, type_ids, pairs = [], [], []
+    with open(word_topic_counts_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            vocabulary.append(fields[1])
+            type_ids.extend([len(vocabulary) - 1] * (len(fields) - 2))
+            pairs.extend(fields[2:])
+    topics, counts = (np.array([pair.split(':') for pair in pairs], dtype=np.int64).reshape(-1, 2).T
+                      if pairs else (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)))
+    num_topics = topics.max() + 1 if len(topics) else 0
+    matrix = sparse.csr_matrix((counts, (topics, np.array(type_ids, dtype=np.int64))),
+                               shape=(num_topics, len(vocabulary)))
+    return np.array(vocabulary, dtype=object), matrix
+
+
+def read_mallet_state(state_file, chunksize=1000000):
+    """Reads the counts of a MALLET Gibbs sampling state.
+
+    With this function you can get the exact document-topic and topic-type \
+    counts of a MALLET model from the file written by ``train-topics`` with \
+    ``output_state``. The file is decompressed and parsed in chunks of \
+    ``chunksize`` tokens with :func:`stream_mallet_state()`, and each chunk is \
+    added to sparse count matrices, so the memory does not grow with the \
+    number of tokens.
+
+    Args:
+        state_file (str): Path to the gzipped state file.
+        chunksize (int, optional): Number of tokens per chunk. Defaults to 1000000.
+
+    Returns:
+        A dictionary with the Dirichlet parameters ``alpha`` (NumPy array) and
+        ``beta`` (float), the ``vocabulary`` as NumPy array ordered by MALLET's
+        type index, the ``document_topics`` as SciPy CSR matrix, shape
+        ``(num_documents, num_topics)``, and the ``topic_types`` as SciPy CSR
+        matrix, shape ``(num_topics, num_types)``.
+
+    Example:
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     state_file = os.path.join(tmpdir, 'state.gz')
+        ...     with gzip.open(state_file, 'wt', encoding='utf-8') as file:
+        ...         _ = file.write('#doc source pos typeindex type topic\\n#alpha : 0.5 0.5 \\n#beta : 0.01 \\n'
+        ...                        '0 NA 0 0 this 1\\n0 NA 1 1 is 0\\n1 NA 0 0 this 1\\n')
+        ...     state = read_mallet_state(state_file, chunksize=2)
+        >>> state['vocabulary'].tolist(), state['topic_types'].toarray().tolist()
+        (['this', 'is'], [[0, 1], [2, 0]])
+        >>> state['document_topics'].toarray().tolist()
+        [[1, 1], [0, 1]]
+    """
+    alpha, beta = _read_mallet_state_header(state_file)
+    num_topics = len(alpha)
+    document_topics = sparse.csr_matrix((0, num_topics), dtype=np.int64)
+    topic_types = sparse.csr_matrix((num_topics, 0), dtype=np.int64)
+    vocabulary = {}
+    for chunk in stream_mallet_state(state_file, chunksize):
+        document_ids = chunk['document_id'].values
+        type_ids = chunk['type_id'].values
+        topics = chunk['topic'].values
+        num_documents = max(document_topics.shape[0], document_ids.max() + 1)
+        num_types = max(topic_types.shape[1], type_ids.max() + 1)
+        ones = np.ones(len(chunk), dtype=np.int64)
+        document_topics = _resize(document_topics, (num_documents, num_topics)) + sparse.csr_matrix(
+            (ones, (document_ids, topics)), shape=(num_documents, num_topics))
+        topic_types = _resize(topic_types, (num_topics, num_types)) + sparse.csr_matrix(
+            (ones, (topics, type_ids)), shape=(num_topics, num_types))
+        new_types = chunk.drop_duplicates('type_id')
+        vocabulary.update(zip(new_types['type_id'].values, new_types['type'].values))
+    vocabulary = np.array([vocabulary.get(type_id, '') for type_id in range(topic_types.shape[1])], dtype=object)
+    return {'alpha': alpha, 'beta': beta, 'vocabulary': vocabulary, 'document_topics': document_topics,
+            'topic_types': topic_types}
+
+
+def stream_mallet_state(state_file, chunksize=1000000):
+    """Streams the topic assignments of a MALLET Gibbs sampling state.
+
+    With this function you can iterate over the tokens of the file written by \
+    ``train-topics`` with ``output_state`` without decompressing it at once.
+
+    Args:
+        state_file (str): Path to the gzipped state file.
+        chunksize (int, optional): Number of tokens per chunk. Defaults to 1000000.
+
+    Yields:
+        pandas DataFrames with the columns ``document_id``, ``position``,
+        ``type_id``, ``type`` and ``topic``.
+    """
+    num_header_lines = 0
+    with gzip.open(state_file, 'rt', encoding='utf-8') as file:
+        for line in file:
+            if not line.startswith('#'):
+                break
+            num_header_lines += 1
+    chunks = pd.read_csv(state_file, sep=' ', header=None, skiprows=num_header_lines, usecols=[0, 2, 3, 4, 5],
+                         names=['document_id', 'source', 'position', 'type_id', 'type', 'topic'],
+                         dtype={'document_id': np.int64, 'position': np.int64, 'type_id': np.int64,
+                                'type': str, 'topic': np.int64},
+                         compression='gzip', quoting=3, keep_default_na=False, na_filter=False,
+                         chunksize=chunksize, encoding='utf-8')
+    for chunk in chunks:
+        yield chunk
+
+
+def _read_mallet_state_header(state_file):
+    """Reads the Dirichlet parameters from a MALLET Gibbs sampling state.
+
+    This private function is wrapped in :func:`read_mallet_state()`.
+
+    Args:
+        state_file (str): Path to the gzipped state file.
+
+    Returns:
+        ``alpha`` as NumPy array and ``beta`` as float.
+    """
+    alpha, beta = np.zeros(0), None
+    with gzip.open(state_file, 'rt', encoding='utf-8') as file:
+        for line in file:
+            if not line.startswith('#'):
+                break
+            if line.startswith('#alpha'):
+                alpha = np.array(line.split(':', 1)[1].split(), dtype=float)
+            elif line.startswith('#beta'):
+                beta = float(line.split(':', 1)[1])
+    return alpha, beta
+
+
+def _resize(matrix, shape):
+    """Enlarges a sparse matrix with empty rows and columns.
+
+    This private function is wrapped in :func:`read_mallet_state()`.
+
+    Args:
+        matrix (scipy.sparse.csr_matrix): The matrix.
+        shape (tuple): The new shape.
+
+    Returns:
+        A SciPy CSR matrix.
+    """
+    if matrix.shape == shape:
+        return matrix
+    coo = matrix.tocoo()
+    return sparse.csr_matrix((coo.data, (coo.row, coo.col)), shape=shape)
+
+
 def save_document_term_matrix(document_term_matrix, path, document_ids=None, type_ids=None, matrix_market=False):
     """Saves document-term matrix.
     
@@ -148,34 +634,312 @@ def save_document_term_matrix(document_term_matrix, path, document_ids=None, typ
 def save_model(model, filepath):
     """Saves a LDA model.
 
-    With this function you can save a LDA model using :module:`pickle`. If you want \
-    to save MALLET models, you have to specify a parameter of the function :func:`mallet.create_mallet_model()`.
+    With this function you can save a LDA model as a directory with one NumPy \
+    ``.npy`` file per array, e.g. the topic-type and document-topic \
+    distributions, and a ``manifest.json`` describing the attributes of the \
+    model. Reading it with :func:`preprocessing.read_model()` maps the arrays \
+    into memory instead of copying them, so even large models open at once and \
+    processes reading the same model share its pages. Nothing is pickled, only \
+    the classes in :data:`MODEL_CLASSES` are saved: `lda <https://pypi.python.org/pypi/lda>`_ \
+    and `Gensim <https://radimrehurek.com/gensim/>`_ models and the models of \
+    :mod:`dariah_topics.modeling`. If ``filepath`` ends with ``.pickle``, the \
+    model is pickled like before, which is deprecated and emits a \
+    :class:`DeprecationWarning`. Reading such a file back with \
+    :func:`preprocessing.read_model()` needs ``allow_pickle=True``. If you want \
+    to save MALLET models, you have to specify a parameter of the function \
+    :func:`mallet.create_mallet_model()`.
 
     Args:
-        model: Fitted LDA model produced by `Gensim <https://radimrehurek.com/gensim/>`_
-            or `lda <https://pypi.python.org/pypi/lda>`_.
-        filepath (str): Path to LDA model, e.g. ``/home/models/model.pickle``.
+        model: Fitted LDA model produced by `Gensim <https://radimrehurek.com/gensim/>`_,
+            `lda <https://pypi.python.org/pypi/lda>`_ or :mod:`dariah_topics.modeling`.
+        filepath (str): Path to the model directory, e.g. ``/home/models/model``,
+            or to a pickle file, e.g. ``/home/models/model.pickle``.
 
     Returns:
         None.
 
+    Raises:
+        ValueError, if the model or one of its attributes cannot be saved
+        without pickle.
+
     Example:
         >>> from lda import LDA
         >>> from gensim.models import LdaModel
         >>> from dariah_topics import preprocessing
         >>> save_model(LDA, 'model.pickle')
-        >>> preprocessing.read_model('model.pickle') == LDA
+        >>> preprocessing.read_model('model.pickle', allow_pickle=True) == LDA
         True
         >>> save_model(LdaModel, 'model.pickle')
-        >>> preprocessing.read_model('model.pickle') == LdaModel
+        >>> preprocessing.read_model('model.pickle', allow_pickle=True) == LdaModel
         True
+        >>> from dariah_topics.modeling import GibbsLDA
+        >>> import tempfile
+        >>> model = GibbsLDA(n_topics=2, n_iter=5, random_state=0).fit(np.array([[3, 1, 0], [0, 1, 4]]))
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     save_model(model, os.path.join(tmpdir, 'model'))
+        ...     loaded = preprocessing.read_model(os.path.join(tmpdir, 'model'))
+        ...     isinstance(loaded.topic_word_, np.memmap), np.array_equal(loaded.topic_word_, model.topic_word_)
+        (True, True)
+    """
+    if os.path.splitext(filepath)[1] in {'.pickle', '.pkl'}:
+        warnings.warn("Saving pickled models is deprecated, save the model to a directory instead.",
+                      DeprecationWarning, stacklevel=2)
+        with open(filepath, 'wb') as file:
+            pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+        return None
+    filepath = os.path.abspath(filepath)
+    tmpdir = '{}.tmp-{}'.format(filepath, os.getpid())
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    os.makedirs(tmpdir)
+    try:
+        manifest = {'format': MODEL_FORMAT, 'version': 1, 'model': _encode_model(model, 'model', tmpdir)}
+        with open(os.path.join(tmpdir, 'manifest.json'), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1)
+        log.info("Saving model to {} ...".format(filepath))
+        if os.path.exists(filepath):
+            old = '{}.old-{}'.format(filepath, os.getpid())
+            os.replace(filepath, old)
+            os.replace(tmpdir, filepath)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmpdir, filepath)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return None
+
+
+def _encode_model(value, name, directory):
+    """Converts a model to JSON, writing its arrays to ``.npy`` files.
+
+    This private function is wrapped in :func:`save_model()`. Every value \
+    becomes a JSON value or a dictionary with one of the keys ``array``, \
+    ``scalar``, ``dtype``, ``random_state``, ``list``, ``tuple``, ``dict``, \
+    ``dictionary`` (a Gensim dictionary) or ``object`` (an instance of one of \
+    :data:`MODEL_CLASSES` with its attributes), which \
+    :func:`preprocessing.read_model()` converts back.
+
+    Args:
+        value: The model or one of its attributes.
+        name (str): Dotted name of ``value``, used for file names.
+        directory (str): Output directory.
+
+    Returns:
+        A JSON-serializable value.
+
+    Example:
+        >>> _encode_model({'n_topics': 10, 'alpha': np.float64(0.1), 'sizes': (1, 2)}, 'model', 'tmp')
+        {'dict': {'n_topics': 10, 'alpha': {'scalar': 0.1, 'dtype': '<f8'}, 'sizes': {'tuple': [1, 2]}}}
+    """
+    if isinstance(value, np.generic):
+        return {'scalar': value.item(), 'dtype': value.dtype.str}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ValueError("Cannot save {}, because it is an array of Python objects.".format(name))
+        filename = '{}.npy'.format(re.sub(r'[^\w.-]', '_', name))
+        np.save(os.path.join(directory, filename), value, allow_pickle=False)
+        return {'array': filename, 'shape': list(value.shape)}
+    if isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+        return {'dtype': np.dtype(value).str}
+    if isinstance(value, np.random.RandomState):
+        _, keys, position, has_gauss, cached_gaussian = value.get_state()
+        return {'random_state': _encode_model(keys, name, directory), 'position': int(position),
+                'has_gauss': int(has_gauss), 'cached_gaussian': float(cached_gaussian)}
+    if isinstance(value, (list, tuple)):
+        items = [_encode_model(item, '{}.{}'.format(name, n), directory) for n, item in enumerate(value)]
+        return {'tuple' if isinstance(value, tuple) else 'list': items}
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {'dict': {key: _encode_model(item, '{}.{}'.format(name, key), directory)
+                         for key, item in value.items()}}
+    class_name = '{}.{}'.format(type(value).__module__, type(value).__qualname__)
+    if class_name == 'gensim.corpora.dictionary.Dictionary':
+        ids = np.array(list(value.token2id.values()), dtype=np.int64)
+        arrays = {'tokens': np.array(list(value.token2id.keys()), dtype=str), 'ids': ids,
+                  'dfs': np.array([value.dfs.get(i, 0) for i in ids.tolist()], dtype=np.int64),
+                  'cfs': np.array([value.cfs.get(i, 0) for i in ids.tolist()], dtype=np.int64)}
+        encoded = {key: _encode_model(array, '{}.{}'.format(name, key), directory) for key, array in arrays.items()}
+        encoded.update(num_docs=value.num_docs, num_pos=value.num_pos, num_nnz=value.num_nnz)
+        return {'dictionary': encoded}
+    if class_name in MODEL_CLASSES:
+        return {'object': class_name,
+                'attributes': {attribute: _encode_model(item, '{}.{}'.format(name, attribute), directory)
+                               for attribute, item in vars(value).items()}}
+    raise ValueError("Cannot save {} of type {} without pickle.".format(name, class_name))
+
+
+def save_sharded_corpus(tokenized_corpus, document_labels, path, documents_per_shard=100000, block_size=65536,
+                        compression='zlib', level=None):
+    """Writes a tokenized corpus to compressed shards.
+
+    With this function you can store a large tokenized corpus, e.g. millions \
+    of segments, in a few files instead of one text file per document. Tokens \
+    are replaced by type IDs, and the IDs of consecutive documents are \
+    compressed in blocks of about ``block_size`` tokens. Every shard ends with \
+    an index of its document labels, lengths and blocks, so a single document \
+    is read by decompressing one block. The directory ``path`` contains
+        * ``manifest.json`` with the format, the compression and the shards,
+        * ``vocabulary.txt`` with one type per line, in the order of the IDs,
+        * ``shard-00000.bin``, ``shard-00001.bin`` and so on.
+    Use :func:`preprocessing.read_sharded_corpus()` to read it. The corpus is \
+    consumed as a stream and only one block is kept in memory.
+
+    Args:
+        tokenized_corpus (iterable): Tokenized corpus containing one or more
+            iterables containing tokens.
+        document_labels (iterable): Name of each `tokenized_document` in
+            `tokenized_corpus`.
+        path (str): Path to the output directory.
+        documents_per_shard (int, optional): Maximum number of documents of a
+            shard. Defaults to 100000.
+        block_size (int, optional): Number of tokens after which a block is
+            compressed. Defaults to 65536.
+        compression (str, optional): ``zlib``, which is DEFLATE like gzip, or
+            ``zstd``, which needs the package `zstandard <https://pypi.org/project/zstandard/>`_.
+            Defaults to ``zlib``.
+        level (int, optional): Compression level. Defaults to 1 for ``zlib``,
+            which is several times faster than its default and hardly larger,
+            and to 3 for ``zstd``.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError, if ``compression`` is not supported or a token contains
+        a line break.
+
+    Example:
+        >>> from dariah_topics.preprocessing import read_sharded_corpus
+        >>> import tempfile
+        >>> tokenized_corpus = [['this', 'is', 'document', 'one'], ['this', 'is', 'document', 'two']]
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     save_sharded_corpus(tokenized_corpus, ['one', 'two'], tmpdir, documents_per_shard=1)
+        ...     corpus = read_sharded_corpus(tmpdir)
+        ...     corpus['two'], list(corpus) == tokenized_corpus
+        (['this', 'is', 'document', 'two'], True)
     """
-    with open(filepath, 'wb') as file:
-        pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+    compress = _compressor(compression, level)
+    path = os.path.abspath(path)
+    tmpdir = '{}.tmp-{}'.format(path, os.getpid())
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    os.makedirs(tmpdir)
+    log.info("Saving sharded corpus to {} ...".format(path))
+    try:
+        type2id = _TypeIds()
+        shards, shard, num_documents, num_tokens = [], None, 0, 0
+        for tokenized_document, document_label in zip(tokenized_corpus, document_labels):
+            if shard is None or len(shard.labels) >= documents_per_shard:
+                if shard is not None:
+                    shard.close()
+                shard = _ShardWriter(os.path.join(tmpdir, 'shard-{:05d}.bin'.format(len(shards))), compress, block_size)
+                shards.append(os.path.basename(shard.filepath))
+            type_ids = list(map(type2id.__getitem__, tokenized_document))
+            shard.add(str(document_label), type_ids)
+            num_documents += 1
+            num_tokens += len(type_ids)
+        if shard is not None:
+            shard.close()
+        for token in type2id:
+            if '\n' in token:
+                raise ValueError("The token {!r} contains a line break.".format(token))
+        with open(os.path.join(tmpdir, 'vocabulary.txt'), 'w', encoding='utf-8') as file:
+            file.write('\n'.join(type2id))
+        manifest = {'format': CORPUS_FORMAT, 'version': 1, 'compression': compression, 'shards': shards,
+                    'num_documents': num_documents, 'num_tokens': num_tokens, 'num_types': len(type2id)}
+        with open(os.path.join(tmpdir, 'manifest.json'), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1)
+        if os.path.exists(path):
+            old = '{}.old-{}'.format(path, os.getpid())
+            os.replace(path, old)
+            os.replace(tmpdir, path)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmpdir, path)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
     return None
 
 
-def save_tokenized_corpus(tokenized_corpus, document_labels, path):
+class _TypeIds(dict):
+    """Assigns the next ID to unseen types.
+
+    This private class is wrapped in :func:`save_sharded_corpus()`.
+    """
+    def __missing__(self, token):
+        self[token] = type_id = len(self)
+        return type_id
+
+
+class _ShardWriter:
+    """Writes the blocks and the index of one shard.
+
+    This private class is wrapped in :func:`save_sharded_corpus()`. A shard \
+    starts with :data:`SHARD_MAGIC`, followed by the compressed blocks of \
+    little-endian uint32 type IDs and the compressed JSON index with \
+    ``labels``, ``lengths`` and ``blocks`` (byte offset, byte size, first \
+    document and number of documents of each block). It ends with the offset \
+    and size of the index as two little-endian uint64 and the magic again.
+    """
+    def __init__(self, filepath, compress, block_size):
+        self.filepath = filepath
+        self.compress = compress
+        self.block_size = block_size
+        self.labels, self.lengths, self.blocks = [], [], []
+        self._pending, self._pending_documents = [], 0
+        self._file = open(filepath, 'wb')
+        self._file.write(SHARD_MAGIC)
+
+    def add(self, label, type_ids):
+        self.labels.append(label)
+        self.lengths.append(len(type_ids))
+        self._pending.extend(type_ids)
+        self._pending_documents += 1
+        if len(self._pending) >= self.block_size:
+            self._flush()
+
+    def close(self):
+        if self._pending_documents:
+            self._flush()
+        index = self.compress(json.dumps({'labels': self.labels, 'lengths': self.lengths,
+                                          'blocks': self.blocks}).encode('utf-8'))
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(struct.pack('<QQ', offset, len(index)) + SHARD_MAGIC)
+        self._file.close()
+
+    def _flush(self):
+        data = self.compress(np.asarray(self._pending, dtype='<u4').tobytes())
+        first_document = len(self.labels) - self._pending_documents
+        self.blocks.append([self._file.tell(), len(data), first_document, self._pending_documents])
+        self._file.write(data)
+        self._pending, self._pending_documents = [], 0
+
+
+def _compressor(compression, level=None):
+    """Returns a function compressing bytes.
+
+    This private function is wrapped in :func:`save_sharded_corpus()`.
+
+    Args:
+        compression (str): ``zlib`` or ``zstd``.
+        level (int, optional): Compression level.
+
+    Returns:
+        A function of bytes returning bytes.
+
+    Example:
+        >>> zlib.decompress(_compressor('zlib')(b'abc'))
+        b'abc'
+    """
+    if compression == 'zlib':
+        return functools.partial(zlib.compress, level=1 if level is None else level)
+    elif compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress
+    raise ValueError("The compression {} is not supported.".format(compression))
+
+
+def save_tokenized_corpus(tokenized_corpus, document_labels, path, n_jobs=None, fan_out=None, queue_size=1024):
     """Writes a tokenized corpus to text files.
 
     With this function you can write tokens of a `tokenized_corpus` to plain text \
@@ -184,12 +948,25 @@ def save_tokenized_corpus(tokenized_corpus, document_labels, path):
     any punctuations or one-letter words.
     Use the function :func:`preprocessing.tokenize()` to tokenize a corpus.
 
+    The documents are encoded while ``tokenized_corpus`` is consumed and put \
+    into a queue of at most ``queue_size`` documents, from which ``n_jobs`` \
+    threads write the files, so slow file systems like NFS are kept busy. \
+    With ``fan_out``, the files are spread over that many subdirectories, \
+    chosen by a hash of the document label, instead of one huge directory. \
+    MALLET's ``import-dir`` reads subdirectories, too. The throughput is logged.
+
     Args:
         tokenized_corpus (list): Tokenized corpus containing one or more
             iterables containing tokens.
         document_labels (list): Name of each `tokenized_document` in `tokenized_corpus`.
         path (str): Path to the output directory.
-    
+        n_jobs (int, optional): Number of writing threads. Defaults to None,
+            which is the number of CPUs plus 4, at most 32.
+        fan_out (int, optional): Number of subdirectories. Defaults to None,
+            which writes all files to ``path``.
+        queue_size (int, optional): Maximum number of documents waiting to be
+            written. Defaults to 1024.
+
     Returns:
         None
 
@@ -206,52 +983,163 @@ def save_tokenized_corpus(tokenized_corpus, document_labels, path):
     if not os.path.exists(path):
         log.info("Creating directory {} ...".format(path))
         os.makedirs(path)
-
-    for tokenized_document, document_label in zip(tokenized_corpus, document_labels):
-        log.debug("Current file: {}".format(document_label))
-        with open(os.path.join(path, '{}.txt'.format(document_label)), 'w', encoding='utf-8') as file:
-            file.write('\n'.join(tokenized_document))
+    if n_jobs is None:
+        n_jobs = min(32, (os.cpu_count() or 1) + 4)
+    documents = queue.Queue(queue_size)
+    written = [0] * n_jobs
+    errors = []
+
+    def write(worker):
+        while True:
+            item = documents.get()
+            if item is None:
+                return
+            filepath, data = item
+            if errors:
+                continue
+            try:
+                with open(filepath, 'wb') as file:
+                    file.write(data)
+                written[worker] += len(data)
+            except BaseException as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(worker,), daemon=True) for worker in range(n_jobs)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    directories = {path}
+    num_documents = 0
+    try:
+        for tokenized_document, document_label in zip(tokenized_corpus, document_labels):
+            if errors:
+                break
+            directory = path
+            if fan_out:
+                directory = os.path.join(path, _fan_out_directory(document_label, fan_out))
+                if directory not in directories:
+                    os.makedirs(directory, exist_ok=True)
+                    directories.add(directory)
+            log.debug("Current file: {}".format(document_label))
+            documents.put((os.path.join(directory, '{}.txt'.format(document_label)),
+                           '\n'.join(tokenized_document).encode('utf-8')))
+            num_documents += 1
+    finally:
+        for _ in threads:
+            documents.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    seconds = max(time.perf_counter() - start, 1e-9)
+    log.info("Saved {} documents ({:.1f} MB) in {:.1f} seconds: {:.0f} documents/s, {:.1f} MB/s.".format(
+        num_documents, sum(written) / 1024 ** 2, seconds, num_documents / seconds, sum(written) / 1024 ** 2 / seconds))
     return None
 
 
-def show_document_topics(topics, model=None, document_labels=None, doc_topics_file=None, doc2bow=None, num_keys=3, easy_file_format=True, dec=4):
+def _fan_out_directory(document_label, fan_out):
+    """Names the subdirectory of a document.
+
+    This private function is wrapped in :func:`save_tokenized_corpus()`. The \
+    CRC-32 of the label is the same in every run and on every machine.
+
+    Args:
+        document_label (str): The label of the document.
+        fan_out (int): Number of subdirectories.
+
+    Returns:
+        The name of the subdirectory, a hexadecimal number.
+
+    Example:
+        >>> _fan_out_directory('document_label', 256)
+        '9a'
+    """
+    width = len('{:x}'.format(max(fan_out - 1, 1)))
+    return '{:0{}x}'.format(zlib.crc32(str(document_label).encode('utf-8')) % fan_out, width)
+
+
+def show_document_topics(topics, model=None, document_labels=None, doc_topics_file=None, doc2bow=None, num_keys=3, easy_file_format=True, dec=4,
+                         output='dataframe', minimum_probability=None, chunksize=2000, n_jobs=None):
     """Shows topic distribution for each document.
     
     With this function you can show the topic distributions for all documents in a pandas DataFrame. \
     For each topic, the top ``num_keys`` keys will be considered. If you have a
-    * `lda <https://pypi.python.org/pypi/lda>`_ model, you have to pass the model \
-    as ``model`` and the document-term matrix vocabulary as ``vocabulary``.
-    * `Gensim <https://radimrehurek.com/gensim/>`_ model, you have to pass only the model \
-    as ``model``.
+    * `lda <https://pypi.python.org/pypi/lda>`_ or :class:`dariah_topics.modeling.GibbsLDA` \
+    model, you have to pass the model as ``model`` and the document-term matrix \
+    vocabulary as ``vocabulary``.
+    * `Gensim <https://radimrehurek.com/gensim/>`_ model or \
+    :class:`dariah_topics.modeling.OnlineLDA` model, you have to pass the model \
+    as ``model`` and the documents as ``doc2bow``.
     * `MALLET <http://mallet.cs.umass.edu/topics.php>`_ based workflow, you have to\
     pass only the ``doc_topics_file``.
     
     Args:
         topics (pandas.DataFrame, optional): Only for lda models. A pandas DataFrame
             containing all topics.
-        model (optional): lda or Gensim model.
+        model (optional): lda, Gensim or :mod:`dariah_topics.modeling` model.
         document_labels (list, optional): An list of all document labels.
         doc_topics_file (str, optional): Only for MALLET. Path to the doc-topics file.
-        doc2bow (list, optional): A list of lists containing tuples of ``type_id`` and
-            frequency.
+        doc2bow (list, optional): Only for Gensim and OnlineLDA. A list of lists
+            containing tuples of ``type_id`` and frequency.
         num_keys (int, optional): Number of top keys for each topic.
+        easy_file_format (bool, optional): Ignored, the format of the doc-topics
+            file is detected.
         dec (int, optional): Number of decimal places in the document-topics-value
+        output (str, optional): ``dataframe`` or ``sparse``. Defaults to ``dataframe``.
+        minimum_probability (float, optional): Only for ``sparse`` output or Gensim.
+            Proportions below this value are dropped. Defaults to 0, or to the
+            ``minimum_probability`` of a Gensim model.
+        chunksize (int, optional): Only for Gensim and OnlineLDA. Documents per E-step, see
+            :func:`gensim_document_topics()`. Defaults to 2000.
+        n_jobs (int, optional): Only for Gensim. Number of processes. Defaults
+            to None.
     
     Returns:
         A pandas DataFrame with rows corresponding to topics and columns corresponding
-            to keys.
+            to keys, or with ``output='sparse'`` a SciPy CSR matrix with rows
+            corresponding to documents and columns corresponding to topics.
+
+    Raises:
+        ValueError: If the model is not supported, or neither a model nor a
+            doc-topics file is given.
 
     Example:
     """
     from lda.lda import LDA
     from gensim.models import LdaModel, LdaMulticore
-  
+    from dariah_topics.modeling import GibbsLDA, OnlineLDA
+
+    if output not in {'dataframe', 'sparse'}:
+        raise ValueError("output has to be 'dataframe' or 'sparse', not {!r}.".format(output))
+    if model is None and doc_topics_file is None:
+        raise ValueError("Pass either a model or the doc_topics_file of MALLET.")
+    if model is not None and not isinstance(model, (LDA, GibbsLDA, OnlineLDA, LdaModel, LdaMulticore)):
+        raise ValueError("Document topics of {} models are not supported. Use an lda, Gensim or "
+                         "dariah_topics.modeling model.".format(type(model).__name__))
+    if isinstance(model, (OnlineLDA, LdaModel, LdaMulticore)) and doc2bow is None:
+        raise ValueError("{} models infer the document topics, pass the documents as doc2bow.".format(type(model).__name__))
+    if output == 'sparse':
+        if isinstance(model, (LdaModel, LdaMulticore)):
+            return gensim_document_topics(model, doc2bow, minimum_probability, chunksize, n_jobs)
+        if isinstance(model, OnlineLDA):
+            return _online_document_topics(model, doc2bow, minimum_probability, chunksize)
+        if isinstance(model, (LDA, GibbsLDA)):
+            document_topics = model.doc_topic_.copy()
+        else:
+            num_topics = len(topics) if topics is not None else None
+            document_topics = read_mallet_doc_topics(doc_topics_file, num_topics)[1].copy()
+        document_topics[document_topics < (minimum_probability or 0)] = 0
+        return sparse.csr_matrix(document_topics)
     index = [' '.join(keys[:num_keys]) for keys in topics.values]
-    if isinstance(model, LDA):
+    if isinstance(model, (LDA, GibbsLDA)):
         return _show_lda_document_topics(model, document_labels, index).round(dec)
+    elif isinstance(model, OnlineLDA):
+        document_topics = _online_document_topics(model, doc2bow, minimum_probability, chunksize)
+        return pd.DataFrame(document_topics.T.toarray(), index=index, columns=document_labels).round(dec)
     elif isinstance(model, LdaModel) or isinstance(model, LdaMulticore):
-        return _show_gensim_document_topics(doc2bow, model, document_labels, index).round(dec)
-    elif doc_topics_file is not None:
+        return _show_gensim_document_topics(doc2bow, model, document_labels, index, minimum_probability,
+                                            chunksize, n_jobs).round(dec)
+    else:
         return _show_mallet_document_topics(doc_topics_file, index, easy_file_format).round(dec)
 
 
@@ -260,15 +1148,17 @@ def show_topics(model=None, vocabulary=None, topic_keys_file=None, num_keys=10):
     
     With this function you can show all topics of a LDA model in a pandas DataFrame. \
     For each topic, the top ``num_keys`` keys will be considered. If you have a
-    * `lda <https://pypi.python.org/pypi/lda>`_ model, you have to pass the model \
-    as ``model`` and the document-term matrix vocabulary as ``vocabulary``.
-    * `Gensim <https://radimrehurek.com/gensim/>`_ model, you have to pass only the model \
-    as ``model``.
+    * `lda <https://pypi.python.org/pypi/lda>`_ or :class:`dariah_topics.modeling.GibbsLDA` \
+    model, you have to pass the model as ``model`` and the document-term matrix \
+    vocabulary as ``vocabulary``.
+    * `Gensim <https://radimrehurek.com/gensim/>`_ model or \
+    :class:`dariah_topics.modeling.OnlineLDA` model, you have to pass the model \
+    as ``model`` and the documents as ``doc2bow``.
     * `MALLET <http://mallet.cs.umass.edu/topics.php>`_ based workflow, you have to\
     pass only the ``topic_keys_file``.
     
     Args:
-        model (optional): lda or Gensim model.
+        model (optional): lda, Gensim or :mod:`dariah_topics.modeling` model.
         vocabulary (list, optional): Only for lda. The vocabulary of the 
             document-term matrix.
         topic_keys_file (str): Only for MALLET. Path to the topic keys file.
@@ -282,8 +1172,9 @@ def show_topics(model=None, vocabulary=None, topic_keys_file=None, num_keys=10):
     """
     from lda.lda import LDA
     from gensim.models import LdaModel, LdaMulticore
+    from dariah_topics.modeling import GibbsLDA, OnlineLDA
     
-    if isinstance(model, LDA):
+    if isinstance(model, (LDA, GibbsLDA, OnlineLDA)):
         return _show_lda_topics(model, vocabulary, num_keys)
     elif isinstance(model, LdaModel) or isinstance(model, LdaMulticore):
         return _show_gensim_topics(model, num_keys)
@@ -321,24 +1212,8 @@ def show_word_weights(word_weights_file, num_tokens):
         return word_weights.sort_values('weight', ascending=False)[:num_tokens]
 
 
-def _grouper(n, iterable, fillvalue=None):
-    """Collects data into fixed-length chunks or blocks.
-    
-    This private function is wrapped in :func:`_show_mallet_document_topics()`.
-
-    Args:
-        n (int): Length of chunks or blocks
-        iterable (object): Iterable object
-        fillvalue (boolean): If iterable can not be devided into evenly-sized chunks fill chunks with value.
-
-    Returns: n-sized chunks
-
-    """
-    args = [iter(iterable)] * n
-    return itertools.zip_longest(*args, fillvalue=fillvalue)
-
-
-def _show_gensim_document_topics(doc2bow, model, document_labels, index):
+def _show_gensim_document_topics(doc2bow, model, document_labels, index, minimum_probability=None, chunksize=2000,
+                                 n_jobs=None):
     """Creates a document-topic-matrix.
     
     Description:
@@ -349,6 +1224,9 @@ def _show_gensim_document_topics(doc2bow, model, document_labels, index):
         corpus (mmCorpus): Gensim corpus.
         model: Gensim LDA model
         doc_labels (list): List of document labels.
+        minimum_probability (float, optional): See :func:`gensim_document_topics()`.
+        chunksize (int, optional): See :func:`gensim_document_topics()`.
+        n_jobs (int, optional): See :func:`gensim_document_topics()`.
 
     Returns: 
         Doc_topic-matrix as DataFrame
@@ -366,14 +1244,8 @@ def _show_gensim_document_topics(doc2bow, model, document_labels, index):
         >>> isinstance(_show_gensim_document_topics(corpus, model, document_labels, index), pd.DataFrame)
         True
     """
-    num_topics = model.num_topics
-    num_documents = len(document_labels)
-    document_topics = np.zeros((num_topics, num_documents))
-
-    for n, document in enumerate(doc2bow):
-        for distribution in model.get_document_topics(document):
-            document_topics[distribution[0]][n] = distribution[1]
-    return pd.DataFrame(document_topics, index=index, columns=document_labels)
+    document_topics = gensim_document_topics(model, doc2bow, minimum_probability, chunksize, n_jobs)
+    return pd.DataFrame(document_topics.T.toarray(), index=index, columns=document_labels)
 
 
 def _show_gensim_topics(model, num_keys=10):
@@ -476,23 +1348,22 @@ def _show_lda_topics(model, vocabulary, num_keys):
         True
     """
     log.info("Accessing topics from lda model ...")
-    topics = []
-    topic_word = model.topic_word_
-    for i, topic_distribution in enumerate(topic_word):
-        topics.append(np.array(vocabulary)[np.argsort(topic_distribution)][:-num_keys-1:-1])
+    topics = _vocabulary_array(vocabulary)[_top_k(model.topic_word_, num_keys)]
     index = ['Topic {}'.format(n) for n in range(len(topics))]
-    columns = ['Key {}'.format(n) for n in range(num_keys)]
+    columns = ['Key {}'.format(n) for n in range(topics.shape[1])]
     return pd.DataFrame(topics, index=index, columns=columns)
 
 
-def _show_mallet_document_topics(doc_topics_file, index, easy_file_format):
+def _show_mallet_document_topics(doc_topics_file, index, easy_file_format=True):
     """Shows document-topic-mapping.
-    Args:
-        outfolder (str): Folder for MALLET output.
-        doc_topics (str): Name of MALLET's doc_topic file. Defaults to 'doc_topics.txt'.
-        topic_keys (str): Name of MALLET's topic_keys file. Defaults to 'topic_keys.txt'.
 
-    ToDo: Prettify docnames
+    This private function is wrapped in :func:`show_document_topics()`. The \
+    file is parsed with :func:`read_mallet_doc_topics()`.
+
+    Args:
+        doc_topics_file (str): Path to MALLET's doc-topics file.
+        index (list): Labels of the topics.
+        easy_file_format (bool, optional): Ignored, the format is detected.
     
     Example:
         >>> import tempfile
@@ -506,41 +1377,8 @@ def _show_mallet_document_topics(doc_topics_file, index, easy_file_format):
         first topic            0.1           0.4
         second topic           0.2           0.5
     """
-    document_topics_triples = []
-    document_labels = []
-    topics = []
-    with open(doc_topics_file, 'r', encoding='utf-8') as file:
-        for line in file:
-            l = line.lstrip()
-            if l.startswith('#'):
-                lines = file.readlines()
-                for line in lines:
-                    documet_number, document_label, *values = line.rstrip().split('\t')
-                    document_labels.append(os.path.splitext(os.path.basename(document_label))[0])
-                    for topic, share in _grouper(2, values):
-                        triple = (document_label, int(topic), float(share))
-                        topics.append(int(topic))
-                        document_topics_triples.append(triple)
-            else:
-                easy_file_format = True
-                break
-    if easy_file_format:
-        document_topics = pd.read_table(doc_topics_file, sep='\t', header=None)
-        document_topics.index = [os.path.splitext(os.path.basename(document_label))[0] for document_label in document_topics[1]]
-        document_topics = document_topics.drop([0, 1], axis=1)
-        document_topics.columns = index
-        return document_topics.T
-    else:
-        document_topics_triples = sorted(document_topics_triples, key=operator.itemgetter(0, 1))
-        document_labels = sorted(document_labels)
-        num_documents = len(document_labels)
-        num_topics = len(topics)
-        document_topics = np.zeros((num_documents, num_topics))
-        for triple in document_topics_triples:
-            document_label, topic, share = triple
-            index_num = document_labels.index(document_label)
-            document_topics[index_num, topic] = share
-    return pd.DataFrame(document_topics, index=index, columns=columns.T)
+    document_labels, document_topics = read_mallet_doc_topics(doc_topics_file, len(index))
+    return pd.DataFrame(document_topics.T, index=index, columns=document_labels)
 
 
 def _show_mallet_topics(path_to_topic_keys_file):
@@ -567,12 +1405,7 @@ def _show_mallet_topics(path_to_topic_keys_file):
         Topic 1  this    is   the  second  document
     """
     log.info("Accessing topics from MALLET model ...")
-    topics = []
-    with open(path_to_topic_keys_file, 'r', encoding='utf-8') as file:
-        for line in file.readlines():
-            _, _, keys = line.split('\t')
-            keys = keys.rstrip().split(' ')
-            topics.append(keys)
+    _, topics = read_mallet_topic_keys(path_to_topic_keys_file)
     index = ['Topic {}'.format(n) for n in range(len(topics))]
     columns = ['Key {}'.format(n) for n in range(len(topics[0]))]
     return pd.DataFrame(topics, index=index, columns=columns)
@@ -616,22 +1449,81 @@ def show_topic_key_weights(topic_no, num_keys, model=None, vocabulary=None, topi
     elif vocabulary is None and topic_word_weights_file is None:
         key_weights = _show_gensim_key_weights(model, topic_no, num_keys)
     elif topic_word_weights_file is not None:
-        key_weights = _show_mallet_key_weights(topic_word_weights_file, topic_no)
+        key_weights = _show_mallet_key_weights(topic_word_weights_file, topic_no, num_keys)
     if sort_ascending is None:
         return pd.Series(key_weights)[:num_keys]
     else:
         return pd.Series(key_weights).sort_values(ascending=sort_ascending)[:num_keys]
 
 def _show_lda_key_weights(model, vocabulary, topic_no, num_keys):
-    return {key: weight for key, weight in zip(vocabulary[:num_keys], model.components_[topic_no][:num_keys])}
+    weights = model.topic_word_[topic_no]
+    keys = _top_k(weights, num_keys)
+    return dict(zip(_vocabulary_array(vocabulary)[keys], weights[keys]))
 
 def _show_gensim_key_weights(model, topic_no, num_keys):
     return dict(model.show_topic(topic_no, num_keys))
 
-def _show_mallet_key_weights(topic_word_weights_file, topic_no):
-    key_weights = pd.read_table(topic_word_weights_file, sep='\t', header=None, names=['topic_id', 'key', 'weight'])
-    key_weights = key_weights[key_weights['topic_id'] == topic_no].drop('topic_id', axis=1)
-    return key_weights.set_index('key')['weight'].to_dict()
+def _show_mallet_key_weights(topic_word_weights_file, topic_no, num_keys):
+    vocabulary, weights = read_mallet_topic_word_weights(topic_word_weights_file)
+    keys = _top_k(weights[topic_no], num_keys)
+    return dict(zip(vocabulary[keys], weights[topic_no][keys]))
     
 def get_sorted_values_from_distribution(values, distribution, length):
-    return np.array(values)[np.argsort(distribution)][:-length-1:-1]
+    return _vocabulary_array(values)[_top_k(np.asarray(distribution), length)]
+
+
+def _top_k(weights, k):
+    """Finds the indices of the largest weights.
+
+    With this function you can rank the top ``k`` entries of a vector, or of \
+    every row of a matrix at once, without sorting the whole rows: \
+    :func:`numpy.argpartition` selects the ``k`` largest entries in linear \
+    time and only those are sorted.
+
+    Args:
+        weights (np.ndarray): A vector or a matrix, ranked along the last axis.
+        k (int): Number of indices, at most the length of the last axis.
+
+    Returns:
+        The indices of the ``k`` largest weights in descending order.
+
+    Example:
+        >>> _top_k(np.array([[0.1, 0.5, 0.2, 0.7], [0.4, 0.1, 0.3, 0.2]]), 2).tolist()
+        [[3, 1], [0, 2]]
+    """
+    k = min(k, weights.shape[-1])
+    if k == 0:
+        return np.zeros(weights.shape[:-1] + (0,), dtype=np.intp)
+    top = np.argpartition(-weights, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(weights, top, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(top, order, axis=-1)
+
+
+def _vocabulary_array(vocabulary):
+    """Converts a vocabulary to a NumPy array.
+
+    With this function you can index a vocabulary with NumPy arrays. NumPy \
+    arrays and pandas indices are used as they are, so callers showing many \
+    topics with the same vocabulary can convert it once and pass the array; \
+    other sequences are converted on every call.
+
+    Args:
+        vocabulary (list): The vocabulary, e.g. the columns of a document-term
+            matrix.
+
+    Returns:
+        A NumPy array.
+
+    Example:
+        >>> vocabulary = ['a', 'b']
+        >>> vocabulary[0] = 'c'
+        >>> _vocabulary_array(vocabulary).tolist()
+        ['c', 'b']
+    """
+    if isinstance(vocabulary, pd.Index):
+        vocabulary = vocabulary.values
+    if isinstance(vocabulary, np.ndarray):
+        return vocabulary
+    array = np.empty(len(vocabulary), dtype=object)
+    array[:] = list(vocabulary)
+    return array
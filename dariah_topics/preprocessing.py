@@ -35,6 +35,8 @@ Contents
     and assigns an unique identifier.
     * :func:`create_document_term_matrix()` creates a document-term matrix, for either \
     small or large corpora.
+    * :func:`encode_tokenized_corpus()` encodes each ``tokenized_document`` as an \
+    array of type IDs, e.g. for streaming into :class:`dariah_topics.modeling.OnlineLDA`.
     * :func:`filter_pos_tags()` filters a ``dkpro_document`` by specific \
     *part-of-speech tags* and returns either tokens or, if available, lemmas.
     * :func:`find_hapax_legomena()` determines *hapax legomena* based on frequencies \
@@ -45,7 +47,9 @@ Contents
     * :func:`read_files()` reads one or multiple files based on a pathlist.
     * :func:`read_matrix_market_file()` reads a `Matrix Market <http://math.nist.gov/MatrixMarket/formats.html#MMformat>`_ \
     file for `Gensim <https://radimrehurek.com/gensim/>`_.
-    * :func:`read_model()` reads a LDA model.
+    * :func:`read_model()` reads a LDA model, mapping its arrays into memory.
+    * :func:`read_sharded_corpus()` reads a tokenized corpus written by \
+    :func:`postprocessing.save_sharded_corpus()` as :class:`ShardedCorpus`.
     * :func:`read_token2id()` reads a ``document_ids`` or ``type_ids`` dictionary \
     from a CSV file.
     * :func:`remove_features()` removes features from a ``document_term_matrix``.
@@ -60,15 +64,18 @@ Contents
 
 from collections import Counter, defaultdict
 import csv
+import importlib
 from itertools import chain
-from gensim.corpora import MmCorpus
+import json
 import os
-from lxml import etree
+import struct
+import zlib
 import numpy as np
 import pandas as pd
 import pickle
 import regex
 import logging
+import warnings
 
 log = logging.getLogger('dariah_topics')
 
@@ -137,6 +144,32 @@ def create_document_term_matrix(tokenized_corpus, document_labels, large_corpus=
         return _create_small_corpus_model(tokenized_corpus, document_labels)
 
 
+def encode_tokenized_corpus(tokenized_corpus, type_ids):
+    """Encodes tokenized documents as arrays of type IDs.
+
+    With this function you can translate a ``tokenized_corpus`` into arrays of \
+    type IDs, one document at a time. Because this is a generator, it can be \
+    chained with :func:`read_files()` and :func:`tokenize()` to stream corpora \
+    larger than memory. Tokens without an ID in ``type_ids`` are skipped.
+
+    Args:
+        tokenized_corpus (list): Tokenized corpus as an iterable containing one
+            or more iterables containing tokens.
+        type_ids (dict): A dictionary with types as keys and identifiers as values.
+
+    Yields:
+        A NumPy array of type IDs for each ``tokenized_document``.
+
+    Example:
+        >>> type_ids = {'this': 0, 'is': 1, 'document': 2}
+        >>> tokenized_corpus = [['this', 'is', 'a', 'document'], ['this', 'document']]
+        >>> [document.tolist() for document in encode_tokenized_corpus(tokenized_corpus, type_ids)]
+        [[0, 1, 2], [0, 2]]
+    """
+    for tokenized_document in tokenized_corpus:
+        yield np.array([type_ids[token] for token in tokenized_document if token in type_ids], dtype=np.int32)
+
+
 def filter_pos_tags(dkpro_document, pos_tags=['ADJ', 'V', 'NN'], lemma=True):
     """Gets tokens or lemmas respectively of selected POS-tags from pandas DataFrame.
 
@@ -364,22 +397,39 @@ def read_matrix_market_file(filepath):
     """
     if os.path.splitext(filepath)[1] != '.mm':
         raise ValueError("The file {} is not a Matrix Market file.".format(filepath))
+    from gensim.corpora import MmCorpus
     return MmCorpus(filepath)
 
 
-def read_model(filepath):
+def read_model(filepath, mmap_mode='r', allow_pickle=False):
     """Reads a LDA model.
 
-    With this function you can read a LDA model, if it was saved using :module:`pickle`.
+    With this function you can read a LDA model saved by \
+    :func:`postprocessing.save_model()`. The arrays of the model are mapped \
+    into memory with ``mmap_mode``, so they are read from disk on access and \
+    shared between processes instead of being copied. Only the classes in \
+    :data:`postprocessing.MODEL_CLASSES` are created. Models in a ``.pickle`` \
+    file are only unpickled with ``allow_pickle=True``, which you should only \
+    do with files you trust; this fallback is deprecated.
     If you want to read MALLET models, you have to specify a parameter of the
     function :func:`create_mallet_model()`.
 
     Args:
-        filepath (str): Path to LDA model, e.g. ``/home/models/model.pickle``.
+        filepath (str): Path to the model directory, e.g. ``/home/models/model``,
+            or to a pickle file, e.g. ``/home/models/model.pickle``.
+        mmap_mode (str, optional): Mode of :func:`numpy.load()`: ``r`` maps the
+            arrays read-only, ``c`` copy-on-write, None reads them into memory.
+            Defaults to ``r``.
+        allow_pickle (bool, optional): If True, a file which is not a model
+            directory is unpickled. Defaults to False.
 
     Returns:
         A LDA model.
 
+    Raises:
+        ValueError, if the manifest names a class which is not allowed, or if
+        ``filepath`` is a pickle file and ``allow_pickle`` is False.
+
     Example:
         >>> import lda
         >>> import gensim
@@ -388,17 +438,249 @@ def read_model(filepath):
         >>> with tempfile.NamedTemporaryFile(suffix='.pickle') as tmpfile:
         ...     pickle.dump(a, tmpfile, protocol=pickle.HIGHEST_PROTOCOL)
         ...     tmpfile.flush()
-        ...     read_model(tmpfile.name) == a
+        ...     read_model(tmpfile.name, allow_pickle=True) == a
         True
         >>> a = gensim.models.LdaModel
         >>> with tempfile.NamedTemporaryFile(suffix='.pickle') as tmpfile:
         ...     pickle.dump(a, tmpfile, protocol=pickle.HIGHEST_PROTOCOL)
         ...     tmpfile.flush()
-        ...     read_model(tmpfile.name) == a
+        ...     read_model(tmpfile.name, allow_pickle=True) == a
         True
     """
-    with open(filepath, 'rb') as model:
-        return pickle.load(model)
+    manifest_file = os.path.join(filepath, 'manifest.json')
+    if not os.path.isfile(manifest_file):
+        if not allow_pickle:
+            raise ValueError("{} is not a model directory saved by save_model(). Pass allow_pickle=True to unpickle it, "
+                             "if you trust the file.".format(filepath))
+        warnings.warn("Reading pickled models is deprecated, save the model with save_model() to a directory instead.",
+                      DeprecationWarning, stacklevel=2)
+        with open(filepath, 'rb') as model:
+            return pickle.load(model)
+    from dariah_topics.postprocessing import MODEL_FORMAT
+    with open(manifest_file, encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('format') != MODEL_FORMAT:
+        raise ValueError("{} is not a manifest of a saved model.".format(manifest_file))
+    log.info("Reading model from {} ...".format(filepath))
+    return _decode_model(manifest['model'], filepath, mmap_mode)
+
+
+def _decode_model(node, directory, mmap_mode):
+    """Converts JSON written by :func:`postprocessing.save_model()` back.
+
+    This private function is wrapped in :func:`read_model()`.
+
+    Args:
+        node: A value of the manifest.
+        directory (str): The model directory.
+        mmap_mode (str): Mode of :func:`numpy.load()` for arrays.
+
+    Returns:
+        The decoded value.
+
+    Example:
+        >>> decoded = _decode_model({'dict': {'alpha': {'scalar': 0.1, 'dtype': '<f4'}, 'sizes': {'tuple': [1, 2]}}}, '', 'r')
+        >>> decoded['alpha'].dtype, decoded['sizes']
+        (dtype('float32'), (1, 2))
+    """
+    if not isinstance(node, dict):
+        return node
+    if 'array' in node:
+        mode = mmap_mode if all(node['shape']) else None
+        return np.load(os.path.join(directory, node['array']), mmap_mode=mode, allow_pickle=False)
+    if 'scalar' in node:
+        return np.dtype(node['dtype']).type(node['scalar'])
+    if 'dtype' in node:
+        return np.dtype(node['dtype'])
+    if 'random_state' in node:
+        random_state = np.random.RandomState()
+        random_state.set_state(('MT19937', _decode_model(node['random_state'], directory, None), node['position'],
+                                node['has_gauss'], node['cached_gaussian']))
+        return random_state
+    if 'list' in node:
+        return [_decode_model(item, directory, mmap_mode) for item in node['list']]
+    if 'tuple' in node:
+        return tuple(_decode_model(item, directory, mmap_mode) for item in node['tuple'])
+    if 'dict' in node:
+        return {key: _decode_model(item, directory, mmap_mode) for key, item in node['dict'].items()}
+    if 'dictionary' in node:
+        from gensim.corpora import Dictionary
+        arrays = {key: _decode_model(node['dictionary'][key], directory, None).tolist()
+                  for key in ['tokens', 'ids', 'dfs', 'cfs']}
+        dictionary = Dictionary()
+        dictionary.token2id = dict(zip(arrays['tokens'], arrays['ids']))
+        dictionary.dfs = dict(zip(arrays['ids'], arrays['dfs']))
+        dictionary.cfs = dict(zip(arrays['ids'], arrays['cfs']))
+        for key in ['num_docs', 'num_pos', 'num_nnz']:
+            setattr(dictionary, key, node['dictionary'][key])
+        return dictionary
+    if 'object' in node:
+        from dariah_topics.postprocessing import MODEL_CLASSES
+        if node['object'] not in MODEL_CLASSES:
+            raise ValueError("Reading a {} is not allowed.".format(node['object']))
+        module, name = node['object'].rsplit('.', 1)
+        cls = getattr(importlib.import_module(module), name)
+        model = cls.__new__(cls)
+        model.__dict__.update(_decode_model({'dict': node['attributes']}, directory, mmap_mode))
+        return model
+    raise ValueError("Cannot read {} of the manifest.".format(sorted(node)))
+
+
+def read_sharded_corpus(path):
+    """Reads a sharded tokenized corpus.
+
+    With this function you can read a corpus written by \
+    :func:`postprocessing.save_sharded_corpus()`. Only the manifest, the \
+    vocabulary and the indices of the shards are read at once; documents are \
+    decompressed when they are accessed. The returned :class:`ShardedCorpus` \
+    can be passed wherever a ``tokenized_corpus`` is expected, e.g. to \
+    :func:`create_document_term_matrix()`, together with its \
+    :attr:`ShardedCorpus.document_labels`.
+
+    Args:
+        path (str): Path to the corpus directory.
+
+    Returns:
+        A :class:`ShardedCorpus`.
+
+    Raises:
+        ValueError, if ``path`` contains no sharded corpus.
+    """
+    return ShardedCorpus(path)
+
+
+class ShardedCorpus:
+    """A tokenized corpus in compressed shards.
+
+    Iterating over the corpus streams the documents as lists of tokens, block \
+    by block. Indexing with a document label or a position returns one \
+    document, decompressing only its block. The corpus can be iterated any \
+    number of times and is pickled as its path.
+
+    Args:
+        path (str): Path to the corpus directory.
+
+    Attributes:
+        path (str): Path to the corpus directory.
+        manifest (dict): The content of ``manifest.json``.
+        vocabulary (numpy.ndarray): The types, indexed by type ID.
+        document_labels (list): The document labels in corpus order.
+    """
+    def __init__(self, path):
+        from dariah_topics.postprocessing import CORPUS_FORMAT
+        self.path = path
+        manifest_file = os.path.join(path, 'manifest.json')
+        if not os.path.isfile(manifest_file):
+            raise ValueError("{} contains no sharded corpus.".format(path))
+        with open(manifest_file, encoding='utf-8') as file:
+            self.manifest = json.load(file)
+        if self.manifest.get('format') != CORPUS_FORMAT:
+            raise ValueError("{} is not a manifest of a sharded corpus.".format(manifest_file))
+        self._decompress = _decompressor(self.manifest['compression'])
+        with open(os.path.join(path, 'vocabulary.txt'), encoding='utf-8') as file:
+            vocabulary = file.read()
+        self.vocabulary = np.array(vocabulary.split('\n') if vocabulary else [], dtype=object)
+        self._shards = [self._read_index(name) for name in self.manifest['shards']]
+        self.document_labels = [label for shard in self._shards for label in shard['labels']]
+        self._positions = None
+        self._block = (None, None)
+
+    def __len__(self):
+        return len(self.document_labels)
+
+    def __iter__(self):
+        for shard_no, shard in enumerate(self._shards):
+            for block_no, (_, _, first, count) in enumerate(shard['blocks']):
+                type_ids = self._read_block(shard_no, block_no)
+                offset = shard['starts'][first]
+                for document in range(first, first + count):
+                    start, end = shard['starts'][document] - offset, shard['starts'][document + 1] - offset
+                    yield self.vocabulary[type_ids[start:end]].tolist()
+
+    def __getitem__(self, key):
+        """Returns the tokens of the document with label ``key``, or at position ``key``."""
+        return self.vocabulary[self.type_ids(key)].tolist()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def items(self):
+        """Yields document labels and tokens in corpus order."""
+        return zip(self.document_labels, self)
+
+    def type_ids(self, key):
+        """Returns the type IDs of a document.
+
+        Args:
+            key (str or int): A document label or a position in the corpus.
+
+        Returns:
+            A NumPy array of indices into :attr:`vocabulary`.
+        """
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError("The corpus has no document at position {}.".format(key))
+            position = int(key) % len(self)
+        else:
+            if self._positions is None:
+                self._positions = {label: n for n, label in enumerate(self.document_labels)}
+            position = self._positions[key]
+        for shard_no, shard in enumerate(self._shards):
+            if position < len(shard['labels']):
+                break
+            position -= len(shard['labels'])
+        block_no = int(np.searchsorted(shard['block_starts'], position, side='right')) - 1
+        type_ids = self._read_block(shard_no, block_no)
+        offset = shard['starts'][shard['blocks'][block_no][2]]
+        return type_ids[shard['starts'][position] - offset:shard['starts'][position + 1] - offset]
+
+    def _read_index(self, name):
+        from dariah_topics.postprocessing import SHARD_MAGIC
+        with open(os.path.join(self.path, name), 'rb') as file:
+            file.seek(-(16 + len(SHARD_MAGIC)), os.SEEK_END)
+            footer = file.read()
+            if footer[16:] != SHARD_MAGIC:
+                raise ValueError("{} is not a shard of a tokenized corpus.".format(name))
+            offset, size = struct.unpack('<QQ', footer[:16])
+            file.seek(offset)
+            index = json.loads(self._decompress(file.read(size)).decode('utf-8'))
+        index['name'] = name
+        index['starts'] = np.concatenate([[0], np.cumsum(index['lengths'], dtype=np.int64)])
+        index['block_starts'] = np.array([block[2] for block in index['blocks']], dtype=np.int64)
+        return index
+
+    def _read_block(self, shard_no, block_no):
+        if self._block[0] == (shard_no, block_no):
+            return self._block[1]
+        shard = self._shards[shard_no]
+        offset, size, _, _ = shard['blocks'][block_no]
+        with open(os.path.join(self.path, shard['name']), 'rb') as file:
+            file.seek(offset)
+            type_ids = np.frombuffer(self._decompress(file.read(size)), dtype='<u4')
+        self._block = ((shard_no, block_no), type_ids)
+        return type_ids
+
+
+def _decompressor(compression):
+    """Returns a function decompressing bytes.
+
+    This private function is wrapped in :class:`ShardedCorpus`.
+
+    Args:
+        compression (str): ``zlib`` or ``zstd``.
+
+    Returns:
+        A function of bytes returning bytes.
+    """
+    if compression == 'zlib':
+        return zlib.decompress
+    elif compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress
+    raise ValueError("The compression {} is not supported.".format(compression))
 
 
 def read_token2id(filepath):
@@ -783,12 +1065,12 @@ def _create_small_corpus_model(tokenized_corpus, document_labels):
         document_two   1.0  1.0       1.0  1.0  0.0
     """
     log.info("Creating document-term matrix for small corpus ...")
-    document_term_matrix = pd.DataFrame()
+    counts, index = [], []
     for tokenized_document, document_label in zip(tokenized_corpus, document_labels):
         log.debug("Updating {} in document-term matrix ...".format(document_label))
-        current_document = pd.Series(Counter(tokenized_document))
-        current_document.name = document_label
-        document_term_matrix = document_term_matrix.append(current_document)
+        counts.append(Counter(tokenized_document))
+        index.append(document_label)
+    document_term_matrix = pd.DataFrame(counts, index=index, dtype=float)
     document_term_matrix = document_term_matrix.loc[:, document_term_matrix.sum().sort_values(ascending=False).index]
     return document_term_matrix.fillna(0)
 
@@ -901,6 +1183,7 @@ def _read_xml(filepath, xpath_expression):
         'This is a XML example.'
     """
     log.debug("Reading {} matching part or parts of {} ...".format(xpath_expression, filepath))
+    from lxml import etree
     ns = dict(tei='http://www.tei-c.org/ns/1.0')
     tree = etree.parse(filepath)
     document = [''.join(element.xpath('.//text()')) for element in tree.xpath(xpath_expression, namespaces=ns)]
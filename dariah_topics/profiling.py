@@ -0,0 +1,334 @@
+"""
+Profiling the Workflow
+**********************
+
+Functions of this module are for **finding out where time and memory go** in \
+a workflow. Profiling is off by default and costs nothing then. After \
+:func:`enable()`, every call of a public function or method of \
+:mod:`dariah_topics.preprocessing`, :mod:`dariah_topics.postprocessing`, \
+:mod:`dariah_topics.modeling`, :mod:`dariah_topics.evaluation` and \
+:mod:`dariah_topics.utils` is recorded with
+
+    * its wall time and CPU time in seconds, including nested calls,
+    * the peak resident set size of the process after the call and how much \
+    the call raised it, in MB,
+    * the number of items it returned or yielded, e.g. documents, tokens or \
+    rows of a DataFrame.
+
+Generator functions like :func:`dariah_topics.preprocessing.read_files()` \
+are timed while they produce items, not while the caller consumes them. \
+Coroutine functions like :meth:`dariah_topics.utils.Mallet.call_mallet_async()` \
+are timed from the call until the awaited result, including the time they \
+wait, e.g. for a subprocess. \
+Functions are instrumented by replacing them in their modules, so names \
+imported with ``from ... import`` *before* :func:`enable()` are not recorded.
+
+Run ``dariah-topics config.json --profile report.json`` to profile every \
+stage of :mod:`dariah_topics.pipeline`.
+
+Contents
+********
+    * :func:`enable()` and :func:`disable()` switch profiling on and off.
+    * :func:`section()` records a block of code, e.g. a pipeline stage.
+    * :func:`report()` returns all records and per-function totals.
+    * :func:`save_report()` writes the report to a JSON file.
+    * :func:`summary()` returns the per-function totals as pandas DataFrame.
+"""
+
+import contextlib
+import functools
+import importlib
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+log = logging.getLogger('dariah_topics')
+
+MODULES = ['dariah_topics.preprocessing', 'dariah_topics.postprocessing', 'dariah_topics.modeling',
+           'dariah_topics.evaluation', 'dariah_topics.utils']
+
+_records = []
+_lock = threading.Lock()
+_originals = []
+
+
+def enable(modules=MODULES):
+    """Switches profiling on.
+
+    With this function you can record every call of the public functions and \
+    methods of ``modules``. Previous records are kept until :func:`reset()`.
+
+    Args:
+        modules (list, optional): Names of the modules to instrument. Defaults
+            to :data:`MODULES`.
+
+    Returns:
+        None.
+    """
+    if _originals:
+        return None
+    for name in modules:
+        module = importlib.import_module(name)
+        for attribute, value in list(vars(module).items()):
+            if attribute.startswith('_'):
+                continue
+            if inspect.isfunction(value) and value.__module__ == name:
+                _instrument(module, attribute, value, '{}.{}'.format(name, attribute))
+            elif inspect.isclass(value) and value.__module__ == name:
+                for method_name, method in list(vars(value).items()):
+                    if not method_name.startswith('_') and inspect.isfunction(method):
+                        _instrument(value, method_name, method, '{}.{}.{}'.format(name, attribute, method_name))
+    log.info("Profiling {} functions ...".format(len(_originals)))
+    return None
+
+
+def disable():
+    """Switches profiling off and restores the original functions.
+
+    Returns:
+        None.
+    """
+    while _originals:
+        owner, attribute, function = _originals.pop()
+        setattr(owner, attribute, function)
+    return None
+
+
+def reset():
+    """Deletes all records.
+
+    Returns:
+        None.
+    """
+    with _lock:
+        del _records[:]
+    return None
+
+
+def is_enabled():
+    """Tells whether profiling is on.
+
+    Returns:
+        True, if :func:`enable()` was called and :func:`disable()` was not.
+    """
+    return bool(_originals)
+
+
+@contextlib.contextmanager
+def section(name):
+    """Records a block of code while profiling is on.
+
+    Args:
+        name (str): Name of the block in the report.
+
+    Yields:
+        None.
+
+    Example:
+        >>> reset()
+        >>> with section('example'):
+        ...     _ = sum(range(1000))
+        >>> report()['records']
+        []
+    """
+    if not _originals:
+        yield
+        return
+    measurement = _Measurement(name)
+    try:
+        yield
+    finally:
+        measurement.stop()
+        measurement.record(None)
+
+
+def report():
+    """Returns the profiling report.
+
+    With this function you can get every recorded call in the order the calls \
+    finished, and the totals per function: the number of calls, the summed \
+    wall and CPU time and items, and the maximum peak and growth of the \
+    resident set size.
+
+    Returns:
+        A dictionary with the lists ``records`` and ``functions``.
+    """
+    with _lock:
+        records = [dict(record) for record in _records]
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record['function'], {'function': record['function'], 'calls': 0,
+                                                       'wall_time': 0.0, 'cpu_time': 0.0, 'items': None,
+                                                       'peak_rss': None, 'rss_growth': None})
+        total['calls'] += 1
+        total['wall_time'] += record['wall_time']
+        total['cpu_time'] += record['cpu_time']
+        if record['items'] is not None:
+            total['items'] = (total['items'] or 0) + record['items']
+        for key in ['peak_rss', 'rss_growth']:
+            if record[key] is not None:
+                total[key] = max(total[key] or 0, record[key])
+    functions = sorted(totals.values(), key=lambda total: total['wall_time'], reverse=True)
+    return {'records': records, 'functions': functions}
+
+
+def save_report(filepath):
+    """Writes the profiling report to a JSON file.
+
+    Args:
+        filepath (str): Path to the JSON file.
+
+    Returns:
+        None.
+    """
+    with open(filepath, 'w', encoding='utf-8') as file:
+        json.dump(report(), file, indent=2)
+    return None
+
+
+def summary():
+    """Summarizes the profiling report.
+
+    Returns:
+        A pandas DataFrame with one row per function, sorted by wall time.
+    """
+    import pandas as pd
+    columns = ['calls', 'wall_time', 'cpu_time', 'items', 'peak_rss', 'rss_growth']
+    functions = report()['functions']
+    return pd.DataFrame(functions, columns=['function'] + columns).set_index('function')
+
+
+class _Measurement:
+    """Measures time and memory from construction to :meth:`stop()`.
+
+    This private class is wrapped in the instrumented functions and in \
+    :func:`section()`. Generators call :meth:`resume()` and :meth:`stop()` \
+    around every item, so only the time spent producing items is added up.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rss_before = _peak_rss()
+        self.resume()
+
+    def resume(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._running = True
+
+    def stop(self):
+        if self._running:
+            self.wall_time += time.perf_counter() - self._wall
+            self.cpu_time += time.process_time() - self._cpu
+            self._running = False
+
+    def record(self, items):
+        peak_rss = _peak_rss()
+        rss_growth = None if peak_rss is None else peak_rss - self.rss_before
+        with _lock:
+            _records.append({'function': self.name, 'wall_time': self.wall_time, 'cpu_time': self.cpu_time,
+                             'items': items, 'peak_rss': peak_rss, 'rss_growth': rss_growth})
+
+
+def _instrument(owner, attribute, function, name):
+    """Replaces a function by a recording wrapper.
+
+    This private function is wrapped in :func:`enable()`.
+
+    Args:
+        owner: The module or class of the function.
+        attribute (str): The name of the function in ``owner``.
+        function (callable): The function.
+        name (str): The name of the function in the report.
+
+    Returns:
+        None.
+    """
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            measurement = _Measurement(name)
+            try:
+                result = await function(*args, **kwargs)
+            finally:
+                measurement.stop()
+            measurement.record(_count_items(result))
+            return result
+    elif inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            measurement = _Measurement(name)
+            items = 0
+            try:
+                generator = function(*args, **kwargs)
+                while True:
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    items += 1
+                    measurement.stop()
+                    yield item
+                    measurement.resume()
+            finally:
+                measurement.stop()
+                measurement.record(items)
+    else:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            measurement = _Measurement(name)
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                measurement.stop()
+            measurement.record(_count_items(result))
+            return result
+    _originals.append((owner, attribute, function))
+    setattr(owner, attribute, wrapper)
+    return None
+
+
+def _count_items(result):
+    """Counts the items of a return value.
+
+    This private function is wrapped in :func:`_instrument()`. Tuples are \
+    counted by their first element, e.g. the document-term matrix of \
+    :func:`dariah_topics.preprocessing.create_document_term_matrix()`.
+
+    Args:
+        result: The return value.
+
+    Returns:
+        The length of ``result``, or None if it has no length.
+
+    Example:
+        >>> _count_items(([1, 2, 3], {'a': 1})), _count_items(None)
+        (3, None)
+    """
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def _peak_rss():
+    """Returns the peak resident set size of the process in MB.
+
+    Returns:
+        The peak resident set size, or None if :mod:`resource` is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
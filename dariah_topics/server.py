@@ -0,0 +1,489 @@
+"""
+Serving Topic Inference
+***********************
+
+Functions and classes of this module are for **serving a trained LDA model** \
+to other processes. :class:`TopicServer` loads a model and its vocabulary once \
+and answers requests over a local HTTP port or a Unix socket, so clients do \
+not have to read the model for every job. Concurrent requests for document \
+topics are collected into one batch and inferred with one call of \
+:func:`dariah_topics.modeling.infer()`.
+
+The server answers the following requests with JSON:
+    * ``POST /infer`` with ``{"documents": [["token", ...], ...]}`` returns \
+    ``{"doc_topics": [[...], ...]}``.
+    * ``GET /topics?num_keys=10`` returns the top keys of all topics.
+    * ``GET /stats`` returns the number of requests, batches and documents.
+
+Run ``python -m dariah_topics.server serve model --vocabulary vocabulary.csv`` \
+to start a server and ``python -m dariah_topics.server load-test http://127.0.0.1:8000`` \
+to report its latency and throughput.
+
+Contents
+********
+    * :class:`TopicServer` serves doc-topic inference and topic keys.
+    * :func:`request()` sends one request to a server.
+    * :func:`load_test()` measures latency and throughput of a server.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from scipy import sparse
+from dariah_topics import modeling
+from dariah_topics.postprocessing import _top_k
+
+log = logging.getLogger('dariah_topics')
+
+
+class TopicServer:
+    """Serves a LDA model over a local HTTP port or Unix socket.
+
+    With this class you can keep a trained model resident in one process and \
+    query it from others. Requests for document topics wait at most \
+    ``max_delay`` seconds for other requests and are then inferred together, \
+    up to ``max_batch_size`` documents at once.
+
+    Args:
+        model: A trained lda, Gensim or in-package model.
+        vocabulary (list, optional): The types in the order of the columns of
+            the document-term matrix. Not needed for Gensim models. Defaults to
+            None.
+        address (str or tuple, optional): A tuple of host and port, or the path
+            of a Unix socket. Port 0 selects a free port. Defaults to
+            ``('127.0.0.1', 8000)``.
+        max_batch_size (int, optional): Maximum number of documents per batch.
+            Defaults to 256.
+        max_delay (float, optional): Maximum number of seconds a request waits
+            for others. Defaults to 0.005.
+        iterations (int, optional): Number of inference iterations, see
+            :func:`dariah_topics.modeling.infer()`. Defaults to 20.
+        random_state (int, optional): Seed for the inference. Defaults to None.
+        max_keys (int, optional): Maximum number of keys per topic, which are
+            ranked once at startup. Defaults to 100.
+
+    Example:
+        >>> document_term_matrix = np.array([[5, 5, 0, 0], [0, 0, 5, 5]] * 5)
+        >>> model = modeling.GibbsLDA(n_topics=2, n_iter=50, random_state=0).fit(document_term_matrix)
+        >>> server = TopicServer(model, ['a', 'b', 'c', 'd'], address=('127.0.0.1', 0)).start()
+        >>> response = request(server.url, '/infer', {'documents': [['a', 'b'], ['c', 'd', 'd']]})
+        >>> np.array(response['doc_topics']).shape
+        (2, 2)
+        >>> server.shutdown()
+    """
+    def __init__(self, model, vocabulary=None, address=('127.0.0.1', 8000), max_batch_size=256, max_delay=0.005,
+                 iterations=20, random_state=None, max_keys=100):
+        self.model = model
+        self.max_keys = max_keys
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.iterations = iterations
+        self.random_state = random_state
+        from gensim.models import LdaModel
+        self._gensim = isinstance(model, LdaModel)
+        if self._gensim:
+            self.vocabulary = [model.id2word[type_id] for type_id in range(len(model.id2word))]
+            topic_word = model.get_topics()
+        else:
+            self.vocabulary = list(vocabulary)
+            topic_word = model.topic_word_
+        self._type_ids = {token: type_id for type_id, token in enumerate(self.vocabulary)}
+        self._ranked_types = _top_k(np.asarray(topic_word), max_keys)
+        self._vocabulary = np.array(self.vocabulary, dtype=object)
+        self._queue = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0, 'documents': 0}
+        self._lock = threading.Lock()
+        handler = _handler(self)
+        if isinstance(address, str):
+            self._httpd = _ThreadingUnixHTTPServer(address, handler)
+            self.url = 'unix://{}'.format(address)
+        else:
+            self._httpd = ThreadingHTTPServer(address, handler)
+            self.url = 'http://{}:{}'.format(*self._httpd.server_address[:2])
+        self._threads = []
+
+    def start(self):
+        """Serves requests in background threads.
+
+        Returns:
+            The started instance.
+        """
+        log.info("Serving topics on {} ...".format(self.url))
+        self._threads = [threading.Thread(target=self._run_batches, daemon=True),
+                         threading.Thread(target=self._httpd.serve_forever, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves requests until interrupted.
+
+        Returns:
+            None.
+        """
+        self.start()
+        try:
+            while self._threads[1].is_alive():
+                self._threads[1].join(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+        return None
+
+    def shutdown(self):
+        """Stops serving and closes the socket.
+
+        Returns:
+            None.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return None
+
+    def infer(self, documents):
+        """Infers the topic distributions of tokenized documents in the next batch.
+
+        Args:
+            documents (list): Tokenized documents.
+
+        Returns:
+            Document-topic distributions as NumPy array.
+        """
+        future = Future()
+        self._queue.put((documents, future))
+        return future.result()
+
+    def topics(self, num_keys=10):
+        """Lists the top keys of all topics.
+
+        Args:
+            num_keys (int, optional): Number of keys per topic, at most
+                ``max_keys``. Defaults to 10.
+
+        Returns:
+            A list of lists of keys.
+        """
+        return self._vocabulary[self._ranked_types[:, :num_keys]].tolist()
+
+    def _run_batches(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, size = [], 0
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                try:
+                    size += len(item[0])
+                    batch.append(item)
+                except Exception as error:
+                    item[1].set_exception(error)
+                if size >= self.max_batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+            if not batch:
+                continue
+            try:
+                documents = [document for documents, _ in batch for document in documents]
+                doc_topic = self._infer_batch(documents)
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            with self._lock:
+                self.stats['batches'] += 1
+                self.stats['documents'] += len(documents)
+            offset = 0
+            for documents, future in batch:
+                future.set_result(doc_topic[offset:offset + len(documents)])
+                offset += len(documents)
+
+    def _infer_batch(self, documents):
+        if self._gensim:
+            gensim_corpus = [self.model.id2word.doc2bow(document) for document in documents]
+            return modeling.infer(self.model, gensim_corpus=gensim_corpus, iterations=self.iterations)
+        rows, columns = [], []
+        for n, document in enumerate(documents):
+            type_ids = [self._type_ids[token] for token in document if token in self._type_ids]
+            rows.extend([n] * len(type_ids))
+            columns.extend(type_ids)
+        document_term_matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)),
+                                                 shape=(len(documents), len(self.vocabulary)))
+        return modeling.infer(self.model, document_term_matrix, iterations=self.iterations,
+                              random_state=self.random_state)
+
+
+def _is_tokenized_corpus(documents):
+    """Checks that a request contains a list of lists of str.
+
+    This private function is wrapped in :class:`TopicServer`.
+
+    Example:
+        >>> _is_tokenized_corpus([['a', 'b'], []]), _is_tokenized_corpus(5), _is_tokenized_corpus([['a', 1]])
+        (True, False, False)
+    """
+    return isinstance(documents, list) and all(isinstance(document, list) and
+                                               all(isinstance(token, str) for token in document)
+                                               for document in documents)
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def _handler(server):
+    """Creates a request handler class bound to a :class:`TopicServer`.
+
+    This private function is wrapped in :class:`TopicServer`.
+
+    Args:
+        server (TopicServer): The server answering the requests.
+
+    Returns:
+        A subclass of :class:`http.server.BaseHTTPRequestHandler`.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def address_string(self):
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            log.debug(format % args)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/topics':
+                num_keys = int(parse_qs(url.query).get('num_keys', [10])[0])
+                self._respond(200, {'topics': server.topics(num_keys)})
+            elif url.path == '/stats':
+                with server._lock:
+                    self._respond(200, dict(server.stats))
+            else:
+                self._respond(404, {'error': 'Unknown path {}'.format(url.path)})
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/infer':
+                self._respond(404, {'error': 'Unknown path {}'.format(self.path)})
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                documents = json.loads(body.decode('utf-8'))['documents']
+            except (ValueError, KeyError, TypeError) as error:
+                self._respond(400, {'error': 'Invalid request: {}'.format(error)})
+                return
+            if not _is_tokenized_corpus(documents):
+                self._respond(400, {'error': "Invalid request: 'documents' has to be a list of lists of tokens."})
+                return
+            with server._lock:
+                server.stats['requests'] += 1
+            try:
+                doc_topic = server.infer(documents)
+            except Exception as error:
+                self._respond(500, {'error': str(error)})
+                return
+            self._respond(200, {'doc_topics': doc_topic.tolist()})
+
+        def _respond(self, status, content):
+            body = json.dumps(content).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _connect(url, timeout=60):
+    """Opens a connection to a server.
+
+    This private function is wrapped in :func:`request()` and :func:`load_test()`.
+
+    Args:
+        url (str): ``http://host:port`` or ``unix:///path/to/socket``.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 60.
+
+    Returns:
+        A :class:`http.client.HTTPConnection`.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'unix':
+        return _UnixHTTPConnection(parsed.path, timeout=timeout)
+    return HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+
+
+def request(url, path, content=None, connection=None):
+    """Sends a request to a :class:`TopicServer`.
+
+    Args:
+        url (str): ``http://host:port`` or ``unix:///path/to/socket``.
+        path (str): The requested path, e.g. ``/infer`` or ``/topics``.
+        content (dict, optional): JSON content, which is posted. If None, a
+            ``GET`` request is sent. Defaults to None.
+        connection (http.client.HTTPConnection, optional): An open connection
+            to reuse. Defaults to None.
+
+    Returns:
+        The decoded JSON response.
+
+    Raises:
+        OSError, if the server responds with an error.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = _connect(url)
+    try:
+        if content is None:
+            connection.request('GET', path)
+        else:
+            connection.request('POST', path, body=json.dumps(content).encode('utf-8'),
+                               headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        content = json.loads(response.read().decode('utf-8'))
+    finally:
+        if own_connection:
+            connection.close()
+    if response.status != 200:
+        raise OSError("The server responded with {}: {}".format(response.status, content.get('error')))
+    return content
+
+
+def load_test(url, num_requests=1000, concurrency=8, documents_per_request=1, document_length=100,
+              random_state=None):
+    """Measures latency and throughput of a :class:`TopicServer`.
+
+    With this function you can check a running server. Random documents are \
+    drawn from the top keys of its topics and posted to ``/infer`` by \
+    ``concurrency`` clients, each keeping its connection open.
+
+    Args:
+        url (str): ``http://host:port`` or ``unix:///path/to/socket``.
+        num_requests (int, optional): Number of requests. Defaults to 1000.
+        concurrency (int, optional): Number of concurrent clients. Defaults to 8.
+        documents_per_request (int, optional): Number of documents per request.
+            Defaults to 1.
+        document_length (int, optional): Number of tokens per document. Defaults
+            to 100.
+        random_state (int, optional): Seed for the documents. Defaults to None.
+
+    Returns:
+        A dictionary with the number of requests and documents, the elapsed
+        seconds, requests and documents per second and the latency percentiles
+        in milliseconds.
+    """
+    rng = np.random.RandomState(random_state)
+    keys = request(url, '/topics?num_keys=50')['topics']
+    payloads = []
+    for _ in range(num_requests):
+        documents = []
+        for _ in range(documents_per_request):
+            topic = keys[rng.randint(len(keys))]
+            documents.append([topic[n] for n in rng.randint(len(topic), size=document_length)])
+        payloads.append({'documents': documents})
+    local = threading.local()
+
+    def send(payload):
+        if not hasattr(local, 'connection'):
+            local.connection = _connect(url)
+        start = time.perf_counter()
+        request(url, '/infer', payload, connection=local.connection)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = np.array(list(executor.map(send, payloads))) * 1000
+    seconds = time.perf_counter() - start
+    return {'requests': num_requests,
+            'documents': num_requests * documents_per_request,
+            'seconds': seconds,
+            'requests_per_second': num_requests / seconds,
+            'documents_per_second': num_requests * documents_per_request / seconds,
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p90_ms': float(np.percentile(latencies, 90)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+            'latency_max_ms': float(latencies.max())}
+
+
+def _main(argv=None):
+    import argparse
+    from dariah_topics.preprocessing import read_model, read_token2id
+    parser = argparse.ArgumentParser(prog='python -m dariah_topics.server',
+                                     description="Serve a LDA model or load test a server.")
+    commands = parser.add_subparsers(dest='command')
+    serve = commands.add_parser('serve', help="Serve a saved model.")
+    serve.add_argument('model', help="Path to the model saved by postprocessing.save_model().")
+    serve.add_argument('--vocabulary', help="CSV file of type IDs and types, see preprocessing.read_token2id().")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--socket', help="Path to a Unix socket, instead of host and port.")
+    serve.add_argument('--max-batch-size', type=int, default=256)
+    serve.add_argument('--max-delay', type=float, default=0.005)
+    serve.add_argument('--iterations', type=int, default=20)
+    serve.add_argument('--max-keys', type=int, default=100, help="Maximum number of keys per topic.")
+    serve.add_argument('--allow-pickle', action='store_true', help="Read a pickled model (deprecated, trusted files only).")
+    test = commands.add_parser('load-test', help="Report latency and throughput of a server.")
+    test.add_argument('url', help="http://host:port or unix:///path/to/socket")
+    test.add_argument('--requests', type=int, default=1000)
+    test.add_argument('--concurrency', type=int, default=8)
+    test.add_argument('--documents-per-request', type=int, default=1)
+    test.add_argument('--document-length', type=int, default=100)
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        logging.basicConfig(level=logging.INFO)
+        model = read_model(args.model, allow_pickle=args.allow_pickle)
+        vocabulary = None
+        if args.vocabulary is not None:
+            id2type = read_token2id(args.vocabulary)
+            vocabulary = [id2type[type_id] for type_id in sorted(id2type)]
+        address = args.socket if args.socket is not None else (args.host, args.port)
+        TopicServer(model, vocabulary, address=address, max_batch_size=args.max_batch_size,
+                    max_delay=args.max_delay, iterations=args.iterations, max_keys=args.max_keys).serve_forever()
+    elif args.command == 'load-test':
+        report = load_test(args.url, num_requests=args.requests, concurrency=args.concurrency,
+                           documents_per_request=args.documents_per_request,
+                           document_length=args.document_length)
+        for key, value in report.items():
+            print('{:<22}{:>12.2f}'.format(key, value))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,287 @@
+"""
+Sharing Data Between Processes
+******************************
+
+Functions and classes of this module are for **sharing large arrays with \
+worker processes** without pickling them. Process pools, e.g. of \
+:func:`dariah_topics.modeling.sweep()` or \
+:class:`dariah_topics.modeling.DistributedGibbsLDA`, would otherwise send a \
+copy of the document-term matrix to every worker. Instead, the arrays are \
+copied once into blocks of :mod:`multiprocessing.shared_memory`, and only a \
+small, picklable *handle* with the names of the blocks is sent. Workers \
+attach to the blocks by name and read and write the same memory.
+
+The process creating a container owns its blocks and frees them with \
+:meth:`SharedArrays.close()`, at the end of a ``with`` block, or at the \
+latest when the container is garbage collected or the interpreter exits. \
+Attached containers only unmap the blocks when they are closed.
+
+    >>> import numpy as np
+    >>> from scipy import sparse
+    >>> with SharedDocumentTermMatrix(sparse.csr_matrix(np.eye(2)), vocabulary=['a', 'b']) as shared:
+    ...     attached = SharedDocumentTermMatrix.attach(shared.handle)
+    ...     attached.matrix.toarray().tolist(), attached.vocabulary
+    ...     attached.close()
+    ([[1.0, 0.0], [0.0, 1.0]], ['a', 'b'])
+
+Contents
+********
+    * :class:`SharedArrays` keeps named NumPy arrays in shared memory.
+    * :class:`SharedDocumentTermMatrix` keeps a sparse document-term matrix, \
+    its vocabulary and its document labels in shared memory.
+"""
+
+import logging
+import sys
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+
+log = logging.getLogger('dariah_topics')
+
+
+class SharedArrays:
+    """Named NumPy arrays in shared memory.
+
+    With this class you can copy a dictionary of NumPy arrays into shared \
+    memory once and access them by name in other processes. Pass \
+    :attr:`handle` to a worker and call :meth:`attach()` there to get the same \
+    arrays without copying them.
+
+    Args:
+        arrays (dict): NumPy arrays by name.
+
+    Attributes:
+        arrays (dict): The NumPy arrays backed by shared memory, by name.
+
+    Example:
+        >>> import numpy as np
+        >>> shared = SharedArrays({'counts': np.arange(3)})
+        >>> attached = SharedArrays.attach(shared.handle)
+        >>> attached['counts'][0] = 7
+        >>> shared['counts'].tolist()
+        [7, 1, 2]
+        >>> attached.close(); shared.close()
+    """
+    def __init__(self, arrays):
+        self._blocks = {}
+        self.arrays = {}
+        self._owner = True
+        try:
+            for name, array in arrays.items():
+                array = np.asarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks[name] = block
+                self.arrays[name] = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                self.arrays[name][...] = array
+        except BaseException:
+            _release(self.arrays, self._blocks, True)
+            raise
+        self._finalizer = weakref.finalize(self, _release, self.arrays, self._blocks, True)
+
+    @classmethod
+    def attach(cls, handle):
+        """Attaches to arrays created in another process.
+
+        Args:
+            handle (dict): The :attr:`handle` of the creating container.
+
+        Returns:
+            A :class:`SharedArrays`, which does not own the blocks.
+        """
+        self = cls.__new__(cls)
+        self._blocks = {}
+        self.arrays = {}
+        self._owner = False
+        try:
+            for name, (block_name, shape, dtype) in handle.items():
+                block = _attach_block(block_name)
+                self._blocks[name] = block
+                self.arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        except BaseException:
+            _release(self.arrays, self._blocks, False)
+            raise
+        self._finalizer = weakref.finalize(self, _release, self.arrays, self._blocks, False)
+        return self
+
+    @property
+    def handle(self):
+        """A picklable description of the blocks: names, shapes and dtypes."""
+        return {name: (self._blocks[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()}
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmaps the blocks, and frees them if this container created them.
+
+        Arrays taken from the container before must not be used afterwards. \
+        If they are still referenced, the memory stays mapped until they are \
+        garbage collected, but is freed nevertheless.
+
+        Returns:
+            None.
+        """
+        self._finalizer()
+        return None
+
+
+class SharedDocumentTermMatrix(SharedArrays):
+    """A sparse document-term matrix in shared memory.
+
+    With this class you can share a document-term matrix with worker \
+    processes. The CSR arrays of the matrix, the vocabulary and the document \
+    labels are each kept in one block; strings are stored UTF-8 encoded.
+
+    Args:
+        document_term_matrix (array-like): Document-term matrix. Can be a
+            NumPy array, a pandas DataFrame or a SciPy sparse matrix.
+        vocabulary (list, optional): Types of the columns. Defaults to the
+            columns of a DataFrame, otherwise None.
+        document_labels (list, optional): Labels of the rows. Defaults to the
+            index of a DataFrame, otherwise None.
+
+    Example:
+        >>> import pandas as pd
+        >>> document_term_matrix = pd.DataFrame([[1, 0], [2, 3]], index=['doc1', 'doc2'], columns=['x', 'y'])
+        >>> with SharedDocumentTermMatrix(document_term_matrix) as shared:
+        ...     shared.matrix.nnz, shared.shape, shared.document_labels
+        (3, (2, 2), ['doc1', 'doc2'])
+    """
+    def __init__(self, document_term_matrix, vocabulary=None, document_labels=None):
+        from scipy import sparse
+        if hasattr(document_term_matrix, 'columns'):
+            if vocabulary is None:
+                vocabulary = [str(column) for column in document_term_matrix.columns]
+            if document_labels is None:
+                document_labels = [str(label) for label in document_term_matrix.index]
+            document_term_matrix = document_term_matrix.values
+        matrix = sparse.csr_matrix(document_term_matrix)
+        arrays = {'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+                  'shape': np.array(matrix.shape, dtype=np.int64)}
+        for name, strings in [('vocabulary', vocabulary), ('document_labels', document_labels)]:
+            if strings is not None:
+                arrays[name], arrays[name + '_offsets'] = _encode_strings(strings)
+        super().__init__(arrays)
+
+    @property
+    def shape(self):
+        return tuple(int(size) for size in self.arrays['shape'])
+
+    @property
+    def matrix(self):
+        """The document-term matrix as SciPy CSR matrix, backed by shared memory."""
+        from scipy import sparse
+        return sparse.csr_matrix((self.arrays['data'], self.arrays['indices'], self.arrays['indptr']),
+                                 shape=self.shape, copy=False)
+
+    @property
+    def vocabulary(self):
+        """The vocabulary as list of str, or None."""
+        return self._strings('vocabulary')
+
+    @property
+    def document_labels(self):
+        """The document labels as list of str, or None."""
+        return self._strings('document_labels')
+
+    def _strings(self, name):
+        if name not in self.arrays:
+            return None
+        cache = self.__dict__.setdefault('_decoded', {})
+        if name not in cache:
+            cache[name] = _decode_strings(self.arrays[name], self.arrays[name + '_offsets'])
+        return cache[name]
+
+
+def _attach_block(name):
+    """Attaches to an existing shared memory block.
+
+    This private function is wrapped in :meth:`SharedArrays.attach()`. Since \
+    Python 3.13 the block is not registered with the resource tracker, which \
+    would otherwise free it when the attaching process exits.
+
+    Args:
+        name (str): Name of the block.
+
+    Returns:
+        The :class:`multiprocessing.shared_memory.SharedMemory` block.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _release(arrays, blocks, unlink):
+    """Unmaps shared memory blocks and frees them.
+
+    This private function is wrapped in :meth:`SharedArrays.close()` and runs \
+    at the latest when a container is garbage collected. Blocks which are \
+    still referenced by arrays elsewhere are unmapped when those are collected.
+
+    Args:
+        arrays (dict): The arrays backed by the blocks.
+        blocks (dict): The blocks.
+        unlink (bool): If True, the blocks are freed.
+
+    Returns:
+        None.
+    """
+    arrays.clear()
+    for name, block in blocks.items():
+        try:
+            block.close()
+        except BufferError:
+            log.debug("Shared memory block {} is still in use and stays mapped.".format(name))
+        if unlink:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+    blocks.clear()
+    return None
+
+
+def _encode_strings(strings):
+    """Encodes strings into one byte array and offsets.
+
+    Args:
+        strings (list): The strings.
+
+    Returns:
+        The UTF-8 bytes as NumPy array of uint8 and the offsets of the strings,
+            one more than strings.
+
+    Example:
+        >>> data, offsets = _encode_strings(['ab', 'ä'])
+        >>> offsets.tolist()
+        [0, 2, 4]
+    """
+    encoded = [str(string).encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def _decode_strings(data, offsets):
+    """Decodes strings encoded by :func:`_encode_strings()`.
+
+    Example:
+        >>> _decode_strings(*_encode_strings(['ab', 'ä']))
+        ['ab', 'ä']
+    """
+    data = data.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
@@ -0,0 +1,322 @@
+"""
+Generating Synthetic Corpora
+****************************
+
+Functions and classes of this module are for **stress-testing** the workflow \
+on corpora of any size. :class:`SyntheticCorpus` generates documents from a \
+known topic model, so the corpus has the statistical shape of real text and \
+the topics a model should find are known:
+
+    * The vocabulary follows a Zipf-Mandelbrot law. Types are pseudo-words \
+    made of syllables, and frequent types are short, like in natural language.
+    * Document lengths follow a log-normal distribution, so there are many \
+    short and a few very long documents.
+    * Every token comes either from a background distribution over the whole \
+    vocabulary, which produces function words, or from one of the planted \
+    topics. Each planted topic is a Zipfian distribution over its own subset \
+    of mid-frequency types, and the topic proportions of each document are \
+    drawn from a Dirichlet distribution.
+
+Every document is generated from its own random number generator, seeded by \
+``random_state`` and its number, so documents can be generated in any order, \
+in parallel or again later, without keeping the corpus in memory. This scales \
+from thousands to millions of documents.
+
+Run ``python -m dariah_topics.synthetic corpus --documents 100000`` to write \
+a corpus of text files, e.g. for :mod:`dariah_topics.pipeline`.
+
+Contents
+********
+    * :class:`SyntheticCorpus` generates, streams and writes a corpus.
+"""
+
+import logging
+import os
+import numpy as np
+from scipy import sparse
+
+log = logging.getLogger('dariah_topics')
+
+CONSONANTS = 'bdfgklmnprstvz'
+VOWELS = 'aeiou'
+
+
+class SyntheticCorpus:
+    """A reproducible synthetic corpus with planted topics.
+
+    With this class you can generate a corpus of ``num_documents`` documents. \
+    Iterating over the corpus yields document labels and tokens, \
+    :meth:`document()` generates one document, :meth:`write()` writes text \
+    files and :meth:`document_term_matrix()` counts the tokens into a sparse \
+    matrix. The planted model is kept in :attr:`topic_word_` and \
+    :meth:`doc_topic()`.
+
+    Args:
+        num_documents (int): Number of documents.
+        num_types (int, optional): Size of the vocabulary. Defaults to 20000.
+        num_topics (int, optional): Number of planted topics. Defaults to 20.
+        mean_length (float, optional): Mean number of tokens per document.
+            Defaults to 500.
+        length_sigma (float, optional): Standard deviation of the logarithm of
+            the document lengths. Defaults to 0.8.
+        zipf_exponent (float, optional): Exponent of the Zipf-Mandelbrot law.
+            Defaults to 1.1.
+        alpha (float, optional): Dirichlet parameter of the topic proportions
+            of a document. Defaults to 0.1.
+        topic_size (int, optional): Number of types of a topic. Defaults to
+            ``num_types // num_topics``, at most 2000.
+        num_function_words (int, optional): Number of the most frequent types,
+            which occur only in the background. Defaults to 100.
+        background (float, optional): Share of tokens from the background
+            distribution. Defaults to 0.4.
+        paragraph_length (int, optional): Mean number of tokens per paragraph
+            of the text files. Defaults to 100.
+        random_state (int, optional): Seed. Defaults to 0.
+
+    Attributes:
+        vocabulary (numpy.ndarray): The types, most frequent first.
+        topic_word_ (scipy.sparse.csr_matrix): The planted topic-type
+            distributions, shape ``(num_topics, num_types)``.
+
+    Example:
+        >>> corpus = SyntheticCorpus(100, num_types=500, num_topics=5, mean_length=50, random_state=1)
+        >>> label, tokens = next(iter(corpus))
+        >>> label, tokens == corpus.document(0)
+        ('document00', True)
+        >>> corpus.document_term_matrix().shape
+        (100, 500)
+    """
+    def __init__(self, num_documents, num_types=20000, num_topics=20, mean_length=500, length_sigma=0.8,
+                 zipf_exponent=1.1, alpha=0.1, topic_size=None, num_function_words=100, background=0.4,
+                 paragraph_length=100, random_state=0):
+        self.num_documents = num_documents
+        self.num_types = num_types
+        self.num_topics = num_topics
+        self.mean_length = mean_length
+        self.length_sigma = length_sigma
+        self.zipf_exponent = zipf_exponent
+        self.alpha = alpha
+        self.background = background
+        self.paragraph_length = paragraph_length
+        self.random_state = random_state
+        num_function_words = min(num_function_words, num_types - 1)
+        if topic_size is None:
+            topic_size = min(max(num_types // num_topics, 1), 2000)
+        topic_size = min(topic_size, num_types - num_function_words)
+
+        self.vocabulary = _pseudo_words(num_types)
+        weights = 1 / (np.arange(num_types) + 2.7) ** zipf_exponent
+        self._background_cdf = _cdf(weights)
+        rng = np.random.RandomState(random_state)
+        candidates = np.arange(num_function_words, num_types)
+        probabilities = weights[num_function_words:] / weights[num_function_words:].sum()
+        topic_weights = 1 / (np.arange(topic_size) + 1.0) ** zipf_exponent
+        self._topic_types, self._topic_cdfs = [], []
+        rows, columns, values = [], [], []
+        for topic in range(num_topics):
+            types = rng.choice(candidates, size=topic_size, replace=False, p=probabilities)
+            self._topic_types.append(types)
+            self._topic_cdfs.append(_cdf(topic_weights))
+            rows.append(np.full(topic_size, topic))
+            columns.append(types)
+            values.append(topic_weights / topic_weights.sum())
+        self.topic_word_ = sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                                             shape=(num_topics, num_types))
+        self._width = len(str(max(num_documents - 1, 0)))
+
+    def __iter__(self):
+        for n in range(self.num_documents):
+            yield self.label(n), self.document(n)
+
+    def __len__(self):
+        return self.num_documents
+
+    def label(self, n):
+        """Returns the label of document ``n``, e.g. ``document007``."""
+        return 'document{:0{}d}'.format(n, self._width)
+
+    def doc_topic(self, n):
+        """Returns the planted topic proportions of document ``n``.
+
+        Args:
+            n (int): Number of the document.
+
+        Returns:
+            A NumPy array of length ``num_topics``.
+        """
+        return self._generate(n)[1]
+
+    def document(self, n):
+        """Generates document ``n``.
+
+        Args:
+            n (int): Number of the document.
+
+        Returns:
+            The tokens as list of str.
+        """
+        return self.vocabulary[self._generate(n)[0]].tolist()
+
+    def type_ids(self, n):
+        """Generates document ``n`` as type IDs.
+
+        Args:
+            n (int): Number of the document.
+
+        Returns:
+            A NumPy array of indices into :attr:`vocabulary`.
+        """
+        return self._generate(n)[0]
+
+    def text(self, n):
+        """Generates document ``n`` as text with paragraphs.
+
+        Args:
+            n (int): Number of the document.
+
+        Returns:
+            The tokens separated by spaces, and paragraphs separated by newlines.
+        """
+        tokens = self.document(n)
+        rng = np.random.RandomState([self.random_state, n, 1])
+        paragraphs, start = [], 0
+        while start < len(tokens):
+            end = start + max(int(rng.exponential(self.paragraph_length)), 1)
+            paragraphs.append(' '.join(tokens[start:end]))
+            start = end
+        return '\n'.join(paragraphs)
+
+    def document_term_matrix(self, documents=None):
+        """Counts the tokens of the corpus.
+
+        Args:
+            documents (iterable, optional): Numbers of the documents. Defaults
+                to all documents.
+
+        Returns:
+            A SciPy CSR matrix of integer counts, shape ``(num_documents,
+            num_types)``.
+        """
+        if documents is None:
+            documents = range(self.num_documents)
+        indptr, indices, data = [0], [], []
+        for n in documents:
+            type_ids, counts = np.unique(self.type_ids(n), return_counts=True)
+            indices.append(type_ids.astype(np.int32))
+            data.append(counts.astype(np.int32))
+            indptr.append(indptr[-1] + len(type_ids))
+        if not indices:
+            return sparse.csr_matrix((0, self.num_types), dtype=np.int32)
+        return sparse.csr_matrix((np.concatenate(data), np.concatenate(indices), np.array(indptr)),
+                                 shape=(len(indptr) - 1, self.num_types))
+
+    def write(self, directory, documents_per_directory=10000):
+        """Writes the corpus to text files.
+
+        With this function you can write one ``.txt`` file per document, named \
+        by its label. Corpora with more than ``documents_per_directory`` \
+        documents are spread over numbered subdirectories.
+
+        Args:
+            directory (str): Output directory.
+            documents_per_directory (int, optional): Maximum number of files in
+                one directory. Defaults to 10000.
+
+        Returns:
+            A list of the paths of the text files.
+        """
+        pathlist = []
+        subdirectories = self.num_documents > documents_per_directory
+        log.info("Writing {} synthetic documents to {} ...".format(self.num_documents, directory))
+        for n in range(self.num_documents):
+            target = directory
+            if subdirectories:
+                target = os.path.join(directory, '{:04d}'.format(n // documents_per_directory))
+            if n % documents_per_directory == 0:
+                os.makedirs(target, exist_ok=True)
+            path = os.path.join(target, '{}.txt'.format(self.label(n)))
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.text(n))
+            pathlist.append(path)
+        return pathlist
+
+    def _generate(self, n):
+        if not 0 <= n < self.num_documents:
+            raise IndexError("There is no document {} in a corpus of {} documents.".format(n, self.num_documents))
+        rng = np.random.RandomState([self.random_state, n])
+        length = max(int(rng.lognormal(np.log(self.mean_length) - self.length_sigma ** 2 / 2, self.length_sigma)), 1)
+        doc_topic = rng.dirichlet(np.full(self.num_topics, self.alpha))
+        num_background = rng.binomial(length, self.background)
+        type_ids = [np.searchsorted(self._background_cdf, rng.random_sample(num_background))]
+        for topic, count in enumerate(rng.multinomial(length - num_background, doc_topic)):
+            if count:
+                positions = np.searchsorted(self._topic_cdfs[topic], rng.random_sample(count))
+                type_ids.append(self._topic_types[topic][positions])
+        type_ids = np.concatenate(type_ids)
+        rng.shuffle(type_ids)
+        return type_ids, doc_topic
+
+
+def _pseudo_words(num_types):
+    """Creates distinct pseudo-words, shortest first.
+
+    This private function is wrapped in :class:`SyntheticCorpus`. Types are \
+    numbered in bijective base 70 with syllables of a consonant and a vowel \
+    as digits, so the 70 most frequent types have one syllable.
+
+    Args:
+        num_types (int): Number of types.
+
+    Returns:
+        A NumPy array of str.
+
+    Example:
+        >>> _pseudo_words(72)[[0, 1, 69, 70, 71]].tolist()
+        ['ba', 'be', 'zu', 'baba', 'babe']
+    """
+    syllables = [consonant + vowel for consonant in CONSONANTS for vowel in VOWELS]
+    words = []
+    for rank in range(num_types):
+        word = []
+        rank += 1
+        while rank > 0:
+            rank, digit = divmod(rank - 1, len(syllables))
+            word.append(syllables[digit])
+        words.append(''.join(reversed(word)))
+    return np.array(words)
+
+
+def _cdf(weights):
+    """Normalizes weights to a cumulative distribution for sampling.
+
+    Args:
+        weights (numpy.ndarray): Non-negative weights.
+
+    Returns:
+        The cumulative distribution, ending at 1.
+    """
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    cdf[-1] = 1.0
+    return cdf
+
+
+def _main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m dariah_topics.synthetic',
+                                     description="Write a synthetic corpus with planted topics.")
+    parser.add_argument('directory', help="Output directory.")
+    parser.add_argument('--documents', type=int, default=10000)
+    parser.add_argument('--types', type=int, default=20000)
+    parser.add_argument('--topics', type=int, default=20)
+    parser.add_argument('--mean-length', type=float, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    corpus = SyntheticCorpus(args.documents, num_types=args.types, num_topics=args.topics,
+                             mean_length=args.mean_length, random_state=args.seed)
+    corpus.write(args.directory)
+
+
+if __name__ == '__main__':
+    _main()
@@ -12,17 +12,28 @@ Contents
 ********
     * :func:`call_commandline()` calls based on the elements of a list the command-\
         line.
+    * :func:`call_commandline_async()` is a coroutine calling the command-line \
+        without blocking, which streams ``stdout`` and ``stderr`` concurrently.
     * :class:`Mallet` is a class containing methods to call the NLP-tool MALLET.
     * :meth:`call_mallet()` calls MALLET with a specific executable and additional \
         parameteres.
+    * :meth:`call_mallet_async()` is a coroutine calling MALLET without blocking, \
+        with timeout and cancellation.
     * :meth:`import_corpus()` imports a text corpus to the specific MALLET corpus \
         format. Uses the executable ``import-dir``.
     * :meth:`train_topics()` creates a topic model with the imported text corpus. \
         Uses the executable ``train-topics``.
+    * :class:`MalletPool` runs several MALLET trainings concurrently and returns \
+        a future per job.
+    * :meth:`infer_topics()` infers topic distributions of new documents with \
+        a trained model. Uses the executable ``infer-topics``.
 
 """
 
+import asyncio
+import hashlib
 import itertools
+import json
 import logging
 import numpy as np
 import os
@@ -33,8 +44,10 @@ from dariah_topics import postprocessing
 import shutil
 import string
 from platform import system
-from subprocess import Popen, PIPE
+import threading
+from subprocess import CompletedProcess, Popen, PIPE, TimeoutExpired
 import tempfile
+import time
 
 log = logging.getLogger('dariah_topics')
 
@@ -58,7 +71,8 @@ def _decode(std):
     return [line.decode('utf-8').replace('\n', '') for line in std]
 
 
-def call_commandline(cmd, stdin=None, stdout='pipe', stderr='pipe', communicate=False, logfile=False):
+def call_commandline(cmd, stdin=None, stdout='pipe', stderr='pipe', communicate=False, logfile=False,
+                     callback=None):
     """Calls the command-line from within Python.
     
     With this function you can call the command-line with a specific command. Each \
@@ -74,6 +88,8 @@ def call_commandline(cmd, stdin=None, stdout='pipe', stderr='pipe', communicate=
         logfile (bool), optional: If True, a logfile (``commandline.log``) will
             be created. Otherwise ``stdout`` (and ``stderr``, respectively) will
             be printed as logging to the console (level: INFO).
+        callback (callable), optional: Called with each decoded line of ``stderr``
+            as soon as it is read, e.g. to follow the progress. Defaults to None.
         
     Returns:
         :class:`Popen` object of the subprocess.
@@ -95,7 +111,11 @@ def call_commandline(cmd, stdin=None, stdout='pipe', stderr='pipe', communicate=
     log.info("Calling the command-line: {0} ...".format(' '.join(cmd)))
 
     process = Popen(cmd, stdin=stdin, stdout=stdout, stderr=stderr)
-    decoded_stderr = _decode(process.stderr)
+    decoded_stderr = []
+    for line in process.stderr:
+        decoded_stderr.extend(_decode([line]))
+        if callback is not None:
+            callback(decoded_stderr[-1])
 
     if communicate:
         decoded_stderr = _decode(process.stderr)
@@ -113,6 +133,206 @@ def call_commandline(cmd, stdin=None, stdout='pipe', stderr='pipe', communicate=
     return process
 
 
+async def call_commandline_async(cmd, callback=None, stdout_callback=None, timeout=None, stdin=None, env=None):
+    """Calls the command-line from within an event loop.
+
+    With this coroutine you can call the command-line without blocking, e.g. to \
+    run several MALLET jobs from one event loop. ``stdout`` and ``stderr`` are \
+    read concurrently line by line, so neither pipe can fill up and block the \
+    subprocess. Each line is logged (level: INFO) and passed to the callbacks \
+    as soon as it is read. If the call times out or the awaiting task is \
+    cancelled, the subprocess is terminated.
+
+    Args:
+        cmd (list): A list of command-line arguments.
+        callback (callable, optional): Called with each decoded line of ``stderr``.
+            Defaults to None.
+        stdout_callback (callable, optional): Called with each decoded line of
+            ``stdout``. Defaults to None.
+        timeout (float, optional): Maximum number of seconds the subprocess may
+            run. Defaults to None.
+        stdin (bytes, optional): Value written to ``stdin``. Defaults to None.
+        env (dict, optional): Environment variables, which are set in addition
+            to the environment of the current process. Defaults to None.
+
+    Returns:
+        :class:`subprocess.CompletedProcess` with the return code and the lists
+            of decoded lines of ``stdout`` and ``stderr``.
+
+    Raises:
+        :class:`subprocess.TimeoutExpired`, if the subprocess runs longer than
+            ``timeout``.
+
+    Example:
+        >>> import sys
+        >>> result = asyncio.run(call_commandline_async([sys.executable, '-c', 'print("output")']))
+        >>> result.returncode, result.stdout
+        (0, ['output'])
+    """
+    cmd = [str(arg) for arg in cmd]
+    log.info("Calling the command-line: {0} ...".format(' '.join(cmd)))
+    if env is not None:
+        env = dict(os.environ, **env)
+    process = await asyncio.create_subprocess_exec(*cmd, stdin=PIPE if stdin is not None else None,
+                                                   stdout=PIPE, stderr=PIPE, env=env)
+    stdout, stderr = [], []
+
+    async def read(stream, lines, line_callback):
+        async for line in stream:
+            line = _decode([line])[0]
+            lines.append(line)
+            log.info(line)
+            if line_callback is not None:
+                line_callback(line)
+
+    async def communicate():
+        if stdin is not None:
+            process.stdin.write(stdin)
+            await process.stdin.drain()
+            process.stdin.close()
+        await asyncio.gather(read(process.stdout, stdout, stdout_callback),
+                             read(process.stderr, stderr, callback))
+        return await process.wait()
+
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _terminate(process)
+        raise TimeoutExpired(cmd, timeout, output='\n'.join(stdout), stderr='\n'.join(stderr))
+    except asyncio.CancelledError:
+        await _terminate(process)
+        raise
+    return CompletedProcess(cmd, returncode, stdout, stderr)
+
+
+async def _terminate(process, grace_period=5):
+    """Terminates a subprocess, and kills it if it does not exit in time.
+
+    This private coroutine is wrapped in :func:`call_commandline_async()`.
+
+    Args:
+        process (asyncio.subprocess.Process): The subprocess.
+        grace_period (float, optional): Seconds to wait after terminating.
+            Defaults to 5.
+
+    Returns:
+        None.
+    """
+    if process.returncode is None:
+        log.info("Terminating process {} ...".format(process.pid))
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), grace_period)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+    return None
+
+
+def _import_hasher(executable, kwargs):
+    """Starts the hash of a MALLET import.
+
+    This private function is wrapped in :meth:`Mallet.import_tokenized_corpus()`.
+
+    Args:
+        executable (str): Path to the MALLET executable.
+        kwargs (dict): Arguments for ``import-dir``.
+
+    Returns:
+        A :class:`hashlib.sha256` object.
+    """
+    hasher = hashlib.sha256()
+    arguments = sorted((option, str(value)) for option, value in kwargs.items())
+    hasher.update(json.dumps([executable, arguments]).encode('utf-8'))
+    return hasher
+
+
+def _update_corpus_hash(hasher, tokenized_corpus, document_labels, generate=False):
+    """Feeds documents and their labels into a hash.
+
+    This private function is wrapped in :meth:`Mallet.import_tokenized_corpus()`. \
+    Each document is hashed as it is written to its text file.
+
+    Args:
+        hasher (hashlib.sha256): The hash.
+        tokenized_corpus (iterable): Tokenized corpus containing one or more
+            iterables containing tokens.
+        document_labels (list): Name of each document.
+        generate (bool, optional): If True, a generator is returned, which hashes
+            the documents while yielding them. Defaults to False.
+
+    Returns:
+        None, or a generator of documents.
+
+    Example:
+        >>> first, second = hashlib.sha256(), hashlib.sha256()
+        >>> _update_corpus_hash(first, [['a', 'b']], ['label'])
+        >>> list(_update_corpus_hash(second, iter([['a', 'b']]), ['label'], generate=True))
+        [['a', 'b']]
+        >>> first.hexdigest() == second.hexdigest()
+        True
+    """
+    def documents():
+        for document_label, tokenized_document in zip(document_labels, tokenized_corpus):
+            tokenized_document = list(tokenized_document)
+            hasher.update(str(document_label).encode('utf-8') + b'\x00')
+            hasher.update('\n'.join(tokenized_document).encode('utf-8') + b'\x01')
+            yield tokenized_document
+
+    if generate:
+        return documents()
+    for _ in documents():
+        pass
+    return None
+
+
+def _evict_cache(cache_dir, max_size=None, max_age=None, keep=None):
+    """Removes old and least recently used files from a cache directory.
+
+    This private function is wrapped in :meth:`Mallet.import_tokenized_corpus()`.
+
+    Args:
+        cache_dir (str): The cache directory.
+        max_size (int, optional): Maximum size of all files in bytes. Defaults
+            to None.
+        max_age (float, optional): Maximum age of a file in seconds, since it
+            was used last. Defaults to None.
+        keep (str, optional): Path to a file, which is never removed. Defaults
+            to None.
+
+    Returns:
+        A list of removed files.
+
+    Example:
+        >>> with tempfile.TemporaryDirectory() as tmpdir:
+        ...     for n, name in enumerate(['old.mallet', 'new.mallet']):
+        ...         with open(os.path.join(tmpdir, name), 'wb') as file:
+        ...             _ = file.write(b'0' * 10)
+        ...         os.utime(os.path.join(tmpdir, name), (n, n))
+        ...     [os.path.basename(path) for path in _evict_cache(tmpdir, max_size=15)]
+        ['old.mallet']
+    """
+    files = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.mallet') and os.path.isfile(path):
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    removed = []
+    total = sum(size for _, size, _ in files)
+    now = time.time()
+    for mtime, size, path in files:
+        too_old = max_age is not None and now - mtime > max_age
+        too_large = max_size is not None and total > max_size
+        if path != keep and (too_old or too_large):
+            log.info("Evicting {} from the MALLET cache ...".format(path))
+            os.remove(path)
+            removed.append(path)
+            total -= size
+    return removed
+
+
 def _check_whitespace(string):
     """Checks if whitespaces are in a string.
     
@@ -158,25 +378,68 @@ def _check_mallet_output(keyword, kwargs=None):
         raise OSError("MALLET did not produce any output files. Maybe check your args?")
 
 
+def _find_executable(executable, caller):
+    """Resolves the path of the MALLET executable.
+
+    This private function is wrapped in :class:`Mallet` and :class:`MalletPool`.
+
+    Args:
+        executable (str): Name of or path to the executable.
+        caller (str): Name of the calling class, for the error message.
+
+    Returns:
+        The absolute path of the executable.
+
+    Raises:
+        FileNotFoundError, if the executable is not found.
+    """
+    path = shutil.which(executable)
+    if path is None:
+        raise FileNotFoundError(("The executable '{0}' could not be found.\n"
+                                 "Either place the executable into the $PATH or call "
+                                 "{1}(executable='/path/to/mallet')").format(executable, caller))
+    return path
+
+
 class Mallet:
     """Python wrapper for MALLET.
     
     With this class you can call the command-line tool `MALLET <http://mallet.cs.umass.edu/topics.php>`_ \
     from within Python.
+
+    If ``cache_dir`` is set, corpora imported with :meth:`import_tokenized_corpus()` \
+    are kept there, named after a hash of the documents, their labels and the \
+    import arguments. Importing the same corpus again returns the cached file \
+    at once. The least recently used files are evicted, if the cache exceeds \
+    ``cache_max_size`` bytes, and files older than ``cache_max_age`` seconds \
+    are removed.
+
+    Args:
+        executable (str, optional): The MALLET executable. Defaults to ``mallet``.
+        corpus_output (str, optional): Directory for the documents and the
+            imported corpus. Defaults to a temporary directory.
+        logfile (bool, optional): If True, a logfile (``commandline.log``) will
+            be created. Defaults to False.
+        cache_dir (str, optional): Directory of the import cache. Defaults to
+            None, i.e. no caching.
+        cache_max_size (int, optional): Maximum size of the cache in bytes.
+            Defaults to None.
+        cache_max_age (float, optional): Maximum age of cached files in seconds.
+            Defaults to None.
     """
-    def __init__(self, executable='mallet', corpus_output=None, logfile=False):
-        self.executable = shutil.which(executable)
-        if self.executable is None:
-            raise FileNotFoundError(("The executable '{0}' could not be found.\n"
-                                     "Either place the executable into the $PATH or call "
-                                     "{1}(executable='/path/to/mallet')").format(executable, self.__class__.__name__))
+    def __init__(self, executable='mallet', corpus_output=None, logfile=False, cache_dir=None,
+                 cache_max_size=None, cache_max_age=None):
+        self.executable = _find_executable(executable, self.__class__.__name__)
         if corpus_output is None:
             self.corpus_output = tempfile.mkdtemp()
         else:
             self.corpus_output = corpus_output
         self.logfile = logfile
+        self.cache_dir = cache_dir
+        self.cache_max_size = cache_max_size
+        self.cache_max_age = cache_max_age
 
-    def call_mallet(self, command, **kwargs):
+    def call_mallet(self, command, callback=None, **kwargs):
         """Calls the command-line tool MALLET.
         
         With this function you can call `MALLET <http://mallet.cs.umass.edu/topics.php>`_ \
@@ -200,6 +463,8 @@ class Mallet:
                 based on frequency or information gain), ``split`` (divide data
                 into testing, training, and validation portions), ``bulk-load``
                 (for big input files, efficiently prune vocabulary and import docs).
+            callback (callable): Called with each line MALLET writes to ``stderr``,
+                see :func:`call_commandline()`. Defaults to None.
 
         Returns:
             :class:`Popen` object of the MALLET subprocess.
@@ -215,6 +480,50 @@ class Mallet:
             True
             True
             """
+        args = self._mallet_args(command, kwargs)
+            
+        if self.logfile:
+            communicate = True
+        else:
+            communicate = False
+        
+        return call_commandline(args, communicate=communicate, logfile=self.logfile, callback=callback)
+
+    async def call_mallet_async(self, command, callback=None, stdout_callback=None, timeout=None, env=None,
+                                **kwargs):
+        """Calls the command-line tool MALLET from within an event loop.
+        
+        This is the non-blocking counterpart of :meth:`call_mallet()`, see \
+        :func:`call_commandline_async()`. Await it, or wrap it in a task to run \
+        several MALLET jobs concurrently; cancelling the task terminates MALLET.
+        
+        Args:
+            command (str): A MALLET command, see :meth:`call_mallet()`.
+            callback (callable): Called with each line MALLET writes to ``stderr``,
+                e.g. its progress. Defaults to None.
+            stdout_callback (callable): Called with each line MALLET writes to
+                ``stdout``. Defaults to None.
+            timeout (float): Maximum number of seconds MALLET may run. Defaults
+                to None.
+            env (dict): Additional environment variables, e.g. ``MALLET_MEMORY``.
+                Defaults to None.
+            
+        Returns:
+            :class:`subprocess.CompletedProcess` of the MALLET subprocess.
+
+        Raises:
+            :class:`subprocess.TimeoutExpired`, if MALLET runs longer than ``timeout``.
+        """
+        args = self._mallet_args(command, kwargs)
+        result = await call_commandline_async(args, callback=callback, stdout_callback=stdout_callback,
+                                              timeout=timeout, env=env)
+        if self.logfile:
+            log.info("Check commandline.log in '{0}' for logging.".format(os.getcwd()))
+            with open('commandline.log', 'w', encoding='utf-8') as file:
+                file.write('\n'.join(result.stdout + result.stderr))
+        return result
+
+    def _mallet_args(self, command, kwargs):
         args = [self.executable, command]
         for option, value in kwargs.items():
             args.append('--' + option.replace('_', '-'))
@@ -223,13 +532,7 @@ class Mallet:
                  
         if not all(_check_whitespace(arg) for arg in args):
             raise ValueError("Whitespaces are not allowed in '{0}'".format(args))
-            
-        if self.logfile:
-            communicate = True
-        else:
-            communicate = False
-        
-        return call_commandline(args, communicate=communicate, logfile=self.logfile)
+        return args
 
     def import_tokenized_corpus(self, tokenized_corpus, document_labels, **kwargs):
         """Creates MALLET corpus model.
@@ -289,14 +592,49 @@ class Mallet:
             True
         """
         corpus_file = os.path.join(self.corpus_output, 'corpus.mallet')
-        postprocessing.save_tokenized_corpus(tokenized_corpus, document_labels, self.corpus_output)
+        if self.cache_dir is None:
+            postprocessing.save_tokenized_corpus(tokenized_corpus, document_labels, self.corpus_output)
+        else:
+            document_labels = list(document_labels)
+            hasher = _import_hasher(self.executable, kwargs)
+            if isinstance(tokenized_corpus, (list, tuple)):
+                _update_corpus_hash(hasher, tokenized_corpus, document_labels)
+                cached_file = self._cached_import(hasher.hexdigest())
+                if cached_file is not None:
+                    return cached_file
+                postprocessing.save_tokenized_corpus(tokenized_corpus, document_labels, self.corpus_output)
+            else:
+                documents = _update_corpus_hash(hasher, tokenized_corpus, document_labels, generate=True)
+                postprocessing.save_tokenized_corpus(documents, document_labels, self.corpus_output)
+                cached_file = self._cached_import(hasher.hexdigest())
+                if cached_file is not None:
+                    return cached_file
         self.call_mallet('import-dir', keep_sequence=None, input=self.corpus_output, output=corpus_file, **kwargs)
         
         _check_mallet_output(os.path.join(self.corpus_output, 'corpus.mallet'))  
         
+        if self.cache_dir is not None:
+            return self._cache_import(corpus_file, hasher.hexdigest())
         return corpus_file
 
-    def train_topics(self, mallet_binary, cleanup=False, **kwargs):
+    def _cached_import(self, key):
+        cached_file = os.path.join(self.cache_dir, '{}.mallet'.format(key))
+        if not os.path.exists(cached_file):
+            return None
+        log.info("Reusing cached MALLET corpus {} ...".format(cached_file))
+        os.utime(cached_file)
+        return cached_file
+
+    def _cache_import(self, corpus_file, key):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cached_file = os.path.join(self.cache_dir, '{}.mallet'.format(key))
+        temporary_file = '{}.{}.tmp'.format(cached_file, os.getpid())
+        shutil.copyfile(corpus_file, temporary_file)
+        os.replace(temporary_file, cached_file)
+        _evict_cache(self.cache_dir, self.cache_max_size, self.cache_max_age, keep=cached_file)
+        return cached_file
+
+    def train_topics(self, mallet_binary, cleanup=False, callback=None, **kwargs):
         """Trains LDA model.
         
         With this function you can train a topic model. The MALLET command for \
@@ -305,9 +643,13 @@ class Mallet:
         parameters.
         
         Args:
-            mallet_binary (str): Path to MALLET corpus model.
+            mallet_binary (str): Path to MALLET corpus model. Can be None, if
+                training continues from ``input_model``.
             cleanup (bool): If True, the directory ``corpus_output`` will be removed
                 after modeling.
+            callback (callable): Called with each progress line MALLET writes to
+                ``stderr``, e.g. :meth:`dariah_topics.modeling.TrainingMonitor.parse_mallet()`.
+                Defaults to None.
             input_model (str): The filename from which to read the binary topic
                 model.
             input_state (str): The filename from which to read the gzipped Gibbs
@@ -387,10 +729,188 @@ class Mallet:
             >>> os.path.exists('model.mallet')
             True
         """
-        self.call_mallet('train-topics', input=mallet_binary, **kwargs)
+        if mallet_binary is not None:
+            kwargs['input'] = mallet_binary
+        self.call_mallet('train-topics', callback=callback, **kwargs)
         
         _check_mallet_output('output', kwargs)
 
         if cleanup:
             shutil.rmtree(self.corpus_output)
 
+    def infer_topics(self, inferencer, mallet_binary, cleanup=False, **kwargs):
+        """Infers topic distributions of new documents.
+        
+        With this function you can apply a trained topic model to new documents. \
+        The MALLET command for this step is ``infer-topics``. The new documents \
+        have to be imported with the pipe of the training corpus, i.e. with \
+        ``use_pipe_from`` in :meth:`import_tokenized_corpus()`.
+        
+        Args:
+            inferencer (str): Path to the inferencer, written by :meth:`train_topics()`
+                with ``inferencer_filename``.
+            mallet_binary (str): Path to MALLET corpus model of the new documents.
+            cleanup (bool): If True, the directory ``corpus_output`` will be removed
+                after inference.
+            output_doc_topics (str): The filename in which to write the inferred
+                topic proportions per document.
+            num_iterations (int): Number of sampling iterations. Defaults to 100.
+            burn_in (int): Number of iterations before the first sample is
+                saved. Defaults to 10.
+            sample_interval (int): Number of iterations between samples. Defaults
+                to 10.
+            doc_topics_threshold (float): Do not print topics with proportions less
+                than this threshold value. Defaults to 0.0.
+            random_seed (int): Random seed for the Gibbs sampler. Defaults to 0.
+            
+        Returns:
+            None.
+        """
+        self.call_mallet('infer-topics', inferencer=inferencer, input=mallet_binary, **kwargs)
+        
+        _check_mallet_output('output', kwargs)
+
+        if cleanup:
+            shutil.rmtree(self.corpus_output)
+
+
+class MalletPool:
+    """Runs MALLET trainings concurrently.
+
+    With this class you can submit many MALLET jobs at once instead of running \
+    them one after another. At most ``max_workers`` jobs run at the same time, \
+    driven by an event loop in a background thread with \
+    :meth:`Mallet.call_mallet_async()`. Every job imports its corpus into its \
+    own temporary ``corpus_output`` directory, gets its own ``num_threads`` \
+    and JVM heap size, and is retried ``retries`` times if MALLET fails. The \
+    heap size is passed in the environment variable ``MALLET_MEMORY``, which \
+    is read by MALLET's launcher script. The documents are written only once, \
+    so a retry imports the same files again and ``tokenized_corpus`` may be a \
+    generator. Use it as context manager, which waits for all jobs on exit.
+
+    Args:
+        executable (str, optional): The MALLET executable. Defaults to ``mallet``.
+        max_workers (int, optional): Maximum number of concurrent jobs. Defaults
+            to 2.
+        memory (str, optional): Default JVM heap size per job, e.g. ``4g``.
+            Defaults to None, i.e. MALLET's default.
+        retries (int, optional): Number of retries of a failed job. Defaults to 1.
+        timeout (float, optional): Maximum number of seconds per MALLET call.
+            Defaults to None.
+    """
+    def __init__(self, executable='mallet', max_workers=2, memory=None, retries=1, timeout=None):
+        self.executable = _find_executable(executable, self.__class__.__name__)
+        self.max_workers = max_workers
+        self.memory = memory
+        self.retries = retries
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def train_topics(self, tokenized_corpus=None, document_labels=None, mallet_binary=None, num_threads=1,
+                     memory=None, callback=None, import_kwargs=None, cleanup=True, **kwargs):
+        """Submits a MALLET training.
+
+        Pass either ``tokenized_corpus`` and ``document_labels``, which are \
+        imported with ``import-dir`` first, or an imported ``mallet_binary``. \
+        Cancelling the returned future terminates MALLET.
+
+        Args:
+            tokenized_corpus (list, optional): Tokenized corpus containing one or
+                more iterables containing tokens.
+            document_labels (list, optional): Name of each document.
+            mallet_binary (str, optional): Path to a MALLET corpus model.
+            num_threads (int, optional): Number of threads of this job. Defaults
+                to 1.
+            memory (str, optional): JVM heap size of this job. Defaults to the
+                pool's ``memory``.
+            callback (callable, optional): Called with each line MALLET writes to
+                ``stderr``. Defaults to None.
+            import_kwargs (dict, optional): Additional arguments for ``import-dir``.
+                Defaults to None.
+            cleanup (bool, optional): If True, the temporary ``corpus_output`` is
+                removed after the job. Defaults to True.
+            **kwargs: Additional arguments for ``train-topics``, see
+                :meth:`Mallet.train_topics()`.
+
+        Returns:
+            A :class:`concurrent.futures.Future`, whose result is the
+            :class:`subprocess.CompletedProcess` of ``train-topics``.
+        """
+        job = self._train_topics(tokenized_corpus, document_labels, mallet_binary, num_threads,
+                                 memory or self.memory, callback, import_kwargs or {}, cleanup, kwargs)
+        return asyncio.run_coroutine_threadsafe(job, self._loop)
+
+    def shutdown(self, cancel=False):
+        """Waits for the submitted jobs and stops the event loop.
+
+        Args:
+            cancel (bool, optional): If True, running and waiting jobs are
+                cancelled instead. Defaults to False.
+
+        Returns:
+            None.
+        """
+        async def finish():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if cancel:
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(finish(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+        return None
+
+    async def _train_topics(self, tokenized_corpus, document_labels, mallet_binary, num_threads, memory,
+                            callback, import_kwargs, cleanup, kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        env = {'MALLET_MEMORY': memory} if memory is not None else None
+        async with self._semaphore:
+            corpus_output = tempfile.mkdtemp(prefix='mallet_')
+            mallet = Mallet(self.executable, corpus_output=corpus_output)
+            try:
+                if mallet_binary is None:
+                    await asyncio.get_running_loop().run_in_executor(None, postprocessing.save_tokenized_corpus,
+                                                                     tokenized_corpus, document_labels,
+                                                                     corpus_output)
+                for attempt in range(self.retries + 1):
+                    try:
+                        if mallet_binary is None:
+                            mallet_binary = await self._import(mallet, import_kwargs, env)
+                        result = await mallet.call_mallet_async('train-topics', callback=callback, env=env,
+                                                                timeout=self.timeout, input=mallet_binary,
+                                                                num_threads=num_threads, **kwargs)
+                        if result.returncode != 0:
+                            raise OSError("MALLET exited with {}: {}".format(result.returncode,
+                                                                            ' '.join(result.stderr[-3:])))
+                        _check_mallet_output('output', kwargs)
+                        return result
+                    except (OSError, TimeoutExpired) as error:
+                        if attempt == self.retries:
+                            raise
+                        log.warning("MALLET job failed ({}), retrying ...".format(error))
+            finally:
+                if cleanup:
+                    shutil.rmtree(corpus_output, ignore_errors=True)
+
+    async def _import(self, mallet, import_kwargs, env):
+        corpus_file = os.path.join(mallet.corpus_output, 'corpus.mallet')
+        result = await mallet.call_mallet_async('import-dir', env=env, timeout=self.timeout, keep_sequence=None,
+                                                input=mallet.corpus_output, output=corpus_file, **import_kwargs)
+        if result.returncode != 0:
+            raise OSError("MALLET exited with {}: {}".format(result.returncode, ' '.join(result.stderr[-3:])))
+        _check_mallet_output(corpus_file)
+        return corpus_file
@@ -34,29 +34,29 @@ Contents
 
 import logging
 from dariah_topics import postprocessing
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from matplotlib import cm
 import numpy as np
 import os
 import pandas as pd
-from bokeh.plotting import figure
-from bokeh import palettes
-from bokeh.models import (
-            ColumnDataSource,
-            HoverTool,
-            LinearColorMapper,
-            BasicTicker,
-            ColorBar
-            )
-
 from collections import Counter
 
 
 log = logging.getLogger('dariah_topics')
 
 
+def _pyplot():
+    """Imports :module:`matplotlib.pyplot` with the ``Agg`` backend.
+
+    Matplotlib is imported on the first static plot, not with this module.
+
+    Returns:
+        The :module:`matplotlib.pyplot` module.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
 class PlotDocumentTopics:
     """
     Class to visualize document-topic matrix.
@@ -92,7 +92,7 @@ class PlotDocumentTopics:
         Returns:
             Figure object.
         """
-        fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+        fig, ax = _pyplot().subplots(figsize=figsize, dpi=dpi)
         heatmap = ax.pcolor(self.document_topics, cmap=cmap)
         ax.set_xlabel(xlabel, fontsize=labels_fontsize)
         ax.set_ylabel(ylabel, fontsize=labels_fontsize)
@@ -136,7 +136,7 @@ class PlotDocumentTopics:
         Returns:
             Figure object.
         """
-        fig, ax = plt.subplots(figsize=figsize, dpi=dpi) 
+        fig, ax = _pyplot().subplots(figsize=figsize, dpi=dpi) 
         if isinstance(index, int):
             if transpose_data:
                 proportions = self.document_topics.T.iloc[index]
@@ -225,7 +225,7 @@ class PlotDocumentTopics:
         """
         return self.__static_barchart(transpose_data=True, **kwargs)
 
-    def interactive_heatmap(self, palette=palettes.Blues[9], reverse_palette=True,
+    def interactive_heatmap(self, palette=None, reverse_palette=True,
                             tools='hover, pan, reset, save, wheel_zoom, zoom_in, zoom_out',
                             width=1000, height=550, x_axis_location='below', toolbar_location='above',
                             sizing_mode='fixed', line_color=None, grid_line_color=None, axis_line_color=None,
@@ -260,6 +260,11 @@ class PlotDocumentTopics:
         Returns:
             Figure object.
         """        
+        from bokeh.plotting import figure
+        from bokeh import palettes
+        from bokeh.models import ColumnDataSource, HoverTool, LinearColorMapper, BasicTicker, ColorBar
+        if palette is None:
+            palette = palettes.Blues[9]
         if reverse_palette:
             palette = list(reversed(palette))
 
@@ -362,6 +367,8 @@ class PlotDocumentTopics:
         x_axis = proportions
         y_range = list(proportions.index)
 
+        from bokeh.plotting import figure
+        from bokeh.models import ColumnDataSource, HoverTool
         source = ColumnDataSource(dict(Describer=y_range, Proportion=x_axis))
 
         fig = figure(y_range=y_range, title=plot_title, plot_width=width, plot_height=height,
@@ -476,6 +483,7 @@ class PlotDocumentTopics:
                 Doctest
 
         """
+        plt = _pyplot()
         years = list(range(starttime, endtime))
 
         for topiclabel in self.document_topics.index.values:
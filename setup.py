@@ -19,11 +19,14 @@ setup(
     license='Apache 2.0',
     classifiers=[
         'Development Status :: 3 - Alpha',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6'
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11'
     ],
     keywords=['topic modeling', 'lda', 'natural language processing', 'digital humanities'],
+    python_requires='>=3.8',
     packages=find_packages(exclude=['docs', 'test', 'notebooks']),
     install_requires=[
         'pandas>=0.19.2',
@@ -37,6 +40,9 @@ setup(
         'metadata_toolbox',
         'cophi_toolbox>=0.1.1.dev0'
     ],
+    entry_points={
+        'console_scripts': ['dariah-topics=dariah_topics.pipeline:main']
+    },
     command_options={
         'build_sphinx': {
             'project': ('setup.py', PROJECT),
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.run import main, read_history
+
+
+def test_benchmark_history_compares_runs():
+    """every run is appended to the history and compared with the previous one"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        history = os.path.join(tmpdir, 'history.jsonl')
+        arguments = ['--scales', '0.05', '0.1', '--repeat', '1', '--filter', 'Tokenize', '--history', history]
+        assert main(arguments) == 0
+        assert main(arguments + ['--threshold', '1e6', '--fail-on-regression']) == 0
+        runs = read_history(history)
+    assert len(runs) == 2
+    assert {(result['benchmark'], result['scale']) for result in runs[1]['results']} == \
+        {('Tokenize.time_tokenize', 0.05), ('Tokenize.time_segment', 0.05),
+         ('Tokenize.time_tokenize', 0.1), ('Tokenize.time_segment', 0.1)}
+    assert all(result['seconds'] > 0 for result in runs[1]['results'])
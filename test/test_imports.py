@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+HEAVY_DEPENDENCIES = {'gensim', 'lda', 'matplotlib', 'bokeh'}
+BUDGET = float(os.environ.get('DARIAH_TOPICS_IMPORT_BUDGET', 1.5))
+
+
+def _importtime(module):
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    imported, cumulative = set(), 0
+    for line in stderr.splitlines():
+        _, microseconds, name = line[len('import time:'):].split('|')
+        if microseconds.strip().isdigit():
+            imported.add(name.strip().split('.')[0])
+            if name.strip() == module:
+                cumulative = int(microseconds) / 1e6
+    return imported, cumulative
+
+
+def test_import_time_budget():
+    """modules load without heavy dependencies and within the budget"""
+    for module in ['dariah_topics', 'dariah_topics.preprocessing', 'dariah_topics.postprocessing',
+                   'dariah_topics.modeling', 'dariah_topics.utils', 'dariah_topics.visualization']:
+        imported, seconds = _importtime(module)
+        assert not imported & HEAVY_DEPENDENCIES, (module, imported & HEAVY_DEPENDENCIES)
+        assert seconds < BUDGET, (module, seconds)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from dariah_topics.modeling import AliasLDA, DistributedGibbsLDA, GibbsLDA, OnlineLDA, lda, _propose
+import numpy as np
+
+
+def _document_term_matrix(num_documents=20, num_types=30, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.poisson(1.0, size=(num_documents, num_types))
+
+
+def test_gibbs_counts_consistent():
+    """count tables match the topic assignments after sampling"""
+    document_term_matrix = _document_term_matrix()
+    model = GibbsLDA(n_topics=4, n_iter=10, random_state=1).fit(document_term_matrix)
+    assert model.topic_assignments_.dtype == np.int32
+    assert model.nzw_.sum() == document_term_matrix.sum()
+    assert np.array_equal(model.nzw_.sum(axis=0), document_term_matrix.sum(axis=0))
+    assert np.array_equal(model.ndz_.sum(axis=1), document_term_matrix.sum(axis=1))
+    assert np.array_equal(model.nz_, np.bincount(model.topic_assignments_, minlength=4))
+    assert np.allclose(model.doc_topic_.sum(axis=1), 1)
+    assert np.allclose(model.topic_word_.sum(axis=1), 1)
+
+
+def test_gibbs_reproducible():
+    """same seed, same topic assignments"""
+    document_term_matrix = _document_term_matrix()
+    first = GibbsLDA(n_topics=4, n_iter=5, random_state=42).fit(document_term_matrix)
+    second = GibbsLDA(n_topics=4, n_iter=5, random_state=42).fit(document_term_matrix)
+    assert np.array_equal(first.topic_assignments_, second.topic_assignments_)
+    assert first.tokens_per_second_ > 0
+
+
+def test_gibbs_separates_topics():
+    """two disjoint vocabularies end up in two topics"""
+    document_term_matrix = np.zeros((10, 10), dtype=int)
+    document_term_matrix[:5, :5] = 5
+    document_term_matrix[5:, 5:] = 5
+    model = lda(document_term_matrix, 2, iterations=50, implementation='gibbs', random_state=0)
+    dominant = model.doc_topic_.argmax(axis=1)
+    assert len(set(dominant[:5])) == 1 and len(set(dominant[5:])) == 1
+    assert dominant[0] != dominant[5]
+
+
+def test_proposal_distribution():
+    """topics are drawn proportional to the counts of a group plus the prior"""
+    topic_assignments = np.array([2, 0, 2, 2, 1, 1])
+    order = np.array([4, 0, 2, 1, 3, 5])
+    rands = np.random.RandomState(0).random_sample(200000)
+    topics = _propose(rands, np.zeros(len(rands), dtype=int), np.array([1]), np.array([4]), order,
+                      topic_assignments, 0.5, 5)
+    expected = np.array([1, 0, 3, 0, 0]) + 0.5
+    assert np.allclose(np.bincount(topics, minlength=5) / len(rands), expected / expected.sum(), atol=0.005)
+
+
+def test_alias_faster_than_gibbs_with_many_topics():
+    """throughput of the Metropolis-Hastings sampler beats Gibbs sampling at 500 topics"""
+    document_term_matrix = np.random.RandomState(0).poisson(0.2, size=(100, 1000))
+    gibbs = GibbsLDA(n_topics=500, n_iter=2, random_state=0).fit(document_term_matrix)
+    alias = AliasLDA(n_topics=500, n_iter=4, random_state=0).fit(document_term_matrix)
+    assert alias.tokens_per_second_ > 2 * gibbs.tokens_per_second_
+
+
+def test_alias_counts_consistent():
+    """count tables match the topic assignments after sampling"""
+    document_term_matrix = _document_term_matrix()
+    model = AliasLDA(n_topics=8, n_iter=10, random_state=1).fit(document_term_matrix)
+    assert np.array_equal(model.nzw_.sum(axis=0), document_term_matrix.sum(axis=0))
+    assert np.array_equal(model.ndz_.sum(axis=1), document_term_matrix.sum(axis=1))
+    assert np.array_equal(model.nz_, np.bincount(model.topic_assignments_, minlength=8))
+
+
+def test_alias_separates_topics():
+    """two disjoint vocabularies end up in two topics"""
+    document_term_matrix = np.zeros((10, 10), dtype=int)
+    document_term_matrix[:5, :5] = 5
+    document_term_matrix[5:, 5:] = 5
+    model = lda(document_term_matrix, 2, iterations=50, implementation='alias', random_state=0)
+    dominant = model.doc_topic_.argmax(axis=1)
+    assert len(set(dominant[:5])) == 1 and len(set(dominant[5:])) == 1
+    assert dominant[0] != dominant[5]
+
+
+def test_distributed_counts_consistent():
+    """merged counts match the topic assignments of all partitions"""
+    document_term_matrix = _document_term_matrix()
+    model = DistributedGibbsLDA(n_topics=4, n_iter=5, random_state=1, n_jobs=3).fit(document_term_matrix)
+    assert np.array_equal(model.nzw_.sum(axis=0), document_term_matrix.sum(axis=0))
+    assert np.array_equal(model.ndz_.sum(axis=1), document_term_matrix.sum(axis=1))
+    assert np.array_equal(model.nz_, np.bincount(model.topic_assignments_, minlength=4))
+    again = DistributedGibbsLDA(n_topics=4, n_iter=5, random_state=1, n_jobs=3).fit(document_term_matrix)
+    assert np.array_equal(model.topic_assignments_, again.topic_assignments_)
+
+
+def test_online_learns_from_stream():
+    """two disjoint vocabularies end up in two topics, checkpoint is written"""
+    import os
+    import tempfile
+    rng = np.random.RandomState(0)
+    stream = (rng.randint(0, 5, 20) if n % 2 else rng.randint(5, 10, 20) for n in range(400))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        checkpoint = os.path.join(tmpdir, 'online.npz')
+        model = OnlineLDA(n_topics=2, n_types=10, batch_size=20, tau0=1, total_documents=400,
+                          random_state=0, checkpoint=checkpoint, checkpoint_interval=5).fit(stream)
+        assert os.path.exists(checkpoint)
+        assert int(np.load(checkpoint)['update_count']) == 20
+    dominant = model.topic_word_.argmax(axis=0)
+    assert len(set(dominant[:5])) == 1 and len(set(dominant[5:])) == 1
+    assert dominant[0] != dominant[5]
+    doc_topic = model.transform([np.arange(5), np.arange(5, 10)])
+    assert doc_topic[0].argmax() != doc_topic[1].argmax()
+
+
+def test_online_scales_to_the_corpus_size():
+    """fit takes the number of documents from the matrix, streams need it explicitly"""
+    import pytest
+    from scipy import sparse
+    document_term_matrix = sparse.csr_matrix(np.array([[5, 5, 0, 0], [0, 0, 5, 5]] * 30))
+    model = OnlineLDA(n_topics=2, n_types=4, batch_size=10, random_state=0).fit(document_term_matrix)
+    assert model.total_documents_ == 60 and model.documents_seen_ == 60
+    stream = (np.array([0, 1]) for _ in range(10))
+    with pytest.raises(ValueError):
+        OnlineLDA(n_topics=2, n_types=4).fit(stream)
+    with pytest.raises(ValueError):
+        OnlineLDA(n_topics=2, n_types=4).partial_fit([np.array([0, 1])])
+    assert OnlineLDA(n_topics=2, n_types=4, total_documents=10).partial_fit([np.array([0, 1])]).total_documents_ == 10
+
+
+def test_gibbs_resume_matches_uninterrupted_run():
+    """resuming from a checkpoint continues the same Markov chain"""
+    import os
+    import tempfile
+    document_term_matrix = _document_term_matrix()
+    uninterrupted = GibbsLDA(n_topics=4, n_iter=10, random_state=3).fit(document_term_matrix)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        checkpoint = os.path.join(tmpdir, 'gibbs.npz')
+        GibbsLDA(n_topics=4, n_iter=6, random_state=3, checkpoint=checkpoint,
+                 checkpoint_interval=3).fit(document_term_matrix)
+        resumed = lda(document_term_matrix, 4, iterations=10, implementation='gibbs', resume_from=checkpoint)
+    assert np.array_equal(uninterrupted.topic_assignments_, resumed.topic_assignments_)
+    assert resumed.iteration_ == 10
+
+
+def test_lda_package_resume_matches_uninterrupted_run():
+    """checkpoints of the lda package continue the same Markov chain"""
+    import os
+    import tempfile
+    document_term_matrix = _document_term_matrix()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        checkpoint = os.path.join(tmpdir, 'lda.npz')
+        uninterrupted = lda(document_term_matrix, 4, iterations=10, random_state=3,
+                            checkpoint=checkpoint, checkpoint_interval=10)
+        lda(document_term_matrix, 4, iterations=5, random_state=3, checkpoint=checkpoint, checkpoint_interval=5)
+        resumed = lda(document_term_matrix, 4, iterations=10, random_state=3, resume_from=checkpoint)
+    assert np.allclose(uninterrupted.doc_topic_, resumed.doc_topic_)
+
+
+def test_lda_package_checkpoints_sparse_matrices():
+    """a sparse document-term matrix is checkpointed and resumed like a dense one"""
+    import os
+    import tempfile
+    from scipy import sparse
+    document_term_matrix = sparse.csr_matrix(_document_term_matrix())
+    with tempfile.TemporaryDirectory() as tmpdir:
+        checkpoint = os.path.join(tmpdir, 'lda.npz')
+        dense = lda(document_term_matrix.toarray(), 4, iterations=10, random_state=3,
+                    checkpoint=checkpoint, checkpoint_interval=10)
+        lda(document_term_matrix, 4, iterations=5, random_state=3, checkpoint=checkpoint, checkpoint_interval=5)
+        resumed = lda(document_term_matrix, 4, iterations=10, random_state=3, resume_from=checkpoint)
+    assert np.allclose(dense.doc_topic_, resumed.doc_topic_)
+
+
+def test_monitor_stops_early_on_plateau():
+    """sampling stops once the log likelihood plateaus and the trace is returned"""
+    from dariah_topics.modeling import TrainingMonitor
+    document_term_matrix = np.zeros((10, 10), dtype=int)
+    document_term_matrix[:5, :5] = 5
+    document_term_matrix[5:, 5:] = 5
+    monitor = TrainingMonitor(interval=5, tolerance=1e-2, patience=2)
+    model, trace = lda(document_term_matrix, 2, iterations=1000, implementation='gibbs',
+                       random_state=0, monitor=monitor)
+    assert monitor.converged_
+    assert model.iteration_ < 1000
+    assert trace['step'].iloc[-1] == model.iteration_
+    assert np.allclose(trace['perplexity'], np.exp(-trace['loglikelihood_per_token']))
+    assert trace['seconds'].is_monotonic_increasing
+
+
+def test_monitor_online_and_gensim():
+    """online and Gensim report a trace per minibatch and pass"""
+    from gensim.corpora import Dictionary
+    from dariah_topics.modeling import TrainingMonitor
+    rng = np.random.RandomState(0)
+    stream = (rng.randint(0, 5, 20) if n % 2 else rng.randint(5, 10, 20) for n in range(200))
+    _, trace = lda(None, 2, implementation='online', corpus_stream=stream, n_types=10, batch_size=20,
+                   total_documents=200, random_state=0, monitor=TrainingMonitor(interval=2, tolerance=None))
+    assert trace['step'].tolist() == [2, 4, 6, 8, 10]
+    documents = [['a', 'b', 'a'], ['c', 'd', 'd'], ['a', 'b'], ['c', 'd']]
+    dictionary = Dictionary(documents)
+    gensim_corpus = [dictionary.doc2bow(document) for document in documents]
+    _, trace = lda(None, 2, implementation='gensim', gensim_corpus=gensim_corpus, type2id=dictionary,
+                   passes=3, monitor=TrainingMonitor(interval=1, tolerance=None))
+    assert trace['step'].tolist() == [1, 2, 3]
+
+
+def test_sweep_persists_and_resumes():
+    """a sweep appends each configuration to the table and skips finished ones"""
+    import os
+    import tempfile
+    from dariah_topics.modeling import sweep
+    document_term_matrix = _document_term_matrix(num_documents=30)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = os.path.join(tmpdir, 'sweep.csv')
+        first = sweep(document_term_matrix, [2, 4], alphas=[0.1, 0.5], iterations=5, n_jobs=2, output=output)
+        assert len(first) == 4 and len(open(output).readlines()) == 5
+        assert (first['perplexity'] > 1).all() and np.isfinite(first['coherence']).all()
+        second = sweep(document_term_matrix, [2, 4, 6], alphas=[0.1, 0.5], iterations=5, n_jobs=2, output=output)
+        assert len(second) == 6 and len(open(output).readlines()) == 7
+        assert np.allclose(second[second['topics'] < 6]['perplexity'], first['perplexity'])
+
+
+def test_infer_all_python_backends():
+    """fold-in and E-step inference recover the topic of new documents"""
+    from gensim.corpora import Dictionary
+    from dariah_topics.modeling import infer
+    document_term_matrix = np.zeros((10, 10), dtype=int)
+    document_term_matrix[:5, :5] = 5
+    document_term_matrix[5:, 5:] = 5
+    new_documents = np.zeros((2, 10), dtype=int)
+    new_documents[0, :3] = 4
+    new_documents[1, 7:] = 4
+    for implementation in ['lda', 'gibbs']:
+        model = lda(document_term_matrix, 2, iterations=100, implementation=implementation, random_state=0)
+        doc_topic = infer(model, new_documents, random_state=0)
+        assert np.allclose(doc_topic.sum(axis=1), 1)
+        assert doc_topic[0].argmax() == model.doc_topic_[0].argmax()
+        assert doc_topic[1].argmax() == model.doc_topic_[5].argmax()
+    documents = [['a', 'b', 'c'] * 5] * 5 + [['x', 'y', 'z'] * 5] * 5
+    dictionary = Dictionary(documents)
+    gensim_corpus = [dictionary.doc2bow(document) for document in documents]
+    model = lda(None, 2, implementation='gensim', gensim_corpus=gensim_corpus, type2id=dictionary,
+                passes=20, random_state=0)
+    doc_topic = infer(model, gensim_corpus=gensim_corpus, chunksize=3)
+    assert doc_topic.shape == (10, 2)
+    assert doc_topic[0].argmax() != doc_topic[9].argmax()
+
+
+def test_infer_mallet_keeps_burn_in_and_topics():
+    """an explicit burn_in of 0 reaches MALLET, thresholded topics keep their columns"""
+    import os
+    import sys
+    import tempfile
+    from dariah_topics.modeling import infer
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executable = os.path.join(tmpdir, 'mallet')
+        burn_in = os.path.join(tmpdir, 'burn_in')
+        with open(executable, 'w') as file:
+            file.write("#!{}\nimport sys\nargs = sys.argv\n"
+                       "if '--output' in args:\n"
+                       "    open(args[args.index('--output') + 1], 'w').write('x')\n"
+                       "if '--output-doc-topics' in args:\n"
+                       "    open({!r}, 'w').write(args[args.index('--burn-in') + 1])\n"
+                       "    open(args[args.index('--output-doc-topics') + 1], 'w').write(\n"
+                       "        '#doc name topic proportion\\n0\\tfile:/new.txt\\t1\\t1.0\\n')\n"
+                       .format(sys.executable, burn_in))
+        os.chmod(executable, 0o755)
+        doc_topic = infer(path_to_mallet=executable, inferencer='inferencer', mallet_corpus='corpus.mallet',
+                          clean_tokenized_corpus=[['a', 'b']], document_labels=['new'], iterations=10,
+                          burn_in=0, num_topics=3, doc_topics_threshold=0.5)
+        with open(burn_in) as file:
+            assert file.read() == '0'
+    assert doc_topic.tolist() == [[0.0, 1.0, 0.0]]
+
+
+def test_mallet_state_warm_start():
+    """a MALLET state becomes a checkpoint that resumes with the same counts"""
+    import gzip
+    import os
+    import tempfile
+    from dariah_topics.modeling import mallet_state_to_checkpoint
+    from dariah_topics.postprocessing import read_mallet_state
+    document_term_matrix = _document_term_matrix()
+    model = GibbsLDA(n_topics=4, n_iter=5, random_state=0).fit(document_term_matrix)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_file = os.path.join(tmpdir, 'state.gz')
+        with gzip.open(state_file, 'wt', encoding='utf-8') as file:
+            file.write('#doc source pos typeindex type topic\n#alpha : 0.1 0.1 0.1 0.1 \n#beta : 0.01 \n')
+            for position, (document_id, type_id, topic) in enumerate(zip(model.document_ids_, model.token_ids_,
+                                                                       model.topic_assignments_)):
+                file.write('{} NA {} {} type{} {}\n'.format(document_id, position, type_id, type_id, topic))
+        state = read_mallet_state(state_file, chunksize=50)
+        assert np.array_equal(state['topic_types'].toarray(), model.nzw_)
+        assert np.array_equal(state['document_topics'].toarray(), model.ndz_)
+        checkpoint = os.path.join(tmpdir, 'warm.npz')
+        vocabulary = mallet_state_to_checkpoint(state_file, checkpoint, chunksize=50)
+        assert vocabulary[3] == 'type3'
+        resumed = lda(document_term_matrix, 4, iterations=1, implementation='gibbs', resume_from=checkpoint)
+    assert np.array_equal(resumed.nzw_.sum(axis=0), document_term_matrix.sum(axis=0))
+    assert resumed.iteration_ == 1
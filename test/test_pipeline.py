@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+from dariah_topics.pipeline import main
+
+
+def test_pipeline_reruns_only_changed_stages():
+    """changing the number of topics reuses the cached preprocessing"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, 'corpus'))
+        for n in range(6):
+            words = ['apple', 'banana', 'cherry'] if n % 2 else ['river', 'mountain', 'valley']
+            with open(os.path.join(tmpdir, 'corpus', 'document{}.txt'.format(n)), 'w', encoding='utf-8') as file:
+                file.write(' '.join(words * 20 + ['the'] * 30))
+        config = {'corpus': 'corpus/*.txt', 'segment': {'segment_size': 40},
+                  'remove_features': {'most_frequent_tokens': 1},
+                  'train': {'num_topics': 2, 'iterations': 20, 'implementation': 'gibbs', 'random_state': 0},
+                  'topics': {'num_keys': 3}}
+        config_file = os.path.join(tmpdir, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as file:
+            json.dump(config, file)
+        main([config_file, '--quiet'])
+        cache_dir = os.path.join(tmpdir, '.dariah_topics_cache')
+        first = {name: os.stat(os.path.join(cache_dir, name)).st_mtime_ns for name in os.listdir(cache_dir)}
+        assert sorted(name.split('-')[0] for name in first) == ['read', 'remove_features', 'segment', 'tokenize',
+                                                                  'topics', 'train']
+        with open(os.path.join(tmpdir, 'output', 'topics.csv'), encoding='utf-8') as file:
+            assert 'the' not in file.read().split(',')
+
+        config['train']['num_topics'] = 3
+        with open(config_file, 'w', encoding='utf-8') as file:
+            json.dump(config, file)
+        main([config_file, '--quiet'])
+        second = {name: os.stat(os.path.join(cache_dir, name)).st_mtime_ns for name in os.listdir(cache_dir)}
+        assert sorted(name.split('-')[0] for name in set(second) - set(first)) == ['topics', 'train']
+        assert all(second[name] == first[name] for name in first)
+        with open(os.path.join(tmpdir, 'output', 'document_topics.csv'), encoding='utf-8') as file:
+            assert len(file.readlines()) == 4
+
+
+def test_pipeline_reads_sharded_corpus():
+    """a sharded corpus gives the same topics as the text files it was saved from"""
+    from dariah_topics.pipeline import run
+    from dariah_topics.postprocessing import save_sharded_corpus
+    from dariah_topics.preprocessing import read_sharded_corpus
+    labels = ['document{}'.format(n) for n in range(6)]
+    documents = [(['apple', 'banana', 'cherry'] if n % 2 else ['river', 'mountain', 'valley']) * 20
+                 for n in range(6)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, 'corpus'))
+        for label, tokens in zip(labels, documents):
+            with open(os.path.join(tmpdir, 'corpus', '{}.txt'.format(label)), 'w', encoding='utf-8') as file:
+                file.write(' '.join(tokens))
+        save_sharded_corpus(documents, labels, os.path.join(tmpdir, 'sharded'), documents_per_shard=4, block_size=50)
+        corpus = read_sharded_corpus(os.path.join(tmpdir, 'sharded'))
+        assert len(corpus.manifest['shards']) == 2
+        assert corpus['document5'] == documents[5] and list(corpus) == documents
+        train = {'num_topics': 2, 'iterations': 20, 'implementation': 'gibbs', 'random_state': 0}
+        results = [run({'corpus': os.path.join(tmpdir, source), 'train': train, 'topics': {'num_keys': 3},
+                        'cache_dir': os.path.join(tmpdir, 'cache'), 'output': os.path.join(tmpdir, 'output', name)})
+                   for name, source in [('text', 'corpus/*.txt'), ('sharded', 'sharded')]]
+    assert results[0][0].equals(results[1][0])
+    assert results[0][1].equals(results[1][1])
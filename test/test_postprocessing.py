@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import pytest
+from dariah_topics.postprocessing import read_mallet_doc_topics, show_topic_key_weights
+import numpy as np
+
+
+def test_mallet_readers_cache_until_file_changes():
+    """both doc-topics formats agree, results are cached until the file changes"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dense = os.path.join(tmpdir, 'dense.txt')
+        pairs = os.path.join(tmpdir, 'pairs.txt')
+        with open(dense, 'w', encoding='utf-8') as file:
+            file.write('0\tfile:/corpus/one.txt\t0.25\t0.75\n1\tfile:/corpus/two.txt\t0.5\t0.5\n')
+        with open(pairs, 'w', encoding='utf-8') as file:
+            file.write('#doc name topic proportion ...\n'
+                       '0\tfile:/corpus/one.txt\t1\t0.75\t0\t0.25\n1\tfile:/corpus/two.txt\t0\t0.5\t1\t0.5\n')
+        labels, document_topics = read_mallet_doc_topics(dense)
+        assert labels == ['one', 'two']
+        assert np.array_equal(document_topics, read_mallet_doc_topics(pairs)[1])
+        assert read_mallet_doc_topics(dense)[1] is document_topics
+        with open(dense, 'a', encoding='utf-8') as file:
+            file.write('2\tfile:/corpus/three.txt\t1.0\t0.0\n')
+        assert read_mallet_doc_topics(dense)[0] == ['one', 'two', 'three']
+
+        thresholded = os.path.join(tmpdir, 'thresholded.txt')
+        with open(thresholded, 'w', encoding='utf-8') as file:
+            file.write('#doc name topic proportion ...\n0\tfile:/corpus/one.txt\t1\t0.9\n')
+        assert read_mallet_doc_topics(thresholded)[1].shape == (1, 2)
+        assert read_mallet_doc_topics(thresholded, 3)[1].tolist() == [[0.0, 0.9, 0.0]]
+        with pytest.raises(ValueError):
+            read_mallet_doc_topics(thresholded, 1)
+        with pytest.raises(ValueError):
+            read_mallet_doc_topics(dense, 3)
+
+        weights = os.path.join(tmpdir, 'weights.txt')
+        with open(weights, 'w', encoding='utf-8') as file:
+            file.write('0\tnull\t0.5\n0\tNA\t0.1\n1\tnull\t0.2\n1\tNA\t0.9\n')
+        assert show_topic_key_weights(1, 2, topic_word_weights_file=weights).to_dict() == {'null': 0.2, 'NA': 0.9}
+
+
+def test_top_keys_match_full_sort():
+    """argpartition ranking agrees with sorting the whole topic-word matrix"""
+    from dariah_topics.modeling import GibbsLDA
+    from dariah_topics.postprocessing import show_topics
+    rng = np.random.RandomState(0)
+    model = GibbsLDA(n_topics=3, n_iter=5, random_state=0).fit(rng.poisson(1.0, size=(10, 50)))
+    model.topic_word_ = rng.dirichlet(np.ones(50), size=3)
+    vocabulary = ['type{}'.format(n) for n in range(50)]
+    topics = show_topics(model=model, vocabulary=vocabulary, num_keys=5)
+    expected = np.array(vocabulary)[np.argsort(-model.topic_word_, axis=1)[:, :5]]
+    assert np.array_equal(topics.values, expected)
+    key_weights = show_topic_key_weights(2, 4, model=model, vocabulary=vocabulary)
+    assert key_weights.index.tolist() == expected[2, :4].tolist()
+    assert key_weights.is_monotonic_decreasing
+
+    vocabulary[int(expected[0, 0].replace('type', ''))] = 'changed'
+    assert show_topics(model=model, vocabulary=vocabulary, num_keys=5).iloc[0, 0] == 'changed'
+    assert show_topic_key_weights(0, 1, model=model, vocabulary=vocabulary).index[0] == 'changed'
+
+
+def test_gensim_document_topics_batched():
+    """chunked and parallel inference agree with per-document inference"""
+    from gensim.corpora import Dictionary
+    from gensim.models import LdaModel
+    from dariah_topics.postprocessing import gensim_document_topics
+    documents = [['a', 'b', 'c'] * 5] * 5 + [['x', 'y', 'z'] * 5] * 5 + [['a', 'x']]
+    dictionary = Dictionary(documents)
+    corpus = [dictionary.doc2bow(document) for document in documents]
+    model = LdaModel(corpus=corpus, id2word=dictionary, num_topics=3, passes=20, random_state=0)
+    expected = np.zeros((len(corpus), 3))
+    for n, document in enumerate(corpus):
+        for topic, proportion in model.get_document_topics(document, minimum_probability=0.1):
+            expected[n, topic] = proportion
+    for n_jobs in [None, 2]:
+        document_topics = gensim_document_topics(model, iter(corpus), minimum_probability=0.1, chunksize=4,
+                                                 n_jobs=n_jobs)
+        assert document_topics.format == 'csr' and document_topics.shape == (11, 3)
+        assert np.allclose(document_topics.toarray(), expected, atol=0.05)
+        assert document_topics.nnz == np.count_nonzero(expected)
+
+
+def test_sparse_document_topics_of_online_models():
+    """OnlineLDA is inferred in chunks, unsupported input raises a ValueError"""
+    from dariah_topics.modeling import OnlineLDA
+    from dariah_topics.postprocessing import show_document_topics
+    documents = [[0, 1] * 5 if n % 2 else [2, 3] * 5 for n in range(20)]
+    model = OnlineLDA(n_topics=2, n_types=4, batch_size=5, random_state=0).fit(documents)
+    document_topics = show_document_topics(None, model=model, doc2bow=iter(documents), output='sparse', chunksize=3)
+    assert document_topics.shape == (20, 2)
+    assert np.allclose(document_topics.toarray(), model.transform(documents))
+    with pytest.raises(ValueError):
+        show_document_topics(None, model=model, output='sparse')
+    with pytest.raises(ValueError):
+        show_document_topics(None, model=object(), output='sparse')
+    with pytest.raises(ValueError):
+        show_document_topics(None, output='sparse')
+
+
+def test_saved_models_are_memory_mapped():
+    """lda, Gensim and in-package models read back without pickle and infer the same topics"""
+    import json
+    import lda
+    from gensim.corpora import Dictionary
+    from gensim.models import LdaModel
+    from dariah_topics.modeling import AliasLDA, OnlineLDA, infer
+    from dariah_topics.postprocessing import save_model
+    from dariah_topics.preprocessing import read_model
+    document_term_matrix = np.array([[5, 5, 0, 0], [0, 0, 5, 5]] * 5)
+    documents = [['a', 'b', 'c'] * 5, ['x', 'y', 'z'] * 5] * 5
+    dictionary = Dictionary(documents)
+    corpus = [dictionary.doc2bow(document) for document in documents]
+    models = [lda.LDA(n_topics=2, n_iter=20, random_state=0).fit(document_term_matrix),
+              AliasLDA(n_topics=2, n_iter=20, random_state=0).fit(document_term_matrix),
+              OnlineLDA(n_topics=2, n_types=4, batch_size=5, random_state=0).fit([[0, 1] * 5 if n % 2 else [2, 3] * 5
+                                                                                  for n in range(50)]),
+              LdaModel(corpus=corpus, id2word=dictionary, num_topics=2, passes=5, random_state=0)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n, model in enumerate(models):
+            path = os.path.join(tmpdir, 'model{}'.format(n))
+            save_model(model, path)
+            save_model(model, path)
+            with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as file:
+                assert json.load(file)['format'] == 'dariah_topics.model'
+            loaded = read_model(path)
+            assert type(loaded) is type(model)
+            if isinstance(model, LdaModel):
+                assert isinstance(loaded.expElogbeta, np.memmap)
+                assert loaded.id2word.token2id == dictionary.token2id
+                assert np.allclose(infer(loaded, gensim_corpus=corpus), infer(model, gensim_corpus=corpus))
+            else:
+                assert isinstance(loaded.topic_word_, np.memmap)
+                assert np.array_equal(loaded.topic_word_, model.topic_word_)
+                assert np.allclose(infer(loaded, document_term_matrix, random_state=0),
+                                   infer(model, document_term_matrix, random_state=0))
+        assert sorted(os.listdir(tmpdir)) == ['model0', 'model1', 'model2', 'model3']
+
+        pickled = os.path.join(tmpdir, 'model.pickle')
+        with pytest.warns(DeprecationWarning):
+            save_model(models[0], pickled)
+        with pytest.raises(ValueError):
+            read_model(pickled)
+        with pytest.warns(DeprecationWarning):
+            assert np.array_equal(read_model(pickled, allow_pickle=True).topic_word_, models[0].topic_word_)
+
+
+def test_save_tokenized_corpus_fans_out_to_subdirectories():
+    """every document is written once under its label, errors of the writers are raised"""
+    import glob
+    from dariah_topics.postprocessing import save_tokenized_corpus
+    labels = ['document{}'.format(n) for n in range(300)]
+    tokenized_corpus = (['token{}'.format(n), 'shared'] for n in range(300))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        save_tokenized_corpus(tokenized_corpus, labels, tmpdir, n_jobs=4, fan_out=16, queue_size=8)
+        assert len(os.listdir(tmpdir)) == 16
+        pathlist = glob.glob(os.path.join(tmpdir, '*', '*.txt'))
+        assert sorted(os.path.splitext(os.path.basename(path))[0] for path in pathlist) == sorted(labels)
+        with open(glob.glob(os.path.join(tmpdir, '*', 'document7.txt'))[0], encoding='utf-8') as file:
+            assert file.read() == 'token7\nshared'
+        with pytest.raises(FileNotFoundError):
+            save_tokenized_corpus([['a']] * 50, ['missing/document{}'.format(n) for n in range(50)],
+                                  os.path.join(tmpdir, 'flat'), n_jobs=2, queue_size=2)
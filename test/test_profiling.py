@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+from dariah_topics import profiling
+from dariah_topics.pipeline import main
+
+
+def test_profiling_records_functions_and_restores_them():
+    """generators are counted by items, functions are restored afterwards"""
+    import importlib
+    preprocessing = importlib.import_module('dariah_topics.preprocessing')
+    original = preprocessing.tokenize
+    profiling.reset()
+    profiling.enable()
+    try:
+        assert preprocessing.tokenize is not original
+        tokens = list(preprocessing.tokenize('this is an example text'))
+        preprocessing.encode_tokenized_corpus([tokens], {token: n for n, token in enumerate(tokens)})
+    finally:
+        profiling.disable()
+    assert preprocessing.tokenize is original
+    functions = {total['function']: total for total in profiling.report()['functions']}
+    assert functions['dariah_topics.preprocessing.tokenize']['items'] == 5
+    assert functions['dariah_topics.preprocessing.tokenize']['calls'] == 1
+    assert functions['dariah_topics.preprocessing.tokenize']['wall_time'] >= 0
+
+
+def test_profiling_awaits_coroutine_functions():
+    """coroutines are timed until their result, not until they are created"""
+    import asyncio
+    import sys
+    import types
+    module = types.ModuleType('async_example')
+    exec('import asyncio\n'
+         'async def wait(seconds):\n'
+         '    await asyncio.sleep(seconds)\n'
+         '    return [1, 2, 3]\n', module.__dict__)
+    sys.modules[module.__name__] = module
+    profiling.reset()
+    profiling.enable([module.__name__])
+    try:
+        assert asyncio.run(module.wait(0.05)) == [1, 2, 3]
+    finally:
+        profiling.disable()
+        del sys.modules[module.__name__]
+    functions = {total['function']: total for total in profiling.report()['functions']}
+    assert functions['async_example.wait']['items'] == 3
+    assert functions['async_example.wait']['wall_time'] >= 0.05
+
+
+def test_pipeline_profile_report():
+    """every pipeline stage and the library calls end up in the JSON report"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, 'corpus'))
+        for n in range(4):
+            with open(os.path.join(tmpdir, 'corpus', '{}.txt'.format(n)), 'w', encoding='utf-8') as file:
+                file.write('apple banana cherry ' * 10 if n % 2 else 'river mountain valley ' * 10)
+        config_file = os.path.join(tmpdir, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as file:
+            json.dump({'corpus': 'corpus/*.txt', 'train': {'num_topics': 2, 'iterations': 10,
+                                                           'implementation': 'gibbs'}}, file)
+        report_file = os.path.join(tmpdir, 'report.json')
+        main([config_file, '--quiet', '--profile', report_file])
+        with open(report_file, encoding='utf-8') as file:
+            report = json.load(file)
+    functions = {total['function']: total for total in report['functions']}
+    for stage in ['read', 'tokenize', 'remove_features', 'train', 'topics']:
+        assert functions['pipeline.{}'.format(stage)]['calls'] == 1
+    assert functions['dariah_topics.preprocessing.read_files']['items'] == 4
+    assert functions['dariah_topics.modeling.lda']['cpu_time'] > 0
+    assert not profiling.is_enabled()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+from dariah_topics.modeling import GibbsLDA
+from dariah_topics.server import TopicServer, load_test, request
+import numpy as np
+
+
+def _model():
+    document_term_matrix = np.zeros((10, 6), dtype=int)
+    document_term_matrix[:5, :3] = 5
+    document_term_matrix[5:, 3:] = 5
+    return GibbsLDA(n_topics=2, n_iter=50, random_state=0).fit(document_term_matrix)
+
+
+def test_server_batches_concurrent_requests():
+    """concurrent requests are answered in order and share batches"""
+    vocabulary = ['a', 'b', 'c', 'x', 'y', 'z']
+    server = TopicServer(_model(), vocabulary, address=('127.0.0.1', 0), max_delay=0.05, random_state=0).start()
+    try:
+        payloads = [{'documents': [['a', 'b', 'unknown'], ['x', 'z', 'z']]}] * 8
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(lambda payload: request(server.url, '/infer', payload), payloads))
+        for response in responses:
+            doc_topic = np.array(response['doc_topics'])
+            assert doc_topic.shape == (2, 2)
+            assert doc_topic[0].argmax() != doc_topic[1].argmax()
+        stats = request(server.url, '/stats')
+        assert stats['requests'] == 8 and stats['documents'] == 16
+        assert stats['batches'] < 8
+        topics = request(server.url, '/topics?num_keys=3')['topics']
+        assert sorted(map(sorted, topics)) == [['a', 'b', 'c'], ['x', 'y', 'z']]
+    finally:
+        server.shutdown()
+
+
+def test_server_unix_socket_load_test():
+    """the load test reports throughput over a Unix socket"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'topics.sock')
+        server = TopicServer(_model(), ['a', 'b', 'c', 'x', 'y', 'z'], address=path).start()
+        try:
+            report = load_test(server.url, num_requests=20, concurrency=4, document_length=10, random_state=0)
+        finally:
+            server.shutdown()
+        assert not os.path.exists(path)
+    assert report['requests'] == 20 and report['requests_per_second'] > 0
+    assert report['latency_p50_ms'] <= report['latency_max_ms']
+
+
+def test_server_survives_invalid_documents():
+    """malformed documents are rejected without stopping the batch thread"""
+    import pytest
+    server = TopicServer(_model(), ['a', 'b', 'c', 'x', 'y', 'z'], address=('127.0.0.1', 0), max_keys=2).start()
+    try:
+        for documents in [5, [['a', 1]], 'ab']:
+            with pytest.raises(OSError, match='400'):
+                request(server.url, '/infer', {'documents': documents})
+        with pytest.raises(TypeError):
+            server.infer(5)
+        response = request(server.url, '/infer', {'documents': [['a', 'b']]})
+        assert np.array(response['doc_topics']).shape == (1, 2)
+        assert [len(keys) for keys in request(server.url, '/topics?num_keys=10')['topics']] == [2, 2]
+    finally:
+        server.shutdown()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from multiprocessing import Pool
+import numpy as np
+import pytest
+from scipy import sparse
+from dariah_topics.shared import SharedDocumentTermMatrix
+
+
+def _column_sums(handle):
+    shared = SharedDocumentTermMatrix.attach(handle)
+    try:
+        return shared.vocabulary, np.asarray(shared.matrix.sum(axis=0)).ravel().tolist()
+    finally:
+        shared.close()
+
+
+def test_workers_attach_to_shared_document_term_matrix():
+    """workers read the matrix and vocabulary by name, the blocks are freed on close"""
+    matrix = sparse.random(50, 8, density=0.3, format='csr', random_state=0)
+    vocabulary = ['type{}'.format(n) for n in range(8)]
+    with SharedDocumentTermMatrix(matrix, vocabulary=vocabulary) as shared:
+        assert np.shares_memory(shared.matrix.data, shared.arrays['data'])
+        with Pool(2) as pool:
+            results = pool.map(_column_sums, [shared.handle] * 3)
+        handle = shared.handle
+    names = [name for name, _, _ in handle.values()]
+    assert shared.closed
+    for result_vocabulary, sums in results:
+        assert result_vocabulary == vocabulary
+        assert np.allclose(sums, np.asarray(matrix.sum(axis=0)).ravel())
+    if os.path.isdir('/dev/shm'):
+        assert not any(os.path.exists(os.path.join('/dev/shm', name.lstrip('/'))) for name in names)
+    with pytest.raises(FileNotFoundError):
+        SharedDocumentTermMatrix.attach(handle)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import numpy as np
+from dariah_topics.preprocessing import read_files, tokenize
+from dariah_topics.synthetic import SyntheticCorpus
+
+
+def test_synthetic_corpus_is_reproducible_and_zipfian():
+    """documents are the same in any order, and frequent types are frequent"""
+    corpus = SyntheticCorpus(300, num_types=2000, num_topics=10, mean_length=200, random_state=3)
+    again = SyntheticCorpus(300, num_types=2000, num_topics=10, mean_length=200, random_state=3)
+    assert again.document(299) == corpus.document(299)
+    assert [tokens for _, tokens in corpus][42] == corpus.document(42)
+    assert SyntheticCorpus(300, num_types=2000, random_state=4).document(42) != corpus.document(42)
+
+    document_term_matrix = corpus.document_term_matrix()
+    lengths = np.asarray(document_term_matrix.sum(axis=1)).ravel()
+    assert 150 < lengths.mean() < 250
+    assert lengths.max() > 2 * np.median(lengths)
+    frequencies = np.asarray(document_term_matrix.sum(axis=0)).ravel()
+    assert frequencies[0] > frequencies[10] > frequencies[100:].mean()
+
+
+def test_synthetic_corpus_plants_topics():
+    """tokens of a dominant topic are drawn from that topic's types"""
+    corpus = SyntheticCorpus(50, num_types=3000, num_topics=5, alpha=0.01, background=0.0, random_state=0)
+    for n in range(10):
+        topic = corpus.doc_topic(n).argmax()
+        types = set(corpus.topic_word_[topic].indices)
+        assert np.mean([type_id in types for type_id in corpus.type_ids(n)]) > 0.9
+
+
+def test_synthetic_corpus_written_to_disk():
+    """the text files tokenize to the generated documents"""
+    corpus = SyntheticCorpus(25, num_types=500, mean_length=80, random_state=1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pathlist = corpus.write(tmpdir, documents_per_directory=10)
+        assert sorted(os.listdir(tmpdir)) == ['0000', '0001', '0002']
+        for n, document in enumerate(read_files(pathlist)):
+            assert list(tokenize(document)) == corpus.document(n)
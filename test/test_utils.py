@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import subprocess
+import sys
+import time
+from dariah_topics.utils import call_commandline_async
+from pytest import raises
+
+CHATTY = ("import sys\n"
+          "for n in range(20000):\n"
+          "    sys.stdout.write('out %d\\n' % n)\n"
+          "    sys.stderr.write('<%d> LL/token: -8.5\\n' % n)\n")
+
+
+def test_async_streams_both_pipes():
+    """large output on both pipes reaches the callbacks without deadlock"""
+    progress = []
+    result = asyncio.run(call_commandline_async([sys.executable, '-c', CHATTY], callback=progress.append,
+                                                timeout=60))
+    assert result.returncode == 0
+    assert len(result.stdout) == len(result.stderr) == len(progress) == 20000
+    assert progress[-1] == '<19999> LL/token: -8.5'
+
+
+def test_async_timeout_and_cancellation_terminate():
+    """a timeout raises and cancelling the task terminates the subprocess"""
+    sleeper = [sys.executable, '-c', 'import time; time.sleep(60)']
+    start = time.perf_counter()
+    with raises(subprocess.TimeoutExpired):
+        asyncio.run(call_commandline_async(sleeper, timeout=0.5))
+
+    async def cancel():
+        task = asyncio.ensure_future(call_commandline_async(sleeper))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    assert time.perf_counter() - start < 30
+
+
+FAKE_MALLET = """#!{python}
+import os, sys, time
+command, args = sys.argv[1], [arg for arg in sys.argv[2:] if arg != '--keep-sequence']
+args = dict(zip(args[::2], args[1::2]))
+if command == 'import-dir':
+    if not any(name.endswith('.txt') for _, _, names in os.walk(args['--input']) for name in names):
+        sys.exit(2)
+    if not os.path.exists(args['--output'] + '.failed'):
+        open(args['--output'] + '.failed', 'w').close()
+        sys.exit(1)
+    open(args['--output'], 'w').close()
+    sys.exit(0)
+keys = args['--output-topic-keys']
+if not os.path.exists(keys + '.failed'):
+    open(keys + '.failed', 'w').close()
+    sys.exit(1)
+with open({running!r}, 'a') as file:
+    file.write('+')
+time.sleep(0.5)
+with open({running!r}) as file:
+    concurrent = file.read().count('+')
+with open(keys, 'w') as file:
+    file.write(' '.join([os.environ.get('MALLET_MEMORY', ''), args['--num-threads'], str(concurrent)]))
+with open({running!r}, 'w') as file:
+    file.write('')
+"""
+
+
+def test_mallet_pool_runs_jobs_concurrently_with_retries(monkeypatch):
+    """jobs run concurrently with their own resources, failed imports and trainings are retried"""
+    import os
+    import tempfile
+    from dariah_topics import postprocessing
+    from dariah_topics.utils import MalletPool
+    written = []
+    save_tokenized_corpus = postprocessing.save_tokenized_corpus
+    monkeypatch.setattr(postprocessing, 'save_tokenized_corpus',
+                        lambda *args: written.append(args[2]) or save_tokenized_corpus(*args))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executable = os.path.join(tmpdir, 'mallet')
+        with open(executable, 'w') as file:
+            file.write(FAKE_MALLET.format(python=sys.executable, running=os.path.join(tmpdir, 'running')))
+        os.chmod(executable, 0o755)
+        with MalletPool(executable, max_workers=2, memory='1g', retries=2) as pool:
+            futures = [pool.train_topics(iter([['a', 'b']]), ['document'], num_threads=n, memory='3g' if n == 3 else None,
+                                         output_topic_keys=os.path.join(tmpdir, 'keys_{}.txt'.format(n)))
+                       for n in range(1, 4)]
+            results = [future.result(timeout=60) for future in futures]
+        assert all(result.returncode == 0 for result in results)
+        assert len(written) == len(set(written)) == 3
+        settings = [open(os.path.join(tmpdir, 'keys_{}.txt'.format(n))).read().split() for n in range(1, 4)]
+    assert [setting[:2] for setting in settings] == [['1g', '1'], ['1g', '2'], ['3g', '3']]
+    assert max(int(setting[2]) for setting in settings) <= 2
+
+
+def test_mallet_import_cache():
+    """an unchanged corpus is imported once, changed corpora and options again"""
+    import os
+    import tempfile
+    from dariah_topics.utils import Mallet
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executable = os.path.join(tmpdir, 'mallet')
+        counter = os.path.join(tmpdir, 'imports')
+        with open(executable, 'w') as file:
+            file.write("#!{}\nimport sys\nopen({!r}, 'a').write('+')\n"
+                       "open(sys.argv[sys.argv.index('--output') + 1], 'w').write('x' * 10)\n"
+                       .format(sys.executable, counter))
+        os.chmod(executable, 0o755)
+        cache_dir = os.path.join(tmpdir, 'cache')
+        labels = ['one', 'two']
+
+        def import_corpus(corpus, max_size=None, **kwargs):
+            mallet = Mallet(executable, corpus_output=tempfile.mkdtemp(dir=tmpdir), cache_dir=cache_dir,
+                            cache_max_size=max_size)
+            return mallet.import_tokenized_corpus(corpus, labels, **kwargs)
+
+        first = import_corpus([['a', 'b'], ['c']])
+        assert import_corpus([['a', 'b'], ['c']]) == first
+        assert import_corpus(iter([['a', 'b'], ['c']])) == first
+        assert open(counter).read() == '+'
+        assert import_corpus([['a', 'b'], ['d']]) != first
+        assert import_corpus([['a', 'b'], ['c']], remove_stopwords=None) != first
+        assert open(counter).read() == '+++'
+        import_corpus([['e']], max_size=15)
+        assert len(os.listdir(cache_dir)) == 1